@@ -0,0 +1,210 @@
+"""
+Benchmark-Suite für die häufigsten DatabaseService-Operationen auf synthetischen SQLite-Datenbanken.
+
+Baut (einmalig, zwischengespeichert in benchmarks/.data/) Datenbanken mit
+1k/100k/1M Usern und 100/100k Wahlsprüchen und misst:
+get_random_wahlspruch, get_alle_parteien, get_top_users, get_user_by_session_token,
+update_user_points, create_new_wahlspruch und den Rang-Pfad von NetworkService.get_user_stats.
+Jeder Lauf arbeitet auf einer temporären Kopie des Datensatzes, schreibende Operationen
+verändern die zwischengespeicherte Datei also nicht (vergleichbare Messungen zwischen Commits).
+
+Ausgabe: eine JSON-Zeile pro (Datensatz, Operation), geeignet zum Vergleich zwischen Commits.
+
+Verwendung:
+    python benchmarks/DatabaseBenchmark.py --datasets small,medium --output before.jsonl
+    python benchmarks/DatabaseBenchmark.py --datasets small,medium --output after.jsonl
+    python benchmarks/DatabaseBenchmark.py --compare before.jsonl after.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+sys.path.insert(0, os.path.join(ROOT, "src", "Server"))
+
+from DatabaseService import DatabaseService
+
+# Name -> (Anzahl User, Anzahl Wahlsprüche)
+DATASETS = {
+    "tiny": (1_000, 100),
+    "small": (1_000, 100_000),
+    "medium": (100_000, 100),
+    "large": (100_000, 100_000),
+    "xlarge": (1_000_000, 100),
+    "huge": (1_000_000, 100_000),
+}
+
+PARTEIEN = ["AfD", "BSW", "CDU", "CSU", "Die Linke", "FDP", "Grüne", "SPD", "Freie Wähler", "Volt", "Die PARTEI", "ÖDP"]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def build_dataset(name: str, users: int, sprueche: int) -> str:
+    """Erstellt die SQLite-Datei eines Datensatzes (falls noch nicht vorhanden) und gibt den Pfad zurück"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"{name}_{users}u_{sprueche}w.db")
+    if os.path.exists(path):
+        return path
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    # Tabellen über SillyORM anlegen, damit das Schema dem Server entspricht
+    DatabaseService.SQLITE_PATH = tmp_path
+    DatabaseService.get_sillyorm_registry()
+
+    print(f"🏗️  Erzeuge Datensatz '{name}': {users} User, {sprueche} Wahlsprüche ...", file=sys.stderr)
+    rng = random.Random(42)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.executemany(
+            'INSERT INTO "user" (nickname, points, password, session_token) VALUES (?, ?, ?, ?)',
+            ((f"user{i:07d}", rng.randint(0, 5000), "x" * 64, f"token{i:07d}") for i in range(users))
+        )
+        connection.executemany(
+            'INSERT INTO "wahlspruch" (spruch, partei, wahl) VALUES (?, ?, ?)',
+            ((f"Synthetischer Wahlspruch Nummer {i}", rng.choice(PARTEIEN), "Benchmark") for i in range(sprueche))
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    DatabaseService._registries.clear()
+    os.replace(tmp_path, path)
+    return path
+
+
+def measure(function, min_runs: int, min_time: float, max_runs: int) -> list:
+    """Führt `function` mindestens `min_runs` mal bzw. `min_time` Sekunden lang aus"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_runs and (len(timings) < min_runs or time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_dataset(name: str, args) -> list:
+    users, sprueche = DATASETS[name]
+    path = build_dataset(name, users, sprueche)
+
+    # Auf einer Kopie messen: update_user_points und create_new_wahlspruch schreiben in die Datenbank
+    work_dir = tempfile.mkdtemp(prefix=f"wahlplakat-bench-{name}-")
+    try:
+        work_path = os.path.join(work_dir, os.path.basename(path))
+        shutil.copyfile(path, work_path)
+        return _run_operations(name, users, sprueche, work_path, args)
+    finally:
+        DatabaseService._registries.clear()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run_operations(name: str, users: int, sprueche: int, path: str, args) -> list:
+    DatabaseService.SQLITE_PATH = path
+    DatabaseService._registries.clear()
+    env = DatabaseService.get_sillyorm_environment()
+
+    # NetworkService erst hier importieren, damit er die Benchmark-Datenbank verwendet
+    from NetworkService import NetworkService
+    service = NetworkService(max_workers=0)
+
+    rng = random.Random(7)
+    counter = iter(range(10 ** 9))
+
+    def random_token():
+        return f"token{rng.randrange(users):07d}"
+
+    operations = {
+        "get_random_wahlspruch": lambda: DatabaseService.get_random_wahlspruch(env),
+        "get_alle_parteien": lambda: DatabaseService.get_alle_parteien(env),
+        "get_top_users": lambda: DatabaseService.get_top_users(env, limit=10),
+        "get_user_by_session_token": lambda: DatabaseService.get_user_by_session_token(env, random_token()),
+        "update_user_points": lambda: DatabaseService.update_user_points(env, rng.randrange(1, users + 1), rng.randint(0, 5000)),
+        "create_new_wahlspruch": lambda: DatabaseService.create_new_wahlspruch(env, f"Benchmark-Spruch {time.time_ns()}-{next(counter)}", rng.choice(PARTEIEN)),
+        # Rang-Pfad: Session-Cache leeren, damit jeder Aufruf dem Kaltstart eines Clients entspricht
+        "get_user_stats_rank": lambda: (service.active_sessions.clear(), service.get_user_stats(random_token())),
+    }
+
+    selected = args.operations.split(",") if args.operations else list(operations)
+    revision = git_revision()
+    results = []
+    for operation in selected:
+        timings = measure(operations[operation], args.min_runs, args.min_time, args.max_runs)
+        timings.sort()
+        results.append({
+            "revision": revision,
+            "dataset": name,
+            "users": users,
+            "wahlsprueche": sprueche,
+            "operation": operation,
+            "runs": len(timings),
+            "mean_s": statistics.mean(timings),
+            "p50_s": timings[len(timings) // 2],
+            "p95_s": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            "min_s": timings[0],
+        })
+        print(f"   {name:7s} {operation:28s} n={len(timings):5d}  p50 {results[-1]['p50_s'] * 1e3:10.3f}ms", file=sys.stderr)
+    return results
+
+
+def compare(before_path: str, after_path: str):
+    """Vergleicht zwei Ergebnisdateien (p50) und gibt das Verhältnis aus"""
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            return {(r["dataset"], r["operation"]): r for r in map(json.loads, f) if r}
+
+    before, after = load(before_path), load(after_path)
+    print(f"{'Datensatz':9s} {'Operation':28s} {'vorher p50':>12s} {'nachher p50':>12s} {'Faktor':>8s}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key]["p50_s"], after[key]["p50_s"]
+        ratio = new / old if old else float("nan")
+        print(f"{key[0]:9s} {key[1]:28s} {old * 1e3:10.3f}ms {new * 1e3:10.3f}ms {ratio:7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="tiny,small,medium", help=f"Kommagetrennt aus: {', '.join(DATASETS)}")
+    parser.add_argument("--operations", default=None, help="Kommagetrennte Auswahl der Operationen (Standard: alle)")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--min-time", type=float, default=1.0, help="Mindestmesszeit pro Operation (s)")
+    parser.add_argument("--output", default=None, help="Ergebnisse (JSON Lines) in Datei schreiben statt stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("VORHER", "NACHHER"), help="Zwei Ergebnisdateien vergleichen")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    for name in args.datasets.split(","):
+        results += run_dataset(name.strip(), args)
+
+    lines = "".join(json.dumps(r) + "\n" for r in results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(lines)
+    else:
+        sys.stdout.write(lines)
+
+
+if __name__ == "__main__":
+    main()
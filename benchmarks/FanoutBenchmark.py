@@ -0,0 +1,116 @@
+"""
+Misst die Kosten eines Lobby-Broadcasts pro Empfänger:
+Paket pro Empfänger kodieren vs. Payload einmal einfrieren (WireFormat.FrozenPayload).
+
+Ist python-socketio installiert, wird dessen Packet-Klasse verwendet, sonst die gleiche
+Kodierung nachgebildet ('2' + JSON von [event, data]).
+
+Verwendung:
+    python benchmarks/FanoutBenchmark.py [--recipients 100,1000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Server"))
+
+import WireFormat
+
+try:
+    from socketio import packet as socketio_packet
+except ImportError:
+    socketio_packet = None
+
+PARTEIEN = ["AfD", "BSW", "CDU", "CSU", "Die Linke", "FDP", "Grüne", "SPD"]
+
+
+def build_payloads(players: int) -> dict:
+    """Typische Lobby-Broadcasts für eine Lobby mit `players` Spielern"""
+    player_list = [
+        {"user_id": i, "nickname": f"Spieler{i:05d}", "points": 1000 + i, "answered": i % 3 == 0}
+        for i in range(players)
+    ]
+    return {
+        "new_round": {
+            "round_number": 42,
+            "wahlspruch": "Für ein Land, in dem wir gut und gerne leben.",
+            "wahlspruch_id": 4711
+        },
+        "round_end": {
+            "round_number": 42,
+            "correct_partei_id": PARTEIEN.index("CDU"),
+            "partei_version": "3f2a9c1d0b7e",
+            "quelle": "https://example.org/wahlplakate/2017/cdu",
+            "distribution": [[partei_id, players // len(PARTEIEN)] for partei_id in range(len(PARTEIEN))],
+            "answer_count": players,
+            "correct_count": players // 4,
+            "player_count": players,
+            "top_scorers": [{"nickname": f"Spieler{i:05d}", "points": 5000 - i} for i in range(5)]
+        },
+        "player_list_update": {"version": 1234, "players": player_list},
+    }
+
+
+def make_encoder(json_module):
+    """Kodiert ein Event-Paket wie Socket.IO (Packet.encode)"""
+    if socketio_packet is not None:
+        def encode(event, data):
+            pkt = socketio_packet.Packet(socketio_packet.EVENT, data=[event, data])
+            pkt.json = json_module
+            return pkt.encode()
+    else:
+        def encode(event, data):
+            return '2' + json_module.dumps([event, data], separators=(',', ':'))
+    return encode
+
+
+def fanout_per_recipient(event: str, data: dict, recipients: int) -> int:
+    """Bisheriger Weg: jedes Empfänger-Paket kodiert die Payload erneut"""
+    encode = make_encoder(json)
+    size = 0
+    for _ in range(recipients):
+        size += len(encode(event, data).encode('utf-8'))
+    return size
+
+
+def fanout_encode_once(event: str, data: dict, recipients: int) -> int:
+    """Neuer Weg: Payload einmal einfrieren, pro Empfänger nur noch den fertigen String einsetzen"""
+    encode = make_encoder(WireFormat)
+    frozen = WireFormat.freeze(data)
+    size = 0
+    for _ in range(recipients):
+        size += len(encode(event, frozen).encode('utf-8'))
+    return size
+
+
+def measure(function, event: str, data: dict, recipients: int, repeat: int) -> float:
+    """Bestes Ergebnis aus `repeat` Durchläufen in µs pro Empfänger"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(event, data, recipients)
+        best = min(best, time.perf_counter() - start)
+    return best / recipients * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", default="100,1000", help="Lobby-Größen (kommagetrennt)")
+    parser.add_argument("--repeat", type=int, default=5, help="Durchläufe pro Messung (bestes Ergebnis zählt)")
+    args = parser.parse_args()
+
+    print(f"Paket-Kodierung: {'python-socketio' if socketio_packet else 'nachgebildet'}")
+    print(f"{'Lobby':>6s} {'Event':20s} {'Bytes':>8s} {'pro Empf.':>11s} {'einmal':>11s} {'Faktor':>7s}")
+    for recipients in (int(n) for n in args.recipients.split(",")):
+        for event, data in build_payloads(recipients).items():
+            size = len(json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+            per_recipient = measure(fanout_per_recipient, event, data, recipients, args.repeat)
+            encode_once = measure(fanout_encode_once, event, data, recipients, args.repeat)
+            print(f"{recipients:6d} {event:20s} {size:8d} {per_recipient:9.2f}µs {encode_once:9.2f}µs {per_recipient / encode_once:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
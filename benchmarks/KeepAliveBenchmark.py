@@ -0,0 +1,93 @@
+"""
+Latenzvergleich für einen Burst sequentieller RPC-Aufrufe:
+neue TCP-Verbindung pro Aufruf (HTTP/1.0) gegen persistente Keep-Alive Verbindungen.
+
+Startet lokal einen PooledXMLRPCServer mit einer trivialen Methode, damit nur
+Verbindungsaufbau und Transport gemessen werden (ohne TLS).
+
+Verwendung:
+    python benchmarks/KeepAliveBenchmark.py [--calls 100] [--rounds 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import xmlrpc.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Server"))
+sys.path.insert(0, os.path.join(ROOT, "src", "Client"))
+
+from RpcServer import PooledXMLRPCServer, RequestHandler
+from NetworkClient import ConnectionPool, PooledTransport, JsonRpcProxy
+
+
+class PingService:
+    def ping(self):
+        return {"success": True}
+
+
+def start_server(keepalive_timeout: float) -> PooledXMLRPCServer:
+    server = PooledXMLRPCServer(
+        ("127.0.0.1", 0),
+        max_workers=4,
+        keepalive_timeout=keepalive_timeout,
+        requestHandler=RequestHandler,
+        allow_none=True,
+        logRequests=False
+    )
+    server.register_instance(PingService())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def burst(call, calls: int) -> list:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:34s} mean {statistics.mean(latencies) * 1e6:8.1f}µs  "
+          f"p50 {statistics.median(latencies) * 1e6:8.1f}µs  p99 {p99 * 1e6:8.1f}µs  "
+          f"burst {sum(latencies) / (len(latencies) / args.calls) * 1e3:7.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100, help="Aufrufe pro Burst")
+    parser.add_argument("--rounds", type=int, default=5, help="Anzahl Bursts")
+    args = parser.parse_args()
+
+    http10_server = start_server(keepalive_timeout=0)
+    keepalive_server = start_server(keepalive_timeout=5.0)
+    http10_port = http10_server.server_address[1]
+    keepalive_port = keepalive_server.server_address[1]
+
+    results = {name: [] for name in ("xmlrpc, neue Verbindung pro Aufruf", "xmlrpc, Keep-Alive Pool", "json, Keep-Alive Pool")}
+
+    for _ in range(args.rounds):
+        plain_proxy = xmlrpc.client.ServerProxy(f"http://127.0.0.1:{http10_port}/RPC2", allow_none=True)
+        results["xmlrpc, neue Verbindung pro Aufruf"] += burst(plain_proxy.ping, args.calls)
+
+        pool = ConnectionPool("127.0.0.1", keepalive_port)
+        pooled_proxy = xmlrpc.client.ServerProxy(f"http://127.0.0.1:{keepalive_port}/RPC2", transport=PooledTransport(pool), allow_none=True)
+        results["xmlrpc, Keep-Alive Pool"] += burst(pooled_proxy.ping, args.calls)
+
+        json_proxy = JsonRpcProxy(pool)
+        results["json, Keep-Alive Pool"] += burst(json_proxy.ping, args.calls)
+        pool.close_all()
+
+    print(f"{args.rounds} Bursts à {args.calls} sequentielle Aufrufe gegen 127.0.0.1\n")
+    for name, latencies in results.items():
+        report(name, latencies)
+
+    http10_server.shutdown()
+    keepalive_server.shutdown()
@@ -0,0 +1,398 @@
+"""
+Headless Lastgenerator für den WahlplakatGame-Server.
+
+Simuliert N Spieler ohne Tk/pygame mit den echten Client-Klassen
+(NetworkClient für Registrierung/Login, GameClient für das Spiel):
+Bot-Accounts registrieren und anmelden, der Lobby beitreten und mit
+konfigurierbarer Verzögerung und Trefferquote antworten.
+
+Gemessen werden:
+- Login-Latenz (login-RPC je Bot; mit --login-burst alle Bots gleichzeitig, ohne Spiel)
+- Join-Latenz (join_game -> join_success)
+- Zustell-Latenz von new_round und round_end (Ankunft beim Bot minus `sent_at` des Servers;
+  Server und Lastgenerator brauchen dafür dieselbe Uhr, also denselben Rechner oder NTP)
+- Zustell-Streuung von new_round und round_end (Ankunft je Bot minus erste Ankunft der Runde)
+- Beobachtete Rundendauer (new_round -> round_end je Bot)
+- Server-CPU über /metrics (process_cpu_seconds_total)
+
+Verwendung:
+    python benchmarks/LoadGenerator.py --bots 200 --duration 60
+    python benchmarks/LoadGenerator.py --bots 2000 --processes 8 --db src/Server/wahlplakatgame.db --accuracy 0.6
+    python benchmarks/LoadGenerator.py --bots 200 --login-burst
+
+Hinweis: Registrierung/Login laufen über das Rate-Limiting des Servers (Standard: Burst von
+600 Auth-Aufrufen pro IP, jeder Bot braucht zwei). Für Läufe mit mehr als ~300 Bots von einer
+IP den Server mit gelockertem Limit starten, z.B.:
+    python src/Server/main.py --trusted-network 127.0.0.1/32
+Sonst wird bei Rate-Limiting mit Backoff wiederholt (--retries).
+"""
+import argparse
+import contextlib
+import heapq
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Client"))
+
+from NetworkClient import NetworkClient
+from GameClient import GameClient
+
+BOT_PASSWORD = "loadtest123"
+
+
+class AnswerScheduler:
+    """Ein Thread pro Prozess für alle verzögerten Antworten (statt eines Timers pro Bot und Runde)"""
+
+    def __init__(self):
+        self._heap = []
+        self._condition = threading.Condition()
+        self._counter = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def call_later(self, delay: float, function, *args):
+        with self._condition:
+            self._counter += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._counter, function, args))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                deadline, _, function, args = self._heap[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+            try:
+                function(*args)
+            except Exception:
+                pass
+
+
+class Bot:
+    """Ein simulierter Spieler"""
+
+    def __init__(self, index: int, args, scheduler: AnswerScheduler, solutions: dict, stats: dict):
+        self.index = index
+        self.args = args
+        self.scheduler = scheduler
+        self.solutions = solutions
+        self.stats = stats
+        self.nickname = f"{args.prefix}{index:05d}"[:18]
+        self.net_client = None
+        self.token = None
+        self.wire_settings = None
+        self.game_client = None
+        self.joined = threading.Event()
+        self.join_started = None
+        self.round_started = {}
+
+    def _call_with_backoff(self, function, *args) -> dict:
+        """Ruft eine Auth-RPC auf und wiederholt sie nur, solange der Server rate_limited meldet"""
+        response = {}
+        for attempt in range(self.args.retries):
+            response = function(*args)
+            if not response.get("rate_limited"):
+                return response
+            time.sleep(min(5.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.5))
+        return response
+
+    def register(self) -> bool:
+        """Verbindet den RPC-Client und registriert den Bot. Wiederholt bei Rate-Limiting."""
+        self.net_client = NetworkClient.create_detached(self.args.host, self.args.rpc_port)
+        if not self.net_client.connect(probe=False):
+            return False
+
+        # Einmal registrieren: ein bereits vorhandener Bot-Account (früherer Lauf) ist kein Fehler
+        response = self._call_with_backoff(self.net_client.register_account, self.nickname, BOT_PASSWORD)
+        return bool(response.get("success")) or (not response.get("rate_limited") and "vergeben" in response.get("message", ""))
+
+    def login(self) -> bool:
+        """Meldet den registrierten Bot an und misst die Dauer (inkl. Wiederholungen bei Rate-Limiting)"""
+        started = time.perf_counter()
+        response = self._call_with_backoff(self.net_client.login, self.nickname, BOT_PASSWORD)
+        if not response.get("success"):
+            return False
+        self.stats["login_latencies"].append(time.perf_counter() - started)
+        self.token = response["token"]
+        self.wire_settings = self.net_client.server_info.get("socketio")
+        return True
+
+    def join(self):
+        """Verbindet den GameClient und tritt der Lobby bei"""
+        self.game_client = GameClient.create_detached(self.args.host, self.args.game_port)
+        self.game_client.on('join_success', self._on_join_success)
+        self.game_client.on('new_round', self._on_new_round)
+        self.game_client.on('round_end', self._on_round_end)
+        if not self.game_client.connect(self.wire_settings):
+            return
+        self.join_started = time.perf_counter()
+        self.game_client.join_game(self.token)
+
+    def leave(self):
+        if self.game_client and self.game_client.is_connected():
+            self.game_client.disconnect(by_request=True)
+
+    def _on_join_success(self, data):
+        self.stats["join_latencies"].append(time.perf_counter() - self.join_started)
+        self.joined.set()
+
+    def _on_new_round(self, data):
+        now = time.time()
+        round_number = data.get('round_number')
+        self.round_started[round_number] = now
+        self.stats["new_round_arrivals"].setdefault(round_number, []).append(now)
+        if data.get('sent_at'):
+            self.stats["new_round_delivery"].append(now - data['sent_at'])
+
+        delay = random.uniform(self.args.min_delay, self.args.max_delay)
+        self.scheduler.call_later(delay, self._answer, data.get('wahlspruch_id'))
+
+    def _answer(self, wahlspruch_id):
+        # Parteien aus der Tabelle des GameServers (join_success), nur deren Namen kennen eine partei_id
+        parteien = self.game_client.parteien
+        correct = self.solutions.get(wahlspruch_id)
+        if correct and random.random() < self.args.accuracy:
+            partei = correct
+        elif parteien:
+            partei = random.choice(parteien)
+        else:
+            return
+        self.game_client.submit_answer(partei)
+        self.stats["answers"] += 1
+
+    def _on_round_end(self, data):
+        now = time.time()
+        arrivals = self.stats["round_end_arrivals"]
+        # Ältere Server senden keine Rundennummer: dann der zuletzt gesehenen Runde zuordnen
+        round_number = data.get('round_number') or (max(self.round_started) if self.round_started else None)
+        if round_number is None or round_number not in self.round_started:
+            return
+        arrivals.setdefault(round_number, []).append(now)
+        self.stats["round_times"].append(now - self.round_started[round_number])
+        if data.get('sent_at'):
+            self.stats["round_end_delivery"].append(now - data['sent_at'])
+
+
+def load_solutions(db_path: str) -> dict:
+    """Liest wahlspruch_id -> partei direkt aus der SQLite-Datenbank (optional, für die Trefferquote)"""
+    if not db_path:
+        return {}
+    connection = sqlite3.connect(db_path)
+    try:
+        return dict(connection.execute("SELECT id, partei FROM wahlspruch").fetchall())
+    finally:
+        connection.close()
+
+
+def scrape_cpu_seconds(metrics_url: str):
+    """Liest process_cpu_seconds_total vom /metrics Endpoint des Servers"""
+    try:
+        text = urllib.request.urlopen(metrics_url, timeout=5).read().decode('utf-8')
+    except Exception:
+        return None
+    match = re.search(r"^process_cpu_seconds_total (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def login_burst(bots: list) -> list:
+    """Meldet alle Bots gleichzeitig an (ein Thread pro Bot, gemeinsamer Startschuss) und gibt die angemeldeten zurück"""
+    if not bots:
+        return []
+    barrier = threading.Barrier(len(bots))
+    succeeded = [False] * len(bots)
+
+    def run(position, bot):
+        barrier.wait()
+        succeeded[position] = bot.login()
+
+    threads = [threading.Thread(target=run, args=(position, bot), daemon=True) for position, bot in enumerate(bots)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [bot for bot, ok in zip(bots, succeeded) if ok]
+
+
+def run_worker(args, bot_indices) -> dict:
+    """Führt eine Gruppe von Bots in einem Prozess aus und gibt die Rohdaten zurück"""
+    stats = {
+        "login_latencies": [],
+        "join_latencies": [],
+        "new_round_arrivals": {},
+        "round_end_arrivals": {},
+        "round_times": [],
+        "new_round_delivery": [],
+        "round_end_delivery": [],
+        "answers": 0,
+        "login_failed": 0,
+    }
+    scheduler = AnswerScheduler()
+    solutions = load_solutions(args.db)
+    bots = [Bot(i, args, scheduler, solutions, stats) for i in bot_indices]
+
+    # Die Client-Klassen loggen per print() - während des Laufs stummschalten
+    with contextlib.redirect_stdout(io.StringIO()):
+        registered = [bot for bot in bots if bot.register()]
+        if args.login_burst:
+            logged_in = login_burst(registered)
+        else:
+            logged_in = [bot for bot in registered if bot.login()]
+        stats["login_failed"] = len(bots) - len(logged_in)
+
+        if not args.login_burst:
+            for bot in logged_in:
+                bot.join()
+                if args.join_interval:
+                    time.sleep(args.join_interval)
+
+            time.sleep(args.duration)
+
+        for bot in logged_in:
+            bot.leave()
+
+    # JSON-kompatibel machen (Rundennummern als Strings), damit Prozess-Ergebnisse zusammengeführt werden können
+    stats["new_round_arrivals"] = {str(k): v for k, v in stats["new_round_arrivals"].items()}
+    stats["round_end_arrivals"] = {str(k): v for k, v in stats["round_end_arrivals"].items()}
+    return stats
+
+
+def merge(results: list) -> dict:
+    merged = {"login_latencies": [], "join_latencies": [], "new_round_arrivals": {}, "round_end_arrivals": {}, "round_times": [],
+              "new_round_delivery": [], "round_end_delivery": [], "answers": 0, "login_failed": 0}
+    for result in results:
+        for key in ("login_latencies", "join_latencies", "round_times", "new_round_delivery", "round_end_delivery"):
+            merged[key] += result[key]
+        merged["answers"] += result["answers"]
+        merged["login_failed"] += result["login_failed"]
+        for key in ("new_round_arrivals", "round_end_arrivals"):
+            for round_number, arrivals in result[key].items():
+                merged[key].setdefault(round_number, []).extend(arrivals)
+    return merged
+
+
+def spreads(arrivals_by_round: dict) -> list:
+    """Ankunft je Bot minus erste Ankunft derselben Runde"""
+    values = []
+    for arrivals in arrivals_by_round.values():
+        first = min(arrivals)
+        values.extend(arrival - first for arrival in arrivals)
+    return values
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pick(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    return {
+        "count": len(values),
+        "mean_ms": statistics.mean(values) * 1e3,
+        "p50_ms": pick(0.50) * 1e3,
+        "p95_ms": pick(0.95) * 1e3,
+        "p99_ms": pick(0.99) * 1e3,
+        "max_ms": values[-1] * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--rpc-port", type=int, default=8000)
+    parser.add_argument("--game-port", type=int, default=5000)
+    parser.add_argument("--metrics-url", default=None, help="Standard: http://HOST:GAME_PORT/metrics")
+    parser.add_argument("--bots", type=int, default=100, help="Anzahl simulierter Spieler")
+    parser.add_argument("--processes", type=int, default=1, help="Bots auf mehrere Prozesse verteilen")
+    parser.add_argument("--duration", type=float, default=60.0, help="Spielzeit in Sekunden nach dem Beitritt")
+    parser.add_argument("--min-delay", type=float, default=1.0, help="Minimale Antwortverzögerung (s)")
+    parser.add_argument("--max-delay", type=float, default=10.0, help="Maximale Antwortverzögerung (s)")
+    parser.add_argument("--accuracy", type=float, default=0.5, help="Anteil richtiger Antworten (benötigt --db)")
+    parser.add_argument("--db", default=None, help="SQLite-Datenbank des Servers, um richtige Antworten zu kennen")
+    parser.add_argument("--join-interval", type=float, default=0.0, help="Pause zwischen zwei Beitritten (s)")
+    parser.add_argument("--retries", type=int, default=8, help="Login-Versuche bei Rate-Limiting")
+    parser.add_argument("--prefix", default="lgbot", help="Präfix der Bot-Nicknames")
+    parser.add_argument("--login-burst", action="store_true",
+                        help="Nur Login messen: alle Bots registrieren und dann gleichzeitig anmelden (Startschuss je Prozess), "
+                             "ohne Spiel. Den Server dafür mit gelockertem Rate-Limit starten (--trusted-network)")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args()
+
+    metrics_url = args.metrics_url or f"http://{args.host}:{args.game_port}/metrics"
+    groups = [list(range(i, args.bots, args.processes)) for i in range(args.processes)]
+
+    cpu_before = scrape_cpu_seconds(metrics_url)
+    started = time.time()
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.starmap(run_worker, [(args, group) for group in groups])
+    else:
+        results = [run_worker(args, groups[0])]
+    elapsed = time.time() - started
+    cpu_after = scrape_cpu_seconds(metrics_url)
+
+    stats = merge(results)
+    report = {
+        "bots": args.bots,
+        "login_failed": stats["login_failed"],
+        "answers": stats["answers"],
+        "rounds_observed": len(stats["new_round_arrivals"]),
+        "login_latency": percentiles(stats["login_latencies"]),
+        "join_latency": percentiles(stats["join_latencies"]),
+        "new_round_delivery": percentiles(stats["new_round_delivery"]),
+        "round_end_delivery": percentiles(stats["round_end_delivery"]),
+        "new_round_fanout_spread": percentiles(spreads(stats["new_round_arrivals"])),
+        "round_end_fanout_spread": percentiles(spreads(stats["round_end_arrivals"])),
+        "new_round_to_round_end": percentiles(stats["round_times"]),
+        "server_cpu_seconds": (cpu_after - cpu_before) if cpu_before is not None and cpu_after is not None else None,
+        "wall_seconds": elapsed,
+    }
+    if report["server_cpu_seconds"] is not None:
+        report["server_cpu_percent"] = report["server_cpu_seconds"] / elapsed * 100
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n📈 LASTTEST: {args.bots} Bots, {args.processes} Prozess(e), {elapsed:.1f}s")
+    print("=" * 70)
+    print(f"Login fehlgeschlagen:   {report['login_failed']}")
+    print(f"Antworten gesendet:     {report['answers']}")
+    print(f"Beobachtete Runden:     {report['rounds_observed']}")
+    for key, title in (("login_latency", "Login-Latenz"),
+                       ("join_latency", "Join-Latenz"),
+                       ("new_round_delivery", "new_round Zustellung"),
+                       ("round_end_delivery", "round_end Zustellung"),
+                       ("new_round_fanout_spread", "new_round Streuung"),
+                       ("round_end_fanout_spread", "round_end Streuung"),
+                       ("new_round_to_round_end", "new_round -> round_end")):
+        p = report[key]
+        if p["count"]:
+            print(f"{title:24s} n={p['count']:6d}  p50 {p['p50_ms']:8.1f}ms  p95 {p['p95_ms']:8.1f}ms  p99 {p['p99_ms']:8.1f}ms  max {p['max_ms']:8.1f}ms")
+        else:
+            print(f"{title:24s} keine Messwerte")
+    if report["server_cpu_seconds"] is not None:
+        print(f"Server-CPU:             {report['server_cpu_seconds']:.2f}s ({report['server_cpu_percent']:.1f}% eines Kerns)")
+    else:
+        print(f"Server-CPU:             nicht verfügbar ({metrics_url})")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
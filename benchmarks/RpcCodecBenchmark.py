@@ -0,0 +1,84 @@
+"""
+Vergleicht XML-RPC und den JSON-Endpoint des NetworkService:
+Kodier-/Dekodierzeit pro Antwort und Bytes auf der Leitung.
+
+Verwendung:
+    python benchmarks/RpcCodecBenchmark.py [--number 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import xmlrpc.client
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Server"))
+sys.path.insert(0, os.path.join(ROOT, "src", "Client"))
+
+from RpcServer import encode_json_response
+from NetworkClient import _json_object_hook
+import json
+
+
+def build_payloads() -> dict:
+    """Typische NetworkService-Antworten"""
+    def leaderboard(n):
+        return {
+            "success": True,
+            "leaderboard": [{"rank": i, "nickname": f"Spieler{i:05d}", "points": 10000 - i} for i in range(1, n + 1)]
+        }
+
+    return {
+        "login": {
+            "success": True,
+            "message": "Erfolgreich angemeldet!",
+            "token": "x" * 43,
+            "user_id": 4711,
+            "nickname": "Wahlkampfheld",
+            "points": 1234,
+            "last_login_ip": "192.168.0.42",
+            "last_login_time": datetime(2025, 11, 28, 8, 31, 52)
+        },
+        "parteien": {"success": True, "parteien": ["AfD", "BSW", "CDU", "CSU", "Die Linke", "FDP", "Grüne", "SPD"]},
+        "leaderboard_10": leaderboard(10),
+        "leaderboard_100": leaderboard(100),
+        "leaderboard_1000": leaderboard(1000),
+    }
+
+
+def bench(name: str, payload, number: int) -> dict:
+    xml_bytes = xmlrpc.client.dumps((payload,), methodresponse=True, allow_none=True).encode('utf-8')
+    json_bytes = encode_json_response(payload)
+
+    xml_encode = timeit.timeit(lambda: xmlrpc.client.dumps((payload,), methodresponse=True, allow_none=True).encode('utf-8'), number=number)
+    xml_decode = timeit.timeit(lambda: xmlrpc.client.loads(xml_bytes), number=number)
+    json_encode = timeit.timeit(lambda: encode_json_response(payload), number=number)
+    json_decode = timeit.timeit(lambda: json.loads(json_bytes, object_hook=_json_object_hook), number=number)
+
+    return {
+        "payload": name,
+        "xml_bytes": len(xml_bytes),
+        "json_bytes": len(json_bytes),
+        "xml_encode_us": xml_encode / number * 1e6,
+        "xml_decode_us": xml_decode / number * 1e6,
+        "json_encode_us": json_encode / number * 1e6,
+        "json_decode_us": json_decode / number * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="Wiederholungen pro Messung")
+    args = parser.parse_args()
+
+    print(f"{'Payload':18s} {'XML B':>8s} {'JSON B':>8s} {'XML enc':>9s} {'XML dec':>9s} {'JSON enc':>9s} {'JSON dec':>9s}")
+    for name, payload in build_payloads().items():
+        number = max(1, args.number // 100) if name == "leaderboard_1000" else args.number
+        r = bench(name, payload, number)
+        print(f"{r['payload']:18s} {r['xml_bytes']:8d} {r['json_bytes']:8d} "
+              f"{r['xml_encode_us']:8.1f}µ {r['xml_decode_us']:8.1f}µ {r['json_encode_us']:8.1f}µ {r['json_decode_us']:8.1f}µ")
+
+
+if __name__ == "__main__":
+    main()
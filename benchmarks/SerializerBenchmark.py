@@ -0,0 +1,107 @@
+"""
+Vergleicht die Socket.IO Serializer aus WireFormat (json, orjson, msgpack) mit und ohne
+Kompression: CPU pro Nachricht (Kodieren/Dekodieren) und Bytes auf der Leitung
+für typische Lobby-Events bei verschiedenen Lobby-Größen.
+
+Nicht installierte Serializer werden übersprungen.
+
+Verwendung:
+    python benchmarks/SerializerBenchmark.py [--players 10,100,1000] [--threshold 8192] [--number 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src", "Server"))
+
+import WireFormat
+
+EVENT = 2  # Socket.IO Pakettyp EVENT
+PARTEIEN = ["AfD", "BSW", "CDU", "CSU", "Die Linke", "FDP", "Grüne", "SPD"]
+
+
+def build_payloads(players: int) -> dict:
+    """Typische Lobby-Events für eine Lobby mit `players` Spielern"""
+    return {
+        "new_round": {
+            "round_number": 42,
+            "wahlspruch": "Für ein Land, in dem wir gut und gerne leben.",
+            "wahlspruch_id": 4711
+        },
+        "player_list_update": {
+            "version": 1234,
+            "players": [
+                {"user_id": i, "nickname": f"Spieler{i:05d}", "points": 1000 + i, "answered": i % 3 == 0}
+                for i in range(players)
+            ]
+        },
+        "leaderboard_update": {
+            "leaderboard": [{"rank": i, "nickname": f"Spieler{i:05d}", "points": 10000 - i} for i in range(1, players + 1)]
+        },
+        "round_end": {
+            "round_number": 42,
+            "correct_partei_id": PARTEIEN.index("CDU"),
+            "partei_version": "3f2a9c1d0b7e",
+            "quelle": "https://example.org/wahlplakate/2017/cdu",
+            "distribution": [[partei_id, players // len(PARTEIEN)] for partei_id in range(len(PARTEIEN))],
+            "answer_count": players,
+            "correct_count": players // 4,
+            "player_count": players,
+            "top_scorers": [{"nickname": f"Spieler{i:05d}", "points": 5000 - i} for i in range(5)]
+        },
+    }
+
+
+def encode(serializer: str, event: str, data: dict):
+    """Kodiert ein Event-Paket wie WirePacket.encode (Namespace '/')"""
+    if serializer == "msgpack":
+        return WireFormat.compress_frame(WireFormat.pack_packet(EVENT, '/', [event, data]))
+    return WireFormat.compress_frame(str(EVENT) + WireFormat.dumps([event, data]))
+
+
+def decode(serializer: str, frame):
+    frame = WireFormat.decompress_frame(frame)
+    if serializer == "msgpack":
+        return WireFormat.unpack_packet(frame)['data']
+    return WireFormat.loads(frame[1:])
+
+
+def available_serializers() -> list:
+    serializers = []
+    for serializer in WireFormat.SERIALIZERS:
+        try:
+            WireFormat.configure(serializer)
+            serializers.append(serializer)
+        except RuntimeError as e:
+            print(f"⏭️  {serializer} übersprungen: {e}")
+    return serializers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", default="10,100,1000", help="Lobby-Größen (kommagetrennt)")
+    parser.add_argument("--threshold", type=int, default=8192, help="Kompressions-Schwelle in Bytes")
+    parser.add_argument("--number", type=int, default=200, help="Wiederholungen pro Messung")
+    args = parser.parse_args()
+
+    serializers = available_serializers()
+    print(f"{'Lobby':>6s} {'Event':20s} {'Serializer':14s} {'Bytes':>8s} {'Enc':>10s} {'Dec':>10s}")
+    for players in (int(n) for n in args.players.split(",")):
+        for event, data in build_payloads(players).items():
+            number = max(1, args.number // 10) if players >= 1000 else args.number
+            for serializer in serializers:
+                for threshold in (None, args.threshold):
+                    WireFormat.configure(serializer, threshold)
+                    frame = encode(serializer, event, data)
+                    assert decode(serializer, frame) == [event, data]
+                    size = len(frame.encode('utf-8') if isinstance(frame, str) else frame)
+                    enc = timeit.timeit(lambda: encode(serializer, event, data), number=number) / number * 1e6
+                    dec = timeit.timeit(lambda: decode(serializer, frame), number=number) / number * 1e6
+                    label = f"{serializer}+zlib" if threshold else serializer
+                    print(f"{players:6d} {event:20s} {label:14s} {size:8d} {enc:8.1f}µs {dec:8.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
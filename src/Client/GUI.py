@@ -431,11 +431,13 @@ class GamePage(ctk.CTkFrame):
         self.GameClient.on('new_round', self.on_new_round)
         self.GameClient.on('player_answered', self.on_player_answered)
         self.GameClient.on('round_end', self.on_round_end)
+        self.GameClient.on('round_result', self.on_round_result)
         self.GameClient.on('player_joined', self.on_player_joined)
         self.GameClient.on('player_left', self.on_player_left)
         self.GameClient.on('player_list_update', self.on_player_list_update)
         self.GameClient.on('answer_accepted', self.on_answer_accepted)
         self.GameClient.on('leaderboard_update', self.on_leaderboard_update)
+        self.GameClient.on('parteien_update', self.on_parteien_update)
         self.GameClient.on('error', self.on_error)
         
     def insert_into_textbox(self, text: str, color: str = None):
@@ -463,8 +465,10 @@ class GamePage(ctk.CTkFrame):
         points = self.controller.my_user["points"]
         token = self.controller.my_user["token"]
         
-        # Hole Parteien
-        self.available_parteien = self.NetClient.get_alle_parteien(token)
+        # Hole Bestenliste und Statistiken in einem Round-Trip (ohne Parteien: die kommen mit join_success
+        # vom GameServer, nur dessen Tabelle enthält die partei_ids, mit denen geantwortet wird)
+        lobby_data = self.NetClient.fetch_lobby_data(include_parteien=False)
+        self.available_parteien = list(self.GameClient.parteien)
         
         # Erstelle UI Elemente
         self.main_game_box = ctk.CTkTextbox(
@@ -495,15 +499,14 @@ class GamePage(ctk.CTkFrame):
         self.leaderboard.grid(row=2, column=2, sticky="nsew", pady=10, padx=10)
         self.leaderboard.insert(0, "🏆 Top-Spieler")
 
-        # Partei-Auswahl Dropdown
-        if self.available_parteien:
-            self.partei_auswahl_dropdown = ctk.CTkOptionMenu(
-                self,
-                values=self.available_parteien,
-                font=ctk.CTkFont(size=14)
-            )
-            self.partei_auswahl_dropdown.grid(row=3, column=0, sticky="ew", pady=10, padx=10)
-            self.partei_auswahl_dropdown.set(self.available_parteien[0])
+        # Partei-Auswahl Dropdown (wird mit der Partei-Tabelle des GameServers gefüllt)
+        self.partei_auswahl_dropdown = ctk.CTkOptionMenu(
+            self,
+            values=self.available_parteien,
+            font=ctk.CTkFont(size=14)
+        )
+        self.partei_auswahl_dropdown.grid(row=3, column=0, sticky="ew", pady=10, padx=10)
+        self.partei_auswahl_dropdown.set(self.available_parteien[0] if self.available_parteien else "")
 
         # Antwort-Button
         self.antwort_button = ctk.CTkButton(
@@ -547,14 +550,17 @@ class GamePage(ctk.CTkFrame):
         # Verbinde mit GameService und tritt bei
         self.insert_into_textbox("🔌 Verbinde mit Server...\n")
         
-        if self.GameClient.connect():
+        if self.GameClient.connect(self.NetClient.server_info.get('socketio')):
             self.insert_into_textbox("✅ Verbunden! Trete Lobby bei...\n", "#00FF00")
             self.GameClient.join_game(token)
         else:
             self.insert_into_textbox("❌ Verbindung fehlgeschlagen!\n", "#FF0000")
         
-        # Leaderboard anfordern
-        self.GameClient.request_leaderboard()
+        # Leaderboard aus den Lobby-Daten anzeigen, sonst über WebSocket anfordern
+        if lobby_data["leaderboard"]:
+            self.on_leaderboard_update({'leaderboard': lobby_data["leaderboard"]})
+        else:
+            self.GameClient.request_leaderboard()
     
     # ==================== GAME EVENT HANDLERS ====================
     
@@ -580,60 +586,58 @@ class GamePage(ctk.CTkFrame):
         self.insert_into_textbox(f"✓ {nickname} hat geantwortet\n", "#00FFFF")
     
     def on_round_end(self, data):
-        """Runde ist zu Ende"""
-        correct_partei = data.get('correct_partei', '')
-        results = data.get('results', [])
-        quelle = data.get('quelle', None)
+        """Runde ist zu Ende (gemeinsame Zusammenfassung für alle Spieler)"""
+        partei_name = self.GameClient.partei_name
+        correct_partei_id = data.get('correct_partei_id')
+        distribution = data.get('distribution', [])  # [[partei_id, Anzahl], ...]
+        top_scorers = data.get('top_scorers', [])
         
-        self.current_quelle = quelle
+        self.current_quelle = data.get('quelle', None)
         
         self.insert_into_textbox(f"\n{'='*60}\n", "#FF00FF")
         self.insert_into_textbox(f"🏁 RUNDENENDE\n", "#FF00FF")
         self.insert_into_textbox(f"{'='*60}\n\n", "#FF00FF")
-        self.insert_into_textbox(f"Richtige Antwort: {correct_partei}\n\n", "#00FF00")
-        
-        # Prüfe ob der eigene Spieler richtig oder falsch geantwortet hat
-        my_result = None
-        for result in results:
-            if result['nickname'] == self.controller.my_user['nickname']:
-                my_result = result
-                break
-        
-        # Spiele Sound für eigene Antwort
-        if my_result:
-            if my_result.get('correct') == True:
-                self.sound_correct.play()
-            elif my_result.get('correct') == False:
-                self.sound_incorrect.play()
-        
-        # Zeige Ergebnisse
-        for result in results:
-            nickname = result['nickname']
-            answered = result.get('answered', 'Keine Antwort')
-            correct = result.get('correct')
-            points_earned = result.get('points_earned', 0)
-            total_points = result.get('total_points', 0)
-            could_answer = result.get('could_answer', True)
-            
-            if not could_answer:
-                self.insert_into_textbox(f"  {nickname}: (während Runde beigetreten)\n", "#808080")
-            elif correct is None:
-                self.insert_into_textbox(f"  {nickname}: Keine Antwort\n", "#808080")
-            elif correct:
-                self.insert_into_textbox(f"  ✓ {nickname}: {answered} [+{points_earned} Punkt] (Gesamt: {total_points})\n", "#00FF00")
-            else:
-                self.insert_into_textbox(f"  ✗ {nickname}: {answered} (Gesamt: {total_points})\n", "#FF0000")
+        self.insert_into_textbox(f"Richtige Antwort: {partei_name(correct_partei_id)}\n", "#00FF00")
+        self.insert_into_textbox(
+            f"{data.get('correct_count', 0)} von {data.get('answer_count', 0)} Antworten richtig "
+            f"({data.get('player_count', 0)} Spieler)\n\n"
+        )
+        
+        # Antwortverteilung, häufigste zuerst
+        for partei_id, count in sorted(distribution, key=lambda item: item[1], reverse=True):
+            color = "#00FF00" if partei_id == correct_partei_id else "#FF0000"
+            self.insert_into_textbox(f"  {partei_name(partei_id)}: {count}\n", color)
+        
+        if top_scorers:
+            self.insert_into_textbox("\n🏆 Beste Spieler der Lobby:\n")
+            for entry in top_scorers:
+                self.insert_into_textbox(f"  {entry['nickname']}: {entry['points']}\n")
         
         self.insert_into_textbox(f"\n⏳ Nächste Runde in 5 Sekunden...\n\n")
+    
+    def on_round_result(self, data):
+        """Eigenes Ergebnis der Runde (kommt nur an diesen Spieler)"""
+        correct = data.get('correct')
+        answered = self.GameClient.partei_name(data.get('answered'))  # partei_id bzw. None
+        total_points = data.get('total_points', 0)
+        
+        if not data.get('could_answer', True):
+            self.insert_into_textbox("Du bist während der Runde beigetreten.\n", "#808080")
+        elif correct:
+            self.sound_correct.play()
+            self.insert_into_textbox(f"✓ Deine Antwort {answered} war richtig! [+{data.get('points_earned', 0)} Punkt]\n", "#00FF00")
+        elif answered:
+            self.sound_incorrect.play()
+            self.insert_into_textbox(f"✗ Deine Antwort {answered} war falsch.\n", "#FF0000")
+        else:
+            self.sound_incorrect.play()
+            self.insert_into_textbox("Du hast nicht geantwortet.\n", "#808080")
         
         # Update eigene Punkte
-        for result in results:
-            if result['nickname'] == self.controller.my_user['nickname']:
-                self.controller.my_user['points'] = result['total_points']
-                self.my_user_label.configure(
-                    text=f"Spieler: {self.controller.my_user['nickname']}\nPunkte: {result['total_points']}"
-                )
-                break
+        self.controller.my_user['points'] = total_points
+        self.my_user_label.configure(
+            text=f"Spieler: {self.controller.my_user['nickname']}\nPunkte: {total_points}"
+        )
     
     def on_player_joined(self, data):
         """Neuer Spieler ist beigetreten"""
@@ -683,11 +687,23 @@ class GamePage(ctk.CTkFrame):
         if self.current_quelle:
             self.source_button.configure(state="normal")
         
-        partei = data.get('partei', '')
+        partei = self.GameClient.partei_name(data.get('partei_id'))
         self.insert_into_textbox(f"✅ Deine Antwort wurde registriert: {partei}\n", "#00FF00")
 
         self.sound_lock.play()
     
+    def on_parteien_update(self, data):
+        """Partei-Tabelle des GameServers erhalten (join_success bzw. neue partei_version)"""
+        parteien = data.get('parteien', [])
+        if parteien == self.available_parteien or not hasattr(self, 'partei_auswahl_dropdown'):
+            self.available_parteien = parteien
+            return
+        
+        self.available_parteien = parteien
+        selected = self.partei_auswahl_dropdown.get()
+        self.partei_auswahl_dropdown.configure(values=parteien)
+        self.partei_auswahl_dropdown.set(selected if selected in parteien else (parteien[0] if parteien else ""))
+    
     def on_leaderboard_update(self, data):
         """Leaderboard wurde aktualisiert"""
         leaderboard = data.get('leaderboard', [])
@@ -1,8 +1,10 @@
 import socketio
 import threading
-from typing import Callable, Optional, Dict
+from typing import Callable, Optional, Dict, List
 import logging
 
+import WireCodec
+
 
 class GameClient:
     """
@@ -12,6 +14,10 @@ class GameClient:
     
     _instance = None
     _lock = threading.Lock()
+    
+    # Direkt per WebSocket verbinden (kein Long-Polling vorweg): eine TCP-Verbindung pro Client,
+    # Voraussetzung für den Cluster-Modus, in dem jede Verbindung fest an einem Worker hängt
+    TRANSPORTS = ['websocket']
     _initialized = False
     
     def __new__(cls):
@@ -62,20 +68,56 @@ class GameClient:
         if GameClient._initialized:
             return
         
+        self._setup(host, port)
+        GameClient._initialized = True
+    
+    @classmethod
+    def create_detached(cls, host: str = "localhost", port: int = 5000) -> 'GameClient':
+        """
+        Erstellt eine eigenständige Instanz außerhalb des Singletons
+        (z.B. für Lasttests mit vielen gleichzeitigen Clients in einem Prozess).
+        
+        Args:
+            host: Server hostname oder IP
+            port: Server port
+        """
+        instance = object.__new__(cls)
+        instance._setup(host, port)
+        return instance
+    
+    def _setup(self, host: str, port: int):
+        """Setzt den Zustand einer Instanz auf"""
         self.host = host
         self.port = port
         self.server_url = f"http://{host}:{port}"
-        self.sio = socketio.Client(logger=False, engineio_logger=False)
+        self.sio = socketio.Client(logger=False, engineio_logger=False, serializer=WireCodec.packet_class(), json=WireCodec)
         self.connected = False
         self.session_token: Optional[str] = None
+        self.room_code: Optional[str] = None  # Raum der aktuellen Lobby (None = noch nicht beigetreten)
+        self.nickname: Optional[str] = None  # Eigener Nickname laut join_success
+        self.round_number: Optional[int] = None  # Zuletzt erhaltene Runde (Abgleich beim Reconnect)
+        
+        # Lokale Kopie der Spielerliste (user_id -> Spieler), wird per player_delta fortgeschrieben
+        self.players: Dict[int, dict] = {}
+        self.player_version: Optional[int] = None  # None = noch kein Snapshot erhalten
         self.leave_requested = False  # Flag für bewusstes Verlassen
         
+        # Parteien laufen im Protokoll als partei_id (Index in `parteien`), Tabelle kommt mit join_success
+        self.parteien: List[str] = []
+        self.partei_ids: Dict[str, int] = {}
+        self.partei_version: Optional[str] = None
+        
+        # Raum-Frames tragen eine lückenlose Sequenznummer ('seq'), Verpasstes wird per request_replay nachgeholt
+        self.last_seq: Optional[int] = None  # None = noch kein Frame der aktuellen Lobby erhalten
+        self._replay_pending = False
+        
         # Event Callbacks
         self.callbacks: Dict[str, list] = {
             'connected': [],
             'new_round': [],
             'player_answered': [],
             'round_end': [],
+            'round_result': [],
             'player_joined': [],
             'player_left': [],
             'player_list_update': [],
@@ -83,25 +125,41 @@ class GameClient:
             'leaderboard_update': [],
             'quelle_response': [],
             'join_success': [],
+            'parteien_update': [],
+            'resumed': [],
+            'room_created': [],
             'error': []
         }
         
         self._register_socketio_handlers()
-        GameClient._initialized = True
     
     def _register_socketio_handlers(self):
         """Registriert SocketIO Event Handler"""
+        self._event_handlers: Dict[str, Callable] = {}
+        
+        def on(event: str):
+            """Registriert den Handler bei Socket.IO (über _dispatch_frame) und für das Entpacken von lobby_batch"""
+            def decorator(handler):
+                self._event_handlers[event] = handler
+                self.sio.on(event)(lambda data=None: self._dispatch_frame(event, data))
+                return handler
+            return decorator
         
         @self.sio.on('connect')
         def on_connect():
             self.connected = True
             logging.info("✅ WebSocket verbunden")
             self._trigger_callbacks('connected', {})
+            
+            # Automatischer Reconnect nach Verbindungsverlust: der Server hält den Spieler noch geparkt
+            if self.session_token and self.room_code:
+                self.sio.emit('resume_session', {'token': self.session_token, 'room': self.room_code})
         
         @self.sio.on('disconnect')
         def on_disconnect():
             was_connected = self.connected
             self.connected = False
+            self._replay_pending = False  # Antwort kommt nicht mehr, nach dem Reconnect neu anfordern
             
             if was_connected:
                 if self.leave_requested:
@@ -111,62 +169,244 @@ class GameClient:
             
             self.leave_requested = False
         
-        @self.sio.on('connected')
+        @on('connected')
         def on_server_connected(data):
             logging.info(f"📡 Server: {data.get('message', '')}")
         
-        @self.sio.on('new_round')
+        @on('new_round')
         def on_new_round(data):
+            self.round_number = data.get('round_number')
+            self._check_partei_version(data.get('partei_version'))
             logging.info(f"🎮 Neue Runde #{data.get('round_number')}: {data.get('wahlspruch', '')[:50]}...")
             self._trigger_callbacks('new_round', data)
         
-        @self.sio.on('player_answered')
+        @on('player_answered')
         def on_player_answered(data):
+            if data.get('nickname') == self.nickname:
+                return  # Eigene Antwort, kommt bereits als answer_accepted
             logging.info(f"✓ {data.get('nickname')} hat geantwortet")
             self._trigger_callbacks('player_answered', data)
         
-        @self.sio.on('round_end')
+        @on('round_end')
         def on_round_end(data):
-            logging.info(f"🏁 Runde beendet - Richtige Partei: {data.get('correct_partei')}")
+            logging.info(f"🏁 Runde beendet - Richtige Partei: {self.partei_name(data.get('correct_partei_id'))}")
             self._trigger_callbacks('round_end', data)
         
-        @self.sio.on('player_joined')
+        @on('round_result')
+        def on_round_result(data):
+            self._trigger_callbacks('round_result', data)
+        
+        @on('player_joined')
         def on_player_joined(data):
+            if data.get('nickname') == self.nickname:
+                return
             logging.info(f"👋 {data.get('nickname')} ist beigetreten")
             self._trigger_callbacks('player_joined', data)
         
-        @self.sio.on('player_left')
+        @on('player_left')
         def on_player_left(data):
             logging.info(f"👋 {data.get('nickname')} hat verlassen")
             self._trigger_callbacks('player_left', data)
         
-        @self.sio.on('player_list_update')
+        @on('player_list_update')
         def on_player_list_update(data):
-            self._trigger_callbacks('player_list_update', data)
+            self._apply_player_snapshot(data.get('players', []), data.get('version'))
+        
+        @on('player_delta')
+        def on_player_delta(data):
+            self._apply_player_delta(data)
         
-        @self.sio.on('answer_accepted')
+        @on('answer_accepted')
         def on_answer_accepted(data):
-            logging.info(f"✅ Antwort akzeptiert: {data.get('partei')}")
+            logging.info(f"✅ Antwort akzeptiert: {self.partei_name(data.get('partei_id'))}")
             self._trigger_callbacks('answer_accepted', data)
         
-        @self.sio.on('leaderboard_update')
+        @on('leaderboard_update')
         def on_leaderboard_update(data):
             self._trigger_callbacks('leaderboard_update', data)
         
-        @self.sio.on('quelle_response')
+        @on('quelle_response')
         def on_quelle_response(data):
             self._trigger_callbacks('quelle_response', data)
         
-        @self.sio.on('join_success')
+        @on('join_success')
         def on_join_success(data):
-            logging.info(f"🎉 Erfolgreich der Lobby beigetreten")
+            self.last_seq = None  # Neue Lobby, neuer Stream
+            self._replay_pending = False
+            self.room_code = data.get('room_code')
+            self.nickname = data.get('your_nickname')
+            self._apply_parteien(data.get('parteien'))
+            self._apply_player_snapshot(data.get('players', []), data.get('player_version'))
+            logging.info(f"🎉 Erfolgreich der Lobby {self.room_code} beigetreten")
             self._trigger_callbacks('join_success', data)
         
-        @self.sio.on('error')
+        @on('resume_success')
+        def on_resume_success(data):
+            logging.info(f"🔁 Wieder mit der Lobby {data.get('room_code')} verbunden")
+            self._check_partei_version(data.get('partei_version'))
+            if self.last_seq is not None:
+                # Verpasste Raum-Frames nachspielen (reicht der Puffer nicht, kommt der Zustand mit)
+                self.request_replay()
+            else:
+                if data.get('player_version') != self.player_version:
+                    self.player_version = None  # Deltas verpasst, bis zum Snapshot keine mehr anwenden
+                    self.request_player_list()
+                self._catch_up_round(data)
+            self._trigger_callbacks('resumed', data)
+        
+        @on('resume_failed')
+        def on_resume_failed(data):
+            # Reconnect-Frist abgelaufen oder Server neu gestartet: regulär neu beitreten
+            logging.info(f"🔁 Fortsetzen nicht möglich ({data.get('message')}), trete neu bei")
+            self.join_game(self.session_token, self.room_code)
+        
+        @on('parteien_update')
+        def on_parteien_update(data):
+            self._apply_parteien(data)
+        
+        @on('room_created')
+        def on_room_created(data):
+            logging.info(f"🚪 Raum erstellt: {data.get('room_code')}")
+            self._trigger_callbacks('room_created', data)
+        
+        @self.sio.on('lobby_batch')
+        def on_lobby_batch(data):
+            self._dispatch_frame('lobby_batch', data)
+        
+        @self.sio.on('lobby_replay')
+        def on_lobby_replay(data):
+            self._replay_pending = False
+            events = data.get('events')
+            if events is None:
+                # Verpasste Frames nicht mehr im Puffer des Servers: Zustand neu laden statt nachspielen
+                logging.info("🔄 Verpasste Lobby-Events nicht mehr verfügbar, lade Spielerliste neu")
+                self.last_seq = data.get('seq')
+                self.player_version = None
+                self.request_player_list()
+                self._catch_up_round(data.get('round'))
+                return
+            
+            if events:
+                logging.debug(f"🔄 {len(events)} verpasste Lobby-Events nachgeholt")
+            for event, payload in events:
+                self._dispatch_frame(event, payload)
+        
+        @on('error')
         def on_error(data):
             logging.error(f"❌ Fehler: {data.get('message')}")
             self._trigger_callbacks('error', data)
     
+    def _dispatch_frame(self, event: str, data):
+        """
+        Verarbeitet ein empfangenes Event bzw. lobby_batch (gebündelte Events in Originalreihenfolge).
+        Frames des Lobby-Streams (mit 'seq') werden genau einmal und lückenlos verarbeitet.
+        """
+        if not self._accept_seq(data):
+            return
+        
+        if event == 'lobby_batch':
+            for inner_event, payload in data.get('events', []):
+                handler = self._event_handlers.get(inner_event)
+                if handler:
+                    handler(payload)
+            return
+        
+        handler = self._event_handlers.get(event)
+        if handler:
+            handler(data)
+    
+    def _accept_seq(self, data) -> bool:
+        """
+        Prüft die Sequenznummer eines Frames. Duplikate (z.B. nach einem Replay) werden verworfen;
+        bei einer Lücke wird das Verpasste angefordert und der Frame kommt mit dem Replay erneut.
+        """
+        seq = data.get('seq') if isinstance(data, dict) else None
+        if seq is None:
+            return True  # Direkt an diese Verbindung gesendet, nicht Teil des Lobby-Streams
+        
+        if self.last_seq is None or seq == self.last_seq + 1:
+            self.last_seq = seq
+            return True
+        
+        if seq > self.last_seq and not self._replay_pending:
+            logging.debug(f"🔄 Lücke im Lobby-Stream (#{self.last_seq} -> #{seq}), fordere Replay an")
+            self.request_replay()
+        return False
+    
+    def _catch_up_round(self, state: Optional[Dict]):
+        """Holt eine während einer Unterbrechung gestartete Runde nach (Zustand aus resume_success/lobby_replay)"""
+        if state and state.get('round_active') and state.get('round_number') != self.round_number and state.get('wahlspruch'):
+            self._event_handlers['new_round']({
+                'round_number': state['round_number'],
+                'wahlspruch': state['wahlspruch'],
+                'wahlspruch_id': state.get('wahlspruch_id')
+            })
+    
+    def _apply_parteien(self, table: Optional[Dict]):
+        """Übernimmt die Partei-Tabelle des Servers ({'version': ..., 'names': [Name je partei_id]})"""
+        if not table:
+            return
+        self.parteien = list(table.get('names', []))
+        self.partei_ids = {name: partei_id for partei_id, name in enumerate(self.parteien)}
+        self.partei_version = table.get('version')
+        self._trigger_callbacks('parteien_update', {'parteien': list(self.parteien)})
+    
+    def _check_partei_version(self, version: Optional[str]):
+        """Fordert die Partei-Tabelle neu an, wenn der Server eine andere Version meldet"""
+        if version is not None and version != self.partei_version:
+            self.request_parteien()
+    
+    def partei_name(self, partei_id: Optional[int]) -> Optional[str]:
+        """Name zu einer partei_id (None wenn unbekannt)"""
+        if isinstance(partei_id, int) and 0 <= partei_id < len(self.parteien):
+            return self.parteien[partei_id]
+        return None
+    
+    def partei_id(self, partei: str) -> Optional[int]:
+        """partei_id zu einem Parteinamen (None wenn unbekannt)"""
+        return self.partei_ids.get(partei)
+    
+    def _apply_player_snapshot(self, players: list, version: Optional[int]):
+        """Ersetzt die lokale Spielerliste durch einen vollständigen Snapshot"""
+        self.players = {p.get('user_id', p['nickname']): p for p in players}
+        self.player_version = version
+        self._trigger_callbacks('player_list_update', {'players': list(self.players.values())})
+    
+    def _apply_player_delta(self, delta: Dict):
+        """
+        Wendet ein player_delta auf die lokale Spielerliste an.
+        Veraltete Deltas werden ignoriert; fehlt eine Version dazwischen, wird ein Snapshot angefordert.
+        """
+        version = delta.get('version')
+        if self.player_version is None or version <= self.player_version:
+            return
+        
+        # Zusammengeführte Deltas (Coalescer) bauen auf 'base' auf, einzelne auf version - 1
+        if delta.get('base', version - 1) != self.player_version:
+            logging.debug(f"🔄 Lücke in der Spielerliste (v{self.player_version} -> v{version}), fordere Snapshot an")
+            self.player_version = None  # Bis zum Snapshot keine Deltas mehr anwenden
+            self.request_player_list()
+            return
+        
+        for change in delta.get('changes', []):
+            op = change.get('op')
+            if op == 'join':
+                player = change['player']
+                self.players[player['user_id']] = player
+            elif op == 'leave':
+                self.players.pop(change['user_id'], None)
+            elif op == 'update':
+                player = self.players.get(change['user_id'])
+                if player:
+                    player.update({k: v for k, v in change.items() if k not in ('op', 'user_id')})
+            elif op == 'round_reset':
+                for player in self.players.values():
+                    player['answered'] = False
+                    player['can_answer'] = True
+        
+        self.player_version = version
+        self._trigger_callbacks('player_list_update', {'players': list(self.players.values())})
+    
     def _trigger_callbacks(self, event: str, data: Dict):
         """Ruft alle registrierten Callbacks für ein Event auf"""
         if event in self.callbacks:
@@ -178,16 +418,21 @@ class GameClient:
     
     # ==================== PUBLIC API ====================
     
-    def connect(self) -> bool:
+    def connect(self, wire_settings: Optional[dict] = None) -> bool:
         """
         Verbindet mit dem GameService Server.
         
+        Args:
+            wire_settings: Serializer/Kompression des Servers (get_server_info()["info"]["socketio"])
+        
         Returns:
             True wenn erfolgreich, False sonst
         """
         try:
+            if wire_settings:
+                WireCodec.configure(**wire_settings)
             if not self.connected:
-                self.sio.connect(self.server_url)
+                self.sio.connect(self.server_url, transports=self.TRANSPORTS)
                 return True
             return True
         except Exception as e:
@@ -220,27 +465,53 @@ class GameClient:
                 
                 self.sio.disconnect()
                 self.session_token = None
+                self.room_code = None
+                self.last_seq = None
+                self.players = {}
+                self.player_version = None
         except Exception as e:
             logging.error(f"❌ Fehler beim Trennen: {e}")
     
-    def join_game(self, session_token: str) -> bool:
+    def join_game(self, session_token: str, room_code: Optional[str] = None) -> bool:
         """
         Tritt dem Spiel bei.
         
         Args:
             session_token: Session-Token vom Login
+            room_code: Code eines privaten Raums, None für die öffentliche Lobby
             
         Returns:
             True wenn erfolgreich
         """
         try:
             self.session_token = session_token
-            self.sio.emit('join_game', {'token': session_token})
+            payload = {'token': session_token}
+            if room_code:
+                payload['room'] = room_code
+            self.sio.emit('join_game', payload)
             return True
         except Exception as e:
             logging.error(f"❌ Fehler beim Beitreten: {e}")
             return False
     
+    def create_room(self, session_token: str) -> bool:
+        """
+        Erstellt einen privaten Raum. Der Code kommt per 'room_created' Event zurück
+        und kann an join_game() übergeben werden.
+        
+        Args:
+            session_token: Session-Token vom Login
+            
+        Returns:
+            True wenn erfolgreich gesendet
+        """
+        try:
+            self.sio.emit('create_room', {'token': session_token})
+            return True
+        except Exception as e:
+            logging.error(f"❌ Fehler beim Erstellen des Raums: {e}")
+            return False
+    
     def leave_game(self):
         """Verlässt das Spiel (auf Wunsch des Users)"""
         self.disconnect(by_request=True)
@@ -250,7 +521,7 @@ class GameClient:
         Sendet eine Antwort.
         
         Args:
-            partei: Die gewählte Partei
+            partei: Die gewählte Partei (wird als partei_id gesendet)
             
         Returns:
             True wenn erfolgreich gesendet
@@ -260,9 +531,15 @@ class GameClient:
                 logging.warning("❌ Nicht im Spiel")
                 return False
             
+            partei_id = self.partei_id(partei)
+            if partei_id is None:
+                logging.warning(f"❌ Unbekannte Partei: {partei}")
+                self.request_parteien()
+                return False
+            
             self.sio.emit('submit_answer', {
                 'token': self.session_token,
-                'partei': partei
+                'partei_id': partei_id
             })
             return True
         except Exception as e:
@@ -280,6 +557,30 @@ class GameClient:
         except Exception as e:
             logging.error(f"❌ Fehler beim Anfordern der Quelle: {e}")
     
+    def request_player_list(self):
+        """Fordert die vollständige Spielerliste der aktuellen Lobby an"""
+        try:
+            self.sio.emit('request_player_list')
+        except Exception as e:
+            logging.error(f"❌ Fehler beim Anfordern der Spielerliste: {e}")
+    
+    def request_parteien(self):
+        """Fordert die Partei-Tabelle an (Antwort: parteien_update)"""
+        try:
+            self.sio.emit('request_parteien')
+        except Exception as e:
+            logging.error(f"❌ Fehler beim Anfordern der Parteien: {e}")
+    
+    def request_replay(self):
+        """Fordert die seit last_seq verpassten Lobby-Events an (Antwort: lobby_replay)"""
+        try:
+            if self.last_seq is not None:
+                self._replay_pending = True
+                self.sio.emit('request_replay', {'since': self.last_seq})
+        except Exception as e:
+            self._replay_pending = False
+            logging.error(f"❌ Fehler beim Anfordern verpasster Events: {e}")
+    
     def request_leaderboard(self):
         """Fordert das Leaderboard an"""
         try:
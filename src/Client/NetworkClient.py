@@ -1,7 +1,210 @@
 import xmlrpc.client
-from typing import Dict, List, Optional
+import http.client
+import json
+from typing import Dict, List, Optional, Tuple
 import socket
 import threading
+import time
+
+
+def _json_object_hook(obj: Dict):
+    """Wandelt kodierte Datumswerte wieder in xmlrpc.client.DateTime um (gleiches Verhalten wie XML-RPC)"""
+    if len(obj) == 1 and "__datetime__" in obj:
+        return xmlrpc.client.DateTime(obj["__datetime__"])
+    return obj
+
+
+class _JsonRpcMethod:
+    """Hilfsklasse für proxy.methode(...) und proxy.system.multicall(...)"""
+    
+    def __init__(self, send, name: str):
+        self._send = send
+        self._name = name
+    
+    def __getattr__(self, name: str):
+        return _JsonRpcMethod(self._send, f"{self._name}.{name}")
+    
+    def __call__(self, *args):
+        return self._send(self._name, args)
+
+
+class ConnectionPool:
+    """
+    Thread-sicherer Pool persistenter HTTP/1.1 Verbindungen zu einem Server.
+    Ungenutzte Verbindungen werden nach `idle_timeout` Sekunden verworfen
+    (etwas kürzer als der Keep-Alive Timeout des Servers).
+    """
+    
+    # Fehler, bei denen eine wiederverwendete Verbindung vom Server geschlossen wurde
+    _STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+    
+    def __init__(self, host: str, port: int, max_idle: int = 4, idle_timeout: float = 4.0, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+    
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Gibt (Verbindung, wiederverwendet) zurück"""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                connection, released_at = self._idle.pop()
+                if now - released_at < self.idle_timeout:
+                    return connection, True
+                connection.close()
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+    
+    def _release(self, connection: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+    
+    def post(self, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, str, Dict, bytes]:
+        """
+        Sendet einen POST-Request über eine (wenn möglich) bestehende Verbindung.
+        Hat der Server eine wiederverwendete Verbindung bereits geschlossen, wird
+        einmal mit einer neuen Verbindung wiederholt.
+        
+        Returns:
+            (status, reason, headers, body)
+        """
+        while True:
+            connection, reused = self._acquire()
+            try:
+                connection.request("POST", path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+            except self._STALE_ERRORS:
+                connection.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return response.status, response.reason, dict(response.getheaders()), data
+    
+    def close_all(self):
+        """Schließt alle ungenutzten Verbindungen"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """XML-RPC Transport, der Verbindungen aus einem ConnectionPool wiederverwendet (thread-sicher)"""
+    
+    def __init__(self, pool: ConnectionPool):
+        super().__init__()
+        self._pool = pool
+    
+    def request(self, host, handler, request_body, verbose=False):
+        status, reason, headers, data = self._pool.post(
+            handler, request_body, {"Content-Type": "text/xml", "User-Agent": self.user_agent}
+        )
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(host + handler, status, reason, headers)
+        
+        parser, unmarshaller = self.getparser()
+        parser.feed(data)
+        parser.close()
+        return unmarshaller.close()
+    
+    def close(self):
+        self._pool.close_all()
+
+
+class JsonRpcProxy:
+    """
+    Kompakter JSON-RPC Proxy mit der gleichen Schnittstelle wie xmlrpc.client.ServerProxy.
+    Spricht den /JSON Endpoint des NetworkService an, Fehler werden als
+    xmlrpc.client.Fault geworfen.
+    """
+    
+    def __init__(self, pool: ConnectionPool, path: str = "/JSON"):
+        self._pool = pool
+        self._path = path
+    
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _JsonRpcMethod(self._request, name)
+    
+    def _request(self, method: str, params: tuple):
+        body = json.dumps({"method": method, "params": list(params)}, separators=(',', ':')).encode('utf-8')
+        status, reason, headers, data = self._pool.post(self._path, body, {"Content-Type": "application/json"})
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(f"{self._pool.host}:{self._pool.port}{self._path}", status, reason, headers)
+        
+        reply = json.loads(data, object_hook=_json_object_hook)
+        if "error" in reply:
+            raise xmlrpc.client.Fault(reply["error"]["faultCode"], reply["error"]["faultString"])
+        return reply["result"]
+
+
+class RpcBatch:
+    """
+    Sammelt mehrere RPC-Aufrufe und sendet sie gebündelt in einem einzigen
+    HTTP-Request (system.multicall).
+    
+    Verwendung:
+        batch = client.batch()
+        batch.get_leaderboard(10)
+        batch.get_user_stats(token)
+        leaderboard, stats = batch.execute()
+    """
+    
+    def __init__(self, client: 'NetworkClient'):
+        self._client = client
+        self._calls: List[Dict] = []
+    
+    def __getattr__(self, name: str):
+        """Jeder Methodenaufruf wird nur vorgemerkt"""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        
+        def queue_call(*args):
+            self._calls.append({"methodName": name, "params": list(args)})
+            return self
+        
+        return queue_call
+    
+    def __len__(self) -> int:
+        return len(self._calls)
+    
+    def execute(self) -> List:
+        """
+        Sendet alle vorgemerkten Aufrufe in einem Request.
+        
+        Returns:
+            Liste der Antworten in Aufruf-Reihenfolge. Fehlgeschlagene Aufrufe
+            werden als {"success": False, "message": str} zurückgegeben.
+        """
+        if not self._calls:
+            return []
+        
+        calls, self._calls = self._calls, []
+        results = self._client.proxy.system.multicall(calls)
+        
+        responses = []
+        for result in results:
+            if isinstance(result, dict) and "faultCode" in result:
+                responses.append({"success": False, "message": result.get("faultString", "Unbekannter Fehler")})
+            else:
+                responses.append(result[0])
+        return responses
 
 
 class NetworkClient:
@@ -24,6 +227,9 @@ class NetworkClient:
     _lock = threading.Lock()  # Für Thread-Sicherheit
     _initialized = False
     
+    # Bevorzugter Transport ("json" oder "xmlrpc"), wird beim connect() mit dem Server ausgehandelt
+    PREFERRED_TRANSPORT = "json"
+    
     def __new__(cls):
         """Verhindert direkte Instanziierung"""
         if cls._instance is None:
@@ -74,41 +280,85 @@ class NetworkClient:
         """
         if NetworkClient._initialized:
             return
-            
+        
+        self._setup(host, port)
+        NetworkClient._initialized = True
+    
+    @classmethod
+    def create_detached(cls, host: str = "localhost", port: int = 8000) -> 'NetworkClient':
+        """
+        Erstellt eine eigenständige Instanz außerhalb des Singletons
+        (z.B. für Lasttests mit vielen gleichzeitigen Clients in einem Prozess).
+        
+        Args:
+            host: Server hostname oder IP
+            port: Server port
+        """
+        instance = object.__new__(cls)
+        instance._setup(host, port)
+        return instance
+    
+    def _setup(self, host: str, port: int):
+        """Setzt den Zustand einer Instanz auf"""
         self.host = host
         self.port = port
         self.server_url = f"http://{host}:{port}"
         self.proxy = None
+        self.transport: Optional[str] = None
+        self.server_info: Dict = {}  # Letzte Server-Informationen (u.a. Socket.IO Serializer)
+        # Persistente Verbindungen, gemeinsam für XML-RPC und JSON
+        self.connection_pool = ConnectionPool(host, port)
+        # Zuletzt erhaltene versionierte Antworten (key -> (version, response))
+        self._conditional_cache: Dict[str, Tuple[str, Dict]] = {}
         self.session_token: Optional[str] = None
         self.user_id: Optional[int] = None
         self.nickname: Optional[str] = None
         self.points: int = 0
-        NetworkClient._initialized = True
     
-    def connect(self) -> bool:
+    def connect(self, probe: bool = True) -> bool:
         """
         Verbindet mit dem Server.
         
+        Args:
+            probe: Server sofort per get_server_info prüfen. Die GUI tut das beim Programmstart, um einen
+                nicht erreichbaren Server vor dem Login-Bildschirm zu melden (das liegt nicht auf dem Weg
+                Login -> Lobby). Ohne Probe wird kein Request gesendet; die Einstellungen (Transport,
+                Socket.IO Kodierung) kommen dann mit der Antwort von login().
+        
         Returns:
             True wenn erfolgreich, False sonst
         """
         try:
-            self.proxy = xmlrpc.client.ServerProxy(self.server_url, allow_none=True)
+            self.proxy = xmlrpc.client.ServerProxy(self.server_url, transport=PooledTransport(self.connection_pool), allow_none=True)
+            self.transport = "xmlrpc"
+            if not probe:
+                return True
             # Test connection
             response = self.proxy.get_server_info()
             if response.get("success"):
-                print(f"✅ Verbunden mit Server {self.host}:{self.port}")
+                self._apply_server_info(response.get("info", {}))
+                print(f"✅ Verbunden mit Server {self.host}:{self.port} ({self.transport})")
                 return True
             return False
         except Exception as e:
             print(f"❌ Verbindung zum Server fehlgeschlagen: {e}")
             return False
     
+    def _apply_server_info(self, info: Dict):
+        """Übernimmt Server-Informationen und handelt den Transport aus (JSON, wenn der Server es anbietet)"""
+        self.server_info.update(info)
+        server_transports = info.get("transports") or ["xmlrpc"]
+        if self.transport == "xmlrpc" and self.PREFERRED_TRANSPORT == "json" and "json" in server_transports:
+            self.proxy = JsonRpcProxy(self.connection_pool)
+            self.transport = "json"
+    
     def disconnect(self):
         """Trennt die Verbindung zum Server"""
         if self.session_token:
             self.logout()
         self.proxy = None
+        self.transport = None
+        self.connection_pool.close_all()
     
     def _ensure_connected(self) -> bool:
         """Stellt sicher, dass eine Verbindung besteht"""
@@ -117,6 +367,26 @@ class NetworkClient:
             return False
         return True
     
+    def _cached_version(self, key: str) -> Optional[str]:
+        """Gibt die Version der zwischengespeicherten Antwort zurück (für if_version)"""
+        cached = self._conditional_cache.get(key)
+        return cached[0] if cached else None
+    
+    def _apply_conditional(self, key: str, response: Dict) -> Dict:
+        """
+        Verarbeitet eine versionierte Antwort: Bei "not_modified" wird die zwischengespeicherte
+        Antwort zurückgegeben, sonst wird die neue Antwort samt Version gespeichert.
+        """
+        if response.get("not_modified"):
+            cached = self._conditional_cache.get(key)
+            if cached and cached[0] == response.get("version"):
+                return cached[1]
+            return response
+        
+        if response.get("success") and response.get("version"):
+            self._conditional_cache[key] = (response["version"], response)
+        return response
+    
     def _ensure_authenticated(self) -> bool:
         """Stellt sicher, dass der Benutzer authentifiziert ist"""
         if not self.session_token:
@@ -177,6 +447,8 @@ class NetworkClient:
             response = self.proxy.login(nickname, password, ip_address)
             
             if response["success"]:
+                if response.get("server_info"):
+                    self._apply_server_info(response["server_info"])
                 self.session_token = response.get("token")
                 self.user_id = response.get("user_id")
                 self.nickname = response.get("nickname")
@@ -297,7 +569,8 @@ class NetworkClient:
             return {"success": False, "message": "Nicht mit Server verbunden"}
         
         try:
-            response = self.proxy.get_leaderboard(limit)
+            key = f"leaderboard:{limit}"
+            response = self._apply_conditional(key, self.proxy.get_leaderboard(limit, self._cached_version(key)))
             
             if response["success"]:
                 leaderboard = response.get("leaderboard", [])
@@ -393,6 +666,81 @@ class NetworkClient:
             print(f"❌ {error_msg}")
             return {"success": False, "message": error_msg}
     
+    def get_corpus_info(self) -> Dict:
+        """
+        Gibt Metadaten über die Wahlspruch-Sammlung zurück (Anzahl Sprüche und Parteien).
+        Unveränderte Daten werden aus dem lokalen Cache geliefert.
+        
+        Returns:
+            Response dictionary mit success, total_wahlsprueche, total_parteien
+        """
+        if not self._ensure_connected():
+            return {"success": False, "message": "Nicht mit Server verbunden"}
+        
+        try:
+            return self._apply_conditional("corpus", self.proxy.get_corpus_info(self._cached_version("corpus")))
+        except Exception as e:
+            error_msg = f"Fehler beim Abrufen der Korpus-Informationen: {e}"
+            print(f"❌ {error_msg}")
+            return {"success": False, "message": error_msg}
+    
+    # ==================== BATCHING ====================
+    
+    def batch(self) -> RpcBatch:
+        """
+        Erstellt einen neuen Batch für gebündelte RPC-Aufrufe.
+        
+        Returns:
+            RpcBatch, dessen execute() alle Aufrufe in einem Round-Trip sendet
+        """
+        return RpcBatch(self)
+    
+    def fetch_lobby_data(self, leaderboard_limit: int = 10, include_parteien: bool = True) -> Dict:
+        """
+        Holt alle Daten für den Lobby-Start (Parteien, Bestenliste, eigene Statistiken)
+        in einem einzigen Round-Trip.
+        
+        Args:
+            include_parteien: Parteien mitladen (die GUI nimmt stattdessen die Tabelle des GameServers)
+        
+        Returns:
+            {"success": bool, "parteien": list, "leaderboard": list, "stats": dict}
+        """
+        if not self._ensure_connected() or not self._ensure_authenticated():
+            return {"success": False, "message": "Nicht angemeldet", "parteien": [], "leaderboard": [], "stats": {}}
+        
+        try:
+            leaderboard_key = f"leaderboard:{leaderboard_limit}"
+            
+            batch = self.batch()
+            batch.get_leaderboard(leaderboard_limit, self._cached_version(leaderboard_key))
+            batch.get_user_stats(self.session_token)
+            if include_parteien:
+                batch.get_alle_parteien(self.session_token, self._cached_version("parteien"))
+            leaderboard_response, stats_response, *rest = batch.execute()
+            
+            # Unveränderte Daten aus dem lokalen Cache übernehmen
+            leaderboard_response = self._apply_conditional(leaderboard_key, leaderboard_response)
+            parteien_response = self._apply_conditional("parteien", rest[0]) if rest else {"success": True}
+            
+            if not parteien_response.get("success"):
+                print(f"❌ {parteien_response.get('message')}")
+            
+            stats = stats_response.get("stats", {}) if stats_response.get("success") else {}
+            if stats:
+                self.points = stats.get("points", self.points)
+            
+            return {
+                "success": parteien_response.get("success", False) and leaderboard_response.get("success", False),
+                "parteien": parteien_response.get("parteien", []),
+                "leaderboard": leaderboard_response.get("leaderboard", []),
+                "stats": stats
+            }
+        except Exception as e:
+            error_msg = f"Fehler beim Abrufen der Lobby-Daten: {e}"
+            print(f"❌ {error_msg}")
+            return {"success": False, "message": error_msg, "parteien": [], "leaderboard": [], "stats": {}}
+    
     # ==================== STATUS CHECKS ====================
     
     def get_alle_parteien(self, token: str) -> list[str]:
@@ -403,7 +751,9 @@ class NetworkClient:
             return {"success": False, "message": "Nicht angemeldet"}
 
         try:
-            response = self.proxy.get_alle_parteien(self.session_token)
+            response = self._apply_conditional(
+                "parteien", self.proxy.get_alle_parteien(self.session_token, self._cached_version("parteien"))
+            )
             
             if response["success"]:
                 return response["parteien"]
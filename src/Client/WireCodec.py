@@ -0,0 +1,120 @@
+"""
+Client-Gegenstück zu Server/WireFormat.py: Kodierung der Socket.IO Pakete.
+
+Serializer ('json', 'orjson', 'msgpack') und Kompressions-Schwelle übernimmt der Client vom
+Server (get_server_info()["info"]["socketio"]). Komprimierte Pakete (Binär-Frame mit
+COMPRESSED_MARKER, zlib) werden unabhängig von der Einstellung immer erkannt.
+"""
+import json
+import zlib
+from typing import Any, Optional, Union
+
+SERIALIZERS = ("json", "orjson", "msgpack")
+SEPARATORS = (',', ':')
+COMPRESSED_MARKER = b'\x00'
+COMPRESSION_LEVEL = 6
+
+# Aktive Einstellungen (siehe configure())
+_serializer = "json"
+_compression_threshold: Optional[int] = 8192
+_json_dumps = None
+_json_loads = json.loads
+_msgpack = None
+_packet_class = None
+
+
+def configure(serializer: str = "json", compression_threshold: Optional[int] = 8192):
+    """
+    Übernimmt die Einstellungen des Servers.
+
+    Raises:
+        ValueError: Unbekannter Serializer
+        RuntimeError: Benötigtes Paket nicht installiert
+    """
+    global _serializer, _compression_threshold, _json_dumps, _json_loads, _msgpack
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unbekannter Serializer: {serializer} (erlaubt: {', '.join(SERIALIZERS)})")
+
+    _json_dumps, _json_loads = None, json.loads
+    if serializer == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            raise RuntimeError("Der Server verwendet 'orjson' (pip install orjson)")
+        _json_dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        _json_loads = orjson.loads
+    elif serializer == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise RuntimeError("Der Server verwendet 'msgpack' (pip install msgpack)")
+        _msgpack = msgpack
+
+    _serializer = serializer
+    _compression_threshold = compression_threshold or None
+
+
+def dumps(obj: Any, *args, **kwargs) -> str:
+    """json.dumps-kompatibel (mit dem konfigurierten JSON-Backend)"""
+    if _json_dumps is not None:
+        return _json_dumps(obj)
+    return json.dumps(obj, separators=SEPARATORS, ensure_ascii=False)
+
+
+def loads(s, *args, **kwargs) -> Any:
+    """json.loads-kompatibel (mit dem konfigurierten JSON-Backend)"""
+    return _json_loads(s)
+
+
+def compress_frame(encoded: Union[str, bytes]) -> Union[str, bytes]:
+    if _compression_threshold is None or len(encoded) < _compression_threshold:
+        return encoded
+    raw = encoded.encode('utf-8') if isinstance(encoded, str) else encoded
+    compressed = COMPRESSED_MARKER + zlib.compress(raw, COMPRESSION_LEVEL)
+    return compressed if len(compressed) < len(raw) else encoded
+
+
+def decompress_frame(encoded: Union[str, bytes]) -> Union[str, bytes]:
+    if not isinstance(encoded, (bytes, bytearray)) or encoded[:1] != COMPRESSED_MARKER:
+        return encoded
+    raw = zlib.decompress(encoded[1:])
+    return raw if _serializer == "msgpack" else raw.decode('utf-8')
+
+
+def packet_class():
+    """Socket.IO Packet-Klasse (`Client(serializer=WireCodec.packet_class(), json=WireCodec)`)"""
+    global _packet_class
+    if _packet_class is not None:
+        return _packet_class
+
+    from socketio import packet
+
+    class WirePacket(packet.Packet):
+        @property
+        def uses_binary_events(self):
+            return _serializer != "msgpack"
+
+        def encode(self):
+            if _serializer == "msgpack":
+                out = {'type': self.packet_type, 'data': self.data, 'nsp': self.namespace}
+                if self.id is not None:
+                    out['id'] = self.id
+                return compress_frame(_msgpack.packb(out))
+            encoded = super().encode()
+            if isinstance(encoded, list):
+                return encoded
+            return compress_frame(encoded)
+
+        def decode(self, encoded_packet):
+            encoded_packet = decompress_frame(encoded_packet)
+            if isinstance(encoded_packet, (bytes, bytearray)):
+                decoded = _msgpack.unpackb(encoded_packet)
+                self.packet_type = decoded['type']
+                self.data = decoded.get('data')
+                self.id = decoded.get('id')
+                self.namespace = decoded.get('nsp', '/')
+                return 0
+            return super().decode(encoded_packet)
+
+    _packet_class = WirePacket
+    return _packet_class
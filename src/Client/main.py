@@ -3,23 +3,33 @@ import sys
 import logging
 import signal
 import atexit
+import argparse
 
 
 from NetworkClient import NetworkClient
+from GameClient import GameClient
 
 from PopupViews import *
 
 from GUI import MainGUI
 
-NetClient = NetworkClient.get_instance()
+parser = argparse.ArgumentParser(description="WahlplakatGame Client")
+parser.add_argument("--host", default="localhost", help="Hostname oder IP des WahlplakatGame-Servers")
+parser.add_argument("--rpc-port", type=int, default=8000, help="Port des RPC-Servers (Standard: 8000)")
+parser.add_argument("--game-port", type=int, default=5000, help="Port des GameServers (Standard: 5000)")
+parser.add_argument("--single-port", action="store_true",
+                    help="Server läuft mit --mode unified: RPC über den Port des GameServers")
+args, _ = parser.parse_known_args()  # Unbekannte Argumente (z.B. vom PyInstaller-Bootloader) ignorieren
+
+# Die Singletons hier mit der Konfiguration anlegen, spätere get_instance() Aufrufe (GUI) erhalten dieselben
+NetClient = NetworkClient.get_instance(host=args.host, port=args.game_port if args.single_port else args.rpc_port)
+GameClient.get_instance(host=args.host, port=args.game_port)
 
 def cleanup_on_exit():
     """Cleanup-Funktion die beim Beenden aufgerufen wird"""
     logging.info('Führe Cleanup beim Beenden durch...')
     
-    # Import GameClient hier, um zirkuläre Imports zu vermeiden
     try:
-        from GameClient import GameClient
         game_client = GameClient.get_instance()
         
         if game_client.is_connected():
@@ -0,0 +1,691 @@
+import asyncio
+import functools
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+import socketio
+
+from Cluster import create_client_manager, create_lobby_bus, owner_of
+from DatabaseService import DatabaseService
+from GameServer import GameLobby, GameService, normalize_room_code, SOCKET_CONNECTIONS, SOCKET_EVENTS, SOCKET_HANDLER_SECONDS
+from Metrics import REGISTRY
+from PartyRegistry import PARTIES
+from Snapshot import DEFAULT_INTERVAL as DEFAULT_SNAPSHOT_INTERVAL, SnapshotManager
+import WireFormat
+
+# Asyncio-basierter Socket.IO Server: eine Koroutine pro Verbindung statt ein OS-Thread
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins="*", ping_interval=25, ping_timeout=20,
+                           json=WireFormat, serializer=WireFormat.packet_class())
+
+
+async def metrics_app(scope, receive, send):
+    """Minimale ASGI-App für alle HTTP-Anfragen außerhalb von /socket.io (nur /metrics)"""
+    if scope['type'] != 'http':
+        return
+
+    if scope['path'] == '/metrics' and scope['method'] == 'GET':
+        status, content_type, body = 200, REGISTRY.CONTENT_TYPE, REGISTRY.render().encode('utf-8')
+    else:
+        status, content_type, body = 404, "text/plain; charset=utf-8", b"Not Found"
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', content_type.encode('latin-1'))]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+asgi_app = socketio.ASGIApp(sio, other_asgi_app=metrics_app)
+
+
+def track_async_event(event: str):
+    """Decorator: zählt ein Socket.IO Event und misst die Dauer des (asynchronen) Handlers"""
+    events = SOCKET_EVENTS.labels(event)
+    durations = SOCKET_HANDLER_SECONDS.labels(event)
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return await handler(*args)
+            finally:
+                durations.observe(time.perf_counter() - start)
+                events.inc()
+        return wrapper
+    return decorator
+
+
+class AsyncGameLobby(GameLobby):
+    """
+    GameLobby für den Async-Modus: gleiche Spiellogik, aber Timer laufen auf der Event-Loop,
+    Broadcasts werden als Tasks verschickt und DB-Zugriffe laufen in Worker-Threads
+    (Punktestände über den PointsWriter, daher blockiert auch end_round die Loop nicht).
+    Alle Methoden werden nur auf der Event-Loop aufgerufen, der Lock ist daher nie umkämpft.
+    """
+
+    def __init__(self, service: 'AsyncGameService', room_code: str):
+        super().__init__(None, room_code, emitter=service.emit_nowait, timers=service, points_writer=service.points_writer)
+        self.service = service
+        self.round_starting = False  # Verhindert doppelten Rundenstart während des DB-Zugriffs
+
+    def start_new_round(self):
+        raise RuntimeError("Im Async-Modus start_new_round_async() verwenden")
+
+    async def start_new_round_async(self):
+        """Startet eine neue Runde (Wahlspruch wird ohne Blockieren der Event-Loop geladen)"""
+        if self.closed or self.round_starting:
+            return None
+
+        wahlspruch = self._take_prepared_wahlspruch()
+        if wahlspruch is not None:
+            return self._begin_round(wahlspruch)
+
+        self.round_starting = True
+        try:
+            wahlspruch = await self.service.run_db(GameLobby.load_wahlspruch)
+            return self._begin_round(wahlspruch)
+        finally:
+            self.round_starting = False
+
+    def _prefetch_next_round(self, round_number: int):
+        if not self.closed:
+            self.service.spawn(self._prefetch_next_round_async(round_number))
+
+    async def _prefetch_next_round_async(self, round_number: int):
+        wahlspruch = await self.service.run_db(GameLobby.load_wahlspruch)
+        self._store_prepared_wahlspruch(round_number, wahlspruch)
+
+    def _auto_start_next_round(self):
+        if len(self.players) == 0:  # Nur wenn noch Spieler in der Lobby sind
+            return
+        if self.prepared_wahlspruch is not None and not self.round_starting:
+            # Vorab geladen: Runde direkt im Timer-Callback starten, genau zur Deadline
+            round_data = self._begin_round(self._take_prepared_wahlspruch())
+            if round_data:
+                self.emit('new_round', round_data)
+        else:
+            self.service.spawn(self._auto_start_next_round_async())
+
+    async def _auto_start_next_round_async(self):
+        round_data = await self.start_new_round_async()
+        if round_data:
+            self.emit('new_round', round_data)
+
+
+class AsyncGameService(GameService):
+    """
+    GameService auf einer asyncio Event-Loop (python-socketio AsyncServer über ASGI/uvicorn).
+
+    - Verbindungen sind Koroutinen, 10k idle WebSockets brauchen keine 10k Threads
+    - Runden-Timer sind Loop-Timer (loop.call_later), kein zusätzlicher Scheduler-Thread
+    - DB-Zugriffe laufen über einen begrenzten Thread-Pool mit einer Environment pro Thread
+
+    Im Cluster-Modus ist dies einer von mehreren Worker-Prozessen (siehe Cluster.py): Räume
+    anderer Worker werden hier nur als Socket.IO-Raum der lokalen Verbindungen geführt.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 5000, use_postgres: bool = False, db_workers: int = 8,
+                 worker_index: int = 0, worker_count: int = 1, message_queue: Optional[str] = None):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.db_workers = db_workers
+        self._tasks = set()
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.bus = create_lobby_bus(message_queue, worker_index) if message_queue else None
+        self.socket_rooms: Dict[str, str] = {}  # lokale socket_id -> room_code (für die Weiterleitung)
+        self.sid_workers: Dict[str, int] = {}  # socket_id -> Worker der Verbindung (für Lobbys dieses Workers)
+        super().__init__(None, host, port, use_postgres=use_postgres,
+                         lobby_factory=lambda room_code: AsyncGameLobby(self, room_code))
+
+    # ==================== RAUM-ZUORDNUNG ====================
+
+    def owner_of(self, room_code: str) -> int:
+        """Worker, dem der Raum (und damit der Zustand seiner Lobby) gehört"""
+        return owner_of(room_code, self.worker_count)
+
+    def _new_room_code(self) -> str:
+        """Nur Codes, die diesem Worker gehören: der Ersteller spielt ohne Weiterleitung"""
+        while True:
+            room_code = super()._new_room_code()
+            if self.owner_of(room_code) == self.worker_index:
+                return room_code
+
+    async def dispatch(self, room_code: str, op: str, sid: str, payload: dict):
+        """Führt eine Lobby-Operation beim Besitzer des Raums aus (lokal oder über den LobbyBus)"""
+        owner = self.owner_of(room_code)
+        if owner == self.worker_index:
+            await _run_lobby_op(op, sid, payload)
+        else:
+            await self.bus.send(owner, {'op': op, 'sid': sid, 'payload': payload})
+
+    async def release_socket(self, sid: str, room_code: str, worker: Optional[int] = None):
+        """Nimmt eine Verbindung aus dem Socket.IO-Raum - auf dem Worker, der sie hält"""
+        if worker is None or worker == self.worker_index:
+            if self.socket_rooms.get(sid) == room_code:
+                del self.socket_rooms[sid]
+            await sio.leave_room(sid, room_code)
+        else:
+            await self.bus.send(worker, {'op': 'release', 'sid': sid, 'payload': {'room': room_code}})
+
+    # ==================== LAUFZEIT FÜR DIE LOBBYS ====================
+
+    def call_later(self, delay: float, callback: Callable, *args):
+        """Timer-Schnittstelle der Lobby (Handle mit cancel())"""
+        return self.loop.call_later(delay, callback, *args)
+
+    def call_soon(self, callback: Callable, *args):
+        """Timer-Schnittstelle der Lobby (Handle mit cancel())"""
+        return self.loop.call_soon(callback, *args)
+
+    def emit_nowait(self, event: str, data: dict, to: Optional[str] = None, skip_sid: Optional[str] = None):
+        """Emitter-Schnittstelle der Lobby: verschickt das Event als Task ohne darauf zu warten"""
+        self.spawn(sio.emit(event, data, to=to, skip_sid=skip_sid))
+
+    def spawn(self, coroutine):
+        """Startet eine Koroutine als Task und hält eine Referenz, bis sie fertig ist"""
+        task = self.loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.error(f"❌ Fehler in Hintergrund-Task: {task.exception()!r}")
+
+    def restore_lobbies(self, states: list, elapsed: float):
+        """Nur Räume dieses Workers übernehmen (die Anzahl der Worker kann sich geändert haben)"""
+        super().restore_lobbies([state for state in states if self.owner_of(state['room_code']) == self.worker_index], elapsed)
+
+    def _apply_snapshot_fixes(self, fixes: dict):
+        # verify_lobbies läuft in einem Hintergrund-Thread, die Lobbys gehören der Event-Loop
+        apply = super()._apply_snapshot_fixes
+        self.loop.call_soon_threadsafe(apply, fixes)
+
+    def close_lobby_if_empty(self, lobby: GameLobby):
+        """Wie GameService.close_lobby_if_empty, der DB-Zugriff läuft aber im Thread-Pool"""
+        if self._unregister_if_empty(lobby):
+            self.spawn(asyncio.to_thread(self._close_room_record, lobby.room_code))
+
+    async def run_db(self, function: Callable, *args):
+        """Führt function(env, *args) im DB-Thread-Pool aus (Environment des jeweiligen Threads)"""
+        return await asyncio.to_thread(self._call_db, function, args)
+
+    def _call_db(self, function: Callable, args: tuple):
+        return function(self.db_env, *args)
+
+    # ==================== SERVER ====================
+
+    def start(self, sockets: Optional[list] = None):
+        """
+        Startet den Async-GameService (blockiert bis zum Beenden)
+
+        Args:
+            sockets: Bereits gebundene Listen-Sockets (Cluster-Modus), sonst wird host:port gebunden
+        """
+        logging.info(f"🎮 Async-GameService läuft auf {self.host}:{self.port} (Worker {self.worker_index + 1}/{self.worker_count})")
+        asyncio.run(self._serve(sockets))
+
+    async def _serve(self, sockets: Optional[list] = None):
+        try:
+            import uvicorn
+        except ImportError:
+            raise RuntimeError("Für den Async-Modus wird 'uvicorn' benötigt (pip install uvicorn)")
+
+        self.loop = asyncio.get_running_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(max_workers=self.db_workers, thread_name_prefix="db-worker"))
+        if self.bus:
+            self.spawn(self.bus.run(_handle_bus_message))
+        if self.snapshots:
+            self.snapshots.restore()
+            # Kopieren auf der Loop, Schreiben im Thread-Pool
+            self.snapshots.start_periodic(self, lambda function, *args: self.spawn(asyncio.to_thread(function, *args)))
+
+        # Große Pakete komprimiert WireFormat selbst (ab Schwelle), permessage-deflate dann nicht zusätzlich
+        config = uvicorn.Config(asgi_app, host=self.host, port=self.port, log_level="warning", backlog=4096,
+                                ws_per_message_deflate=WireFormat.settings()['compression_threshold'] is None)
+        try:
+            await uvicorn.Server(config).serve(sockets=sockets)
+        finally:
+            if self.snapshots:
+                self.snapshots.stop()
+                await asyncio.to_thread(self.snapshots.write, self.snapshots.capture(), 'shutdown')
+            await asyncio.to_thread(self.points_writer.stop)
+
+
+# Globale AsyncGameService Instanz
+game_service: Optional[AsyncGameService] = None
+
+
+def init_async_game_service(use_postgres: bool = False, host: str = "0.0.0.0", port: int = 5000,
+                            worker_index: int = 0, worker_count: int = 1, message_queue: Optional[str] = None):
+    """
+    Initialisiert den Async-GameService
+
+    Args:
+        worker_index, worker_count: Position dieses Prozesses im Cluster (Standard: einzelner Prozess)
+        message_queue: redis://... oder broker://host:port - Broadcasts und Lobby-Operationen
+            laufen dann über die Message-Queue zu den anderen Workern
+    """
+    global game_service
+    if message_queue:
+        sio.manager = create_client_manager(message_queue)
+        sio.manager.set_server(sio)
+        # Polling-Anfragen einer Session könnten auf verschiedenen Workern landen
+        sio.eio.transports = ['websocket']
+    game_service = AsyncGameService(host=host, port=port, use_postgres=use_postgres,
+                                    worker_index=worker_index, worker_count=worker_count, message_queue=message_queue)
+
+
+def run_cluster_worker(worker_index: int, worker_count: int, sock, message_queue: str,
+                       use_postgres: bool = False, connection_string_file: Optional[str] = None,
+                       wire_settings: Optional[dict] = None, reconnect_grace: Optional[float] = None,
+                       snapshot_path: Optional[str] = None, snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL):
+    """Einstiegspunkt eines Worker-Prozesses im Cluster-Modus (siehe Cluster.ClusterSupervisor)"""
+    logging.basicConfig(stream=sys.stdout, format=f'worker-{worker_index} - %(name)s - %(levelname)s - %(funcName)20s() - %(message)s',
+                        level=logging.INFO, force=True)
+    if connection_string_file:
+        DatabaseService.PATH_TO_YOUR_CONNECTION_STRING_FILE = connection_string_file
+    if wire_settings:
+        WireFormat.configure(**wire_settings)
+    if reconnect_grace is not None:
+        GameLobby.RECONNECT_GRACE_SECONDS = reconnect_grace
+
+    host, port = sock.getsockname()[:2]
+    init_async_game_service(use_postgres=use_postgres, host=host, port=port,
+                            worker_index=worker_index, worker_count=worker_count, message_queue=message_queue)
+    if snapshot_path:
+        # Jeder Worker sichert nur die Räume, die ihm gehören
+        game_service.enable_snapshots(SnapshotManager(f"{snapshot_path}.worker{worker_index}", snapshot_interval))
+    try:
+        game_service.start(sockets=[sock])
+    except KeyboardInterrupt:
+        pass
+
+
+# ==================== LOBBY-OPERATIONEN ====================
+# Laufen auf dem Worker, dem der Raum gehört. Die Socket-Verbindung selbst kann auf einem
+# anderen Worker liegen - Events an ihre SID stellt dann der Client-Manager zu.
+
+async def _detach(sid: str, reason: str, session_token: str = None) -> Optional[dict]:
+    """Entfernt die Verbindung (bzw. den Session-Token) aus ihrer Lobby auf diesem Worker"""
+    lobby, old_sid, player_info = game_service.detach_player(sid, session_token)
+    worker = game_service.sid_workers.pop(old_sid, None)
+    if not lobby:
+        return None
+
+    # Bei Reconnect hängt die alte Verbindung noch im Socket.IO-Raum
+    if old_sid != sid:
+        await game_service.release_socket(old_sid, lobby.room_code, worker)
+
+    if player_info:
+        lobby.emit('player_left', {
+            'nickname': player_info['nickname'],
+            'reason': reason
+        })
+
+    if game_service._unregister_if_empty(lobby):
+        await asyncio.to_thread(game_service._close_room_record, lobby.room_code)
+    return player_info
+
+
+async def _op_join(sid: str, payload: dict):
+    room_code = payload['room']
+    session_token = payload['token']
+    origin = payload['origin']
+
+    lobby = game_service.get_lobby(room_code)
+    if not lobby:
+        await sio.emit('error', {'message': 'Raum nicht gefunden'}, to=sid)
+        await game_service.release_socket(sid, room_code, origin)
+        return
+
+    # Entferne Spieler falls schon in dieser Lobby (Reconnect mit neuer Verbindung)
+    await _detach(sid, 'request', session_token)
+
+    user = SimpleNamespace(**payload['user'])
+    if not game_service.attach_player(lobby, sid, session_token, user):
+        await sio.emit('error', {'message': 'Raum wurde geschlossen'}, to=sid)
+        await game_service.release_socket(sid, room_code, origin)
+        return
+    game_service.sid_workers[sid] = origin
+
+    snapshot = lobby.get_player_snapshot()
+    lobby.emit('player_joined', {
+        'nickname': user.nickname,
+        'points': user.points
+    })
+    await sio.emit('join_success', {
+        'players': snapshot['players'],
+        'player_version': snapshot['version'],
+        'your_nickname': user.nickname,
+        'room_code': lobby.room_code,
+        'round_active': lobby.round_active,
+        'round_number': lobby.round_number,
+        'parteien': PARTIES.table()
+    }, to=sid)
+
+    # Wenn aktive Runde läuft, sende aktuellen Wahlspruch
+    if lobby.round_active and lobby.current_wahlspruch:
+        await sio.emit('new_round', {
+            'round_number': lobby.round_number,
+            'wahlspruch': lobby.current_wahlspruch.spruch,
+            'wahlspruch_id': lobby.current_wahlspruch.id,
+            'partei_version': PARTIES.version
+        }, to=sid)
+
+    # Starte erste Runde wenn erster Spieler
+    if len(lobby.players) == 1 and not lobby.round_active:
+        round_data = await lobby.start_new_round_async()
+        if round_data:
+            lobby.emit('new_round', round_data)
+
+    logging.info(f"✅ {user.nickname} ist der Lobby {lobby.room_code} beigetreten")
+
+
+async def _op_leave(sid: str, payload: dict):
+    session_token = payload.get('token')
+    reason = payload['reason']
+
+    player_info = await _detach(sid, reason, session_token)
+    if not player_info:
+        return
+
+    if session_token:
+        game_service.session_to_sid.pop(session_token, None)
+    if reason == 'disconnect':
+        logging.info(f"👋 {player_info['nickname']} wurde automatisch aus der Lobby entfernt (Disconnect)")
+    else:
+        logging.info(f"👋 {player_info['nickname']} hat die Lobby verlassen ({reason})")
+
+
+async def _op_park(sid: str, payload: dict):
+    """Verbindung abgebrochen: Spieler für die Reconnect-Frist parken (ohne Frist wie 'leave')"""
+    player_info = game_service.park_player(sid)
+    if not player_info:
+        await _op_leave(sid, {'token': None, 'reason': 'disconnect'})
+        return
+
+    game_service.sid_workers.pop(sid, None)
+    logging.info(f"⏸️ {player_info['nickname']} getrennt, wartet {GameLobby.RECONNECT_GRACE_SECONDS:g}s auf Reconnect")
+
+
+async def _op_resume(sid: str, payload: dict):
+    room_code = payload['room']
+    origin = payload['origin']
+
+    lobby, state = game_service.resume_player(sid, payload['token'], room_code)
+    if not lobby:
+        await sio.emit('resume_failed', {'message': 'Keine wartende Sitzung'}, to=sid)
+        await game_service.release_socket(sid, room_code, origin)
+        return
+
+    game_service.sid_workers[sid] = origin
+    await sio.emit('resume_success', state, to=sid)
+    logging.info(f"🔁 {state['your_nickname']} ist wieder mit der Lobby {lobby.room_code} verbunden")
+
+
+async def _op_answer(sid: str, payload: dict):
+    session_token = payload['token']
+    partei_id = payload['partei_id']
+
+    lobby = game_service.get_lobby_for_sid(sid)
+    if not lobby:
+        await sio.emit('error', {'message': 'Nicht in der Lobby'}, to=sid)
+        return
+
+    success, message = lobby.submit_answer(session_token, partei_id)
+    if not success:
+        await sio.emit('error', {'message': message}, to=sid)
+        return
+
+    player = lobby.players[session_token]
+    await sio.emit('answer_accepted', {'partei_id': partei_id}, to=sid)
+    lobby.emit('player_answered', {'nickname': player['nickname']})
+
+
+async def _op_player_list(sid: str, payload: dict):
+    lobby = game_service.get_lobby_for_sid(sid)
+    if lobby:
+        await sio.emit('player_list_update', lobby.get_player_snapshot(), to=sid)
+
+
+async def _op_parteien(sid: str, payload: dict):
+    # Beim Besitzer des Raums: dessen IDs stehen in den Frames der Lobby
+    await sio.emit('parteien_update', PARTIES.table(), to=sid)
+
+
+async def _op_replay(sid: str, payload: dict):
+    lobby = game_service.get_lobby_for_sid(sid)
+    if lobby:
+        lobby.send_replay(sid, payload.get('since'))
+
+
+async def _op_quelle(sid: str, payload: dict):
+    lobby = game_service.get_lobby_for_sid(sid)
+    quelle = lobby.get_current_quelle(payload['token']) if lobby else None
+
+    if quelle is not None:
+        await sio.emit('quelle_response', {'quelle': quelle}, to=sid)
+    else:
+        await sio.emit('error', {'message': 'Quelle nicht verfügbar - hast du geantwortet?'}, to=sid)
+
+
+LOBBY_OPS = {
+    'join': _op_join,
+    'leave': _op_leave,
+    'park': _op_park,
+    'resume': _op_resume,
+    'answer': _op_answer,
+    'player_list': _op_player_list,
+    'parteien': _op_parteien,
+    'replay': _op_replay,
+    'quelle': _op_quelle,
+}
+
+
+async def _run_lobby_op(op: str, sid: str, payload: dict):
+    try:
+        await LOBBY_OPS[op](sid, payload)
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei Lobby-Operation {op}: {e}")
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+async def _handle_bus_message(message: dict):
+    """Nachricht eines anderen Workers über den LobbyBus"""
+    if message['op'] == 'release':
+        await game_service.release_socket(message['sid'], message['payload']['room'])
+    else:
+        await _run_lobby_op(message['op'], message['sid'], message['payload'])
+
+
+async def _leave_socket_room(sid: str, reason: str, session_token: str = None):
+    """Nimmt die lokale Verbindung aus ihrem Raum und meldet sie beim Besitzer der Lobby ab"""
+    room_code = game_service.socket_rooms.pop(sid, None)
+    if room_code is None:
+        return
+
+    await sio.leave_room(sid, room_code)
+    await game_service.dispatch(room_code, 'leave', sid, {'token': session_token, 'reason': reason})
+
+
+# ==================== SOCKETIO EVENT HANDLERS ====================
+# Laufen auf dem Worker, der die Verbindung hält: Raum-Mitgliedschaft lokal, Lobby-Zustand beim Besitzer
+
+@sio.on('connect')
+async def handle_connect(sid, environ):
+    """Client verbindet sich"""
+    logging.info(f"🔌 Client verbunden: {sid}")
+    SOCKET_CONNECTIONS.inc()
+    await sio.emit('connected', {'message': 'Verbindung erfolgreich'}, to=sid)
+
+
+@sio.on('disconnect')
+async def handle_disconnect(sid):
+    """Client trennt Verbindung - automatische Erkennung"""
+    logging.info(f"🔌 Client getrennt: {sid}")
+    SOCKET_CONNECTIONS.dec()
+
+    if not game_service:
+        return
+
+    room_code = game_service.socket_rooms.pop(sid, None)
+    if room_code is not None:
+        await game_service.dispatch(room_code, 'park', sid, {})
+
+
+@sio.on('create_room')
+@track_async_event('create_room')
+async def handle_create_room(sid, data):
+    """Spieler erstellt einen privaten Raum"""
+    try:
+        user = await asyncio.to_thread(game_service.get_session_user, data.get('token'))
+        if not user:
+            await sio.emit('error', {'message': 'Ungültige Session'}, to=sid)
+            return
+
+        lobby = await asyncio.to_thread(game_service.create_lobby, user.id)
+        await sio.emit('room_created', {'room_code': lobby.room_code}, to=sid)
+
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei create_room: {e}")
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.on('join_game')
+@track_async_event('join_game')
+async def handle_join_game(sid, data):
+    """Spieler tritt dem Spiel bei (optional mit Raum-Code, sonst öffentliche Lobby)"""
+    try:
+        session_token = data.get('token')
+
+        user = await asyncio.to_thread(game_service.get_session_user, session_token)
+        if not user:
+            await sio.emit('error', {'message': 'Ungültige Session'}, to=sid)
+            return
+
+        # Verlasse den bisherigen Raum (Raumwechsel oder erneuter Beitritt)
+        await _leave_socket_room(sid, 'request', session_token)
+
+        room_code = normalize_room_code(data.get('room'))
+        game_service.socket_rooms[sid] = room_code
+        await sio.enter_room(sid, room_code)
+
+        await game_service.dispatch(room_code, 'join', sid, {
+            'room': room_code,
+            'token': session_token,
+            'user': {'id': user.id, 'nickname': user.nickname, 'points': user.points},
+            'origin': game_service.worker_index
+        })
+
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei join_game: {e}")
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.on('resume_session')
+@track_async_event('resume_session')
+async def handle_resume_session(sid, data):
+    """Reconnect nach Verbindungsabbruch: geparkten Spieler ohne erneuten Beitritt übernehmen"""
+    try:
+        if sid in game_service.socket_rooms:
+            await sio.emit('resume_failed', {'message': 'Verbindung ist bereits in einer Lobby'}, to=sid)
+            return
+
+        # Der Raum-Code führt zum Besitzer der Lobby, dort liegt der geparkte Spieler
+        room_code = normalize_room_code(data.get('room'))
+        game_service.socket_rooms[sid] = room_code
+        await sio.enter_room(sid, room_code)
+
+        await game_service.dispatch(room_code, 'resume', sid, {
+            'room': room_code,
+            'token': data.get('token'),
+            'origin': game_service.worker_index
+        })
+
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei resume_session: {e}")
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.on('leave_game')
+@track_async_event('leave_game')
+async def handle_leave_game(sid, data):
+    """Spieler verlässt das Spiel bewusst"""
+    try:
+        await _leave_socket_room(sid, data.get('reason', 'request'), data.get('token'))
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei leave_game: {e}")
+
+
+@sio.on('submit_answer')
+@track_async_event('submit_answer')
+async def handle_submit_answer(sid, data):
+    """Spieler gibt Antwort ab"""
+    room_code = game_service.socket_rooms.get(sid)
+    if room_code is None:
+        await sio.emit('error', {'message': 'Nicht in der Lobby'}, to=sid)
+        return
+
+    await game_service.dispatch(room_code, 'answer', sid, {'token': data.get('token'), 'partei_id': data.get('partei_id')})
+
+
+@sio.on('request_parteien')
+@track_async_event('request_parteien')
+async def handle_request_parteien(sid, data=None):
+    """
+    Client fordert die Partei-Tabelle an (z.B. wenn new_round eine andere partei_version meldet).
+    Nach dem Start ergänzte Parteien können je Worker andere IDs haben: maßgeblich ist die
+    Tabelle des Workers, dem der Raum gehört.
+    """
+    room_code = game_service.socket_rooms.get(sid)
+    if room_code is None:
+        await sio.emit('parteien_update', PARTIES.table(), to=sid)
+        return
+
+    await game_service.dispatch(room_code, 'parteien', sid, {})
+
+
+@sio.on('request_player_list')
+@track_async_event('request_player_list')
+async def handle_request_player_list(sid, data=None):
+    """Client fordert die vollständige Spielerliste an (z.B. nach einer Lücke in den player_delta Versionen)"""
+    room_code = game_service.socket_rooms.get(sid)
+    if room_code is not None:
+        await game_service.dispatch(room_code, 'player_list', sid, {})
+
+
+@sio.on('request_replay')
+@track_async_event('request_replay')
+async def handle_request_replay(sid, data):
+    """Client fordert verpasste Raum-Frames ab einer Sequenznummer an"""
+    room_code = game_service.socket_rooms.get(sid)
+    if room_code is not None:
+        await game_service.dispatch(room_code, 'replay', sid, {'since': data.get('since')})
+
+
+@sio.on('request_quelle')
+@track_async_event('request_quelle')
+async def handle_request_quelle(sid, data):
+    """Spieler fordert Quelle an (nach eigener Antwort)"""
+    room_code = game_service.socket_rooms.get(sid)
+    if room_code is None:
+        await sio.emit('error', {'message': 'Quelle nicht verfügbar - hast du geantwortet?'}, to=sid)
+        return
+
+    await game_service.dispatch(room_code, 'quelle', sid, {'token': data.get('token')})
+
+
+@sio.on('request_leaderboard')
+@track_async_event('request_leaderboard')
+async def handle_request_leaderboard(sid, data=None):
+    """Client fordert Leaderboard an"""
+    try:
+        leaderboard = await asyncio.to_thread(game_service.get_leaderboard, 10)
+        await sio.emit('leaderboard_update', {'leaderboard': leaderboard}, to=sid)
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei request_leaderboard: {e}")
+        await sio.emit('error', {'message': str(e)}, to=sid)
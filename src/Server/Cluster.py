@@ -0,0 +1,211 @@
+"""
+Cluster-Modus: mehrere Async-GameServer Worker-Prozesse hinter einem Port.
+
+- Alle Worker teilen sich einen vom Hauptprozess gebundenen Listen-Socket, der Kernel verteilt
+  neue Verbindungen auf die Prozesse (wie `uvicorn --workers`). Clients müssen dafür direkt per
+  WebSocket verbinden: eine Verbindung = eine TCP-Verbindung = ein Worker.
+- Socket.IO Broadcasts laufen über einen Client-Manager mit Message-Queue zu allen Workern
+  (`redis://...` in Produktion, `broker://host:port` für den MessageBroker aus der Standardbibliothek).
+- Jeder Raum gehört genau einem Worker (crc32(room_code) % workers). Nur dort liegt der Zustand
+  der Lobby. Operationen einer Verbindung auf einem anderen Worker werden über den LobbyBus
+  an den Besitzer weitergeleitet.
+"""
+import json
+import logging
+import multiprocessing
+import pickle
+import socket
+import zlib
+from typing import Awaitable, Callable, List, Optional
+
+import socketio
+
+from MessageBroker import BrokerConnection, MessageBroker, parse_broker_url
+
+LOBBY_CHANNEL = "wahlplakat-lobby"
+
+
+def owner_of(room_code: str, worker_count: int) -> int:
+    """Index des Workers, dem der Raum gehört (stabil über alle Prozesse)"""
+    if worker_count <= 1:
+        return 0
+    return zlib.crc32(room_code.encode("utf-8")) % worker_count
+
+
+class AsyncBrokerManager(socketio.AsyncPubSubManager):
+    """Socket.IO Client-Manager über den MessageBroker (Gegenstück zu socketio.AsyncRedisManager)"""
+    name = "wahlplakat-broker"
+
+    def __init__(self, url: str = "broker://127.0.0.1:6380", channel: str = "socketio", write_only: bool = False, logger=None):
+        host, port = parse_broker_url(url)
+        self._publisher = BrokerConnection(host, port)
+        self._listener = BrokerConnection(host, port)
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    async def _publish(self, data):
+        await self._publisher.send(self.channel, pickle.dumps(data))
+
+    async def _listen(self):
+        async for body in self._listener.frames(self.channel):
+            yield body
+
+
+def create_client_manager(message_queue: str) -> socketio.AsyncManager:
+    """Client-Manager zur Message-Queue URL (redis://, rediss:// oder broker://)"""
+    if message_queue.startswith(("redis://", "rediss://")):
+        return socketio.AsyncRedisManager(message_queue)
+    if message_queue.startswith("broker://"):
+        return AsyncBrokerManager(message_queue)
+    raise ValueError(f"Unbekannte Message-Queue: {message_queue}")
+
+
+class LobbyBus:
+    """
+    Punkt-zu-Punkt Nachrichten zwischen den Workern über die Message-Queue.
+    Jede Nachricht trägt den Index des Ziel-Workers, alle anderen Worker ignorieren sie.
+    Nachrichten eines Absenders kommen in Sende-Reihenfolge an.
+    """
+
+    def __init__(self, worker_index: int):
+        self.worker_index = worker_index
+
+    async def send(self, target: int, message: dict):
+        await self._publish(json.dumps(dict(message, target=target)).encode("utf-8"))
+
+    async def run(self, handler: Callable[[dict], Awaitable[None]]):
+        """Empfängt Nachrichten für diesen Worker und verarbeitet sie nacheinander"""
+        async for body in self._listen():
+            message = json.loads(body)
+            if message.get("target") != self.worker_index:
+                continue
+            try:
+                await handler(message)
+            except Exception as e:
+                logging.exception(f"❌ Fehler bei Lobby-Nachricht {message.get('op')}: {e}")
+
+    async def _publish(self, body: bytes):
+        raise NotImplementedError
+
+    def _listen(self):
+        raise NotImplementedError
+
+
+class BrokerLobbyBus(LobbyBus):
+    """LobbyBus über den MessageBroker"""
+
+    def __init__(self, worker_index: int, url: str):
+        super().__init__(worker_index)
+        host, port = parse_broker_url(url)
+        self._publisher = BrokerConnection(host, port)
+        self._listener = BrokerConnection(host, port)
+
+    async def _publish(self, body: bytes):
+        await self._publisher.send(LOBBY_CHANNEL, body)
+
+    def _listen(self):
+        return self._listener.frames(LOBBY_CHANNEL)
+
+
+class RedisLobbyBus(LobbyBus):
+    """LobbyBus über Redis Pub/Sub"""
+
+    def __init__(self, worker_index: int, url: str):
+        super().__init__(worker_index)
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("Für eine Redis Message-Queue wird 'redis' benötigt (pip install redis)")
+        self._redis = aioredis.Redis.from_url(url)
+
+    async def _publish(self, body: bytes):
+        await self._redis.publish(LOBBY_CHANNEL, body)
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(LOBBY_CHANNEL)
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                yield message["data"]
+
+
+def create_lobby_bus(message_queue: str, worker_index: int) -> LobbyBus:
+    """LobbyBus zur Message-Queue URL (redis://, rediss:// oder broker://)"""
+    if message_queue.startswith(("redis://", "rediss://")):
+        return RedisLobbyBus(worker_index, message_queue)
+    if message_queue.startswith("broker://"):
+        return BrokerLobbyBus(worker_index, message_queue)
+    raise ValueError(f"Unbekannte Message-Queue: {message_queue}")
+
+
+def bind_listen_socket(host: str, port: int, backlog: int = 4096) -> socket.socket:
+    """Bindet den gemeinsamen Listen-Socket aller Worker"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class ClusterSupervisor:
+    """Startet die Worker-Prozesse (und bei Bedarf den lokalen MessageBroker) und wartet auf sie"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 5000, workers: int = 2, message_queue: Optional[str] = None,
+                 use_postgres: bool = False, connection_string_file: Optional[str] = None, wire_settings: Optional[dict] = None,
+                 reconnect_grace: Optional[float] = None, snapshot_path: Optional[str] = None, snapshot_interval: float = 60.0):
+        """
+        Args:
+            workers: Anzahl Worker-Prozesse (sinnvoll: Anzahl CPU-Kerne)
+            message_queue: redis://... oder broker://host:port. None = lokaler MessageBroker im Hauptprozess
+            connection_string_file: Pfad der PostgreSQL-Verbindungsdaten für die Worker
+            wire_settings: Serializer/Kompression für die Worker (siehe WireFormat.configure)
+            reconnect_grace: Reconnect-Frist der Lobbys in Sekunden (None = GameLobby.RECONNECT_GRACE_SECONDS)
+            snapshot_path: Basis der Warmstart-Snapshots, jeder Worker schreibt <snapshot_path>.worker<N> (None = aus)
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.message_queue = message_queue
+        self.use_postgres = use_postgres
+        self.connection_string_file = connection_string_file
+        self.wire_settings = wire_settings
+        self.reconnect_grace = reconnect_grace
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.processes: List[multiprocessing.Process] = []
+        self.broker: Optional[MessageBroker] = None
+
+    def start(self):
+        """Startet alle Worker (blockiert bis zum Beenden)"""
+        from AsyncGameServer import run_cluster_worker
+
+        if self.message_queue is None:
+            self.broker = MessageBroker("127.0.0.1", 0)
+            self.broker.run_in_thread()
+            self.message_queue = f"broker://127.0.0.1:{self.broker.port}"
+
+        sock = bind_listen_socket(self.host, self.port)
+        context = multiprocessing.get_context("spawn")
+        for worker_index in range(self.workers):
+            process = context.Process(
+                target=run_cluster_worker,
+                args=(worker_index, self.workers, sock, self.message_queue, self.use_postgres,
+                      self.connection_string_file, self.wire_settings, self.reconnect_grace,
+                      self.snapshot_path, self.snapshot_interval),
+                name=f"GameWorker-{worker_index}"
+            )
+            process.start()
+            self.processes.append(process)
+
+        logging.info(f"🎮 Cluster mit {self.workers} Workern läuft auf {self.host}:{self.port} (Message-Queue: {self.message_queue})")
+        try:
+            for process in self.processes:
+                process.join()
+        except KeyboardInterrupt:
+            logging.info("🛑 Beende Worker...")
+            for process in self.processes:
+                process.terminate()
+            for process in self.processes:
+                process.join(10)
+        finally:
+            sock.close()
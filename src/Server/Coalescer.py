@@ -0,0 +1,88 @@
+import threading
+from typing import Callable, List
+
+from Metrics import REGISTRY
+
+COALESCED_EVENTS = REGISTRY.counter("wahlplakat_coalesced_events_total", "Über den Coalescer gepufferte Lobby-Events", ["event"])
+COALESCER_FLUSHES = REGISTRY.counter("wahlplakat_coalescer_flushes_total", "Vom Coalescer gesendete Frames", ["kind"])
+
+# Events, die gepuffert und gebündelt werden dürfen (alles andere wird sofort gesendet)
+COALESCABLE_EVENTS = frozenset({'player_delta', 'player_answered', 'player_joined', 'player_left', 'player_list_update'})
+
+# Vollständige Snapshots: nur der neueste im Puffer zählt
+LATEST_WINS_EVENTS = frozenset({'player_list_update'})
+
+
+class EventCoalescer:
+    """
+    Puffert hochfrequente Lobby-Events für ein kurzes Fenster (z.B. 75 ms) und sendet sie
+    gesammelt als ein `lobby_batch` Event: {'events': [[event, data], ...]}.
+
+    - Snapshots (player_list_update) sind latest-wins: ältere im Puffer werden verworfen
+    - Aufeinanderfolgende player_delta werden zu einem Delta {'base', 'version', 'changes'} zusammengeführt
+    - flush() vor jedem nicht bündelbaren Event hält die Reihenfolge für die Clients ein. Dafür
+      hält flush() `send_lock` vom Leeren des Puffers bis nach dem Senden; wer direkt sendet,
+      hält ihn ebenfalls (siehe GameLobby.emit), sonst könnte ein Timer-Flush, der seinen Puffer
+      schon entnommen, aber noch nicht gesendet hat, hinter dem direkten Event landen.
+    """
+
+    def __init__(self, send: Callable[[str, dict], None], timers, window: float = 0.075):
+        """
+        Args:
+            send: Funktion send(event, data), die an den Raum sendet
+            timers: Objekt mit call_later(delay, callback) (Scheduler oder Event-Loop)
+            window: Puffer-Fenster in Sekunden
+        """
+        self.send = send
+        self.timers = timers
+        self.window = window
+        self._buffer: List[list] = []
+        self._flush_handle = None
+        self._lock = threading.Lock()  # Schützt den Puffer (add() wartet nie auf das Senden)
+        self.send_lock = threading.RLock()  # Reihenfolge der gesendeten Frames
+
+    def add(self, event: str, data: dict):
+        """Puffert ein Event; das erste Event im leeren Puffer startet das Fenster"""
+        COALESCED_EVENTS.labels(event).inc()
+        with self._lock:
+            if event in LATEST_WINS_EVENTS:
+                self._buffer = [entry for entry in self._buffer if entry[0] != event]
+
+            last = self._buffer[-1] if self._buffer else None
+            if event == 'player_delta' and last and last[0] == 'player_delta' and data['version'] == last[1]['version'] + 1:
+                last[1] = self._merge_deltas(last[1], data)
+            else:
+                self._buffer.append([event, data])
+
+            if self._flush_handle is None:
+                self._flush_handle = self.timers.call_later(self.window, self.flush)
+
+    @staticmethod
+    def _merge_deltas(first: dict, second: dict) -> dict:
+        return {
+            'base': first.get('base', first['version'] - 1),
+            'version': second['version'],
+            'changes': first['changes'] + second['changes']
+        }
+
+    def flush(self):
+        """Sendet alle gepufferten Events (einzelnes Event direkt, mehrere als lobby_batch)"""
+        with self.send_lock:
+            with self._lock:
+                events, self._buffer = self._buffer, []
+                handle, self._flush_handle = self._flush_handle, None
+            if handle is not None:
+                handle.cancel()
+
+            if not events:
+                return
+            if len(events) == 1:
+                COALESCER_FLUSHES.labels("single").inc()
+                self.send(events[0][0], events[0][1])
+            else:
+                COALESCER_FLUSHES.labels("batch").inc()
+                self.send('lobby_batch', {'events': events})
+
+    def pending(self) -> int:
+        """Anzahl gepufferter Events"""
+        return len(self._buffer)
@@ -1,36 +1,275 @@
-from flask import Flask, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
+import collections
+import contextlib
+import functools
+import heapq
+import itertools
 import threading
-from typing import Dict, List, Optional
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
 from DatabaseService import DatabaseService
+from Gateway import mount_rpc
+from Metrics import REGISTRY
+from Scheduler import Scheduler
+from Coalescer import EventCoalescer, COALESCABLE_EVENTS
+from PartyRegistry import PARTIES
+from PointsWriter import PointsWriter
+from Snapshot import SnapshotManager
+from WireFormat import freeze
+import WireFormat
 import secrets
 import logging
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = secrets.token_hex(16)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', json=WireFormat, serializer=WireFormat.packet_class())
+
+# Öffentliche Standard-Lobby, der alle Spieler ohne Raum-Code beitreten
+DEFAULT_ROOM = "public"
+ROOM_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # ohne leicht verwechselbare Zeichen (0/O, 1/I)
+ROOM_CODE_LENGTH = 6
+
+# Ein Scheduler-Thread für alle Runden-Deadlines aller Lobbys
+scheduler = Scheduler(workers=4, name="RoundScheduler")
+
+
+def normalize_room_code(room_code: Optional[str]) -> str:
+    """Einheitliche Schreibweise eines Raum-Codes (ohne Code: öffentliche Lobby)"""
+    if not room_code or room_code.strip().lower() == DEFAULT_ROOM:
+        return DEFAULT_ROOM
+    return room_code.strip().upper()
+
+
+# ==================== METRIKEN ====================
+
+ROUNDS_STARTED = REGISTRY.counter("wahlplakat_rounds_started_total", "Gestartete Runden")
+ROUNDS_ENDED = REGISTRY.counter("wahlplakat_rounds_ended_total", "Beendete Runden")
+ROUND_DURATION = REGISTRY.histogram("wahlplakat_round_duration_seconds", "Dauer einer Runde vom Start bis zur Auswertung",
+                                    buckets=(1, 2.5, 5, 7.5, 10, 12.5, 15, 17.5, 20, 30))
+ANSWERS = REGISTRY.counter("wahlplakat_answers_total", "Ausgewertete Antworten", ["result"])
+ANSWER_LATENCY = REGISTRY.histogram("wahlplakat_answer_latency_seconds", "Zeit vom Rundenstart bis zur Antwort eines Spielers",
+                                    buckets=(0.5, 1, 2, 3, 4, 5, 7.5, 10, 12.5, 15))
+LOBBY_PLAYERS = REGISTRY.gauge("wahlplakat_lobby_players", "Spieler in allen Lobbys")
+LOBBIES_OPEN = REGISTRY.gauge("wahlplakat_lobbies_open", "Offene Lobbys (inkl. öffentlicher Lobby)")
+LOBBY_LOCK_HOLD = REGISTRY.histogram("wahlplakat_lobby_lock_hold_seconds", "Haltezeit des Lobby-Locks je Operation", ["operation"],
+                                     buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+SOCKET_CONNECTIONS = REGISTRY.gauge("wahlplakat_socketio_connections", "Offene Socket.IO Verbindungen")
+SOCKET_EVENTS = REGISTRY.counter("wahlplakat_socketio_events_total", "Empfangene Socket.IO Events", ["event"])
+SOCKET_HANDLER_SECONDS = REGISTRY.histogram("wahlplakat_socketio_handler_seconds", "Dauer der Socket.IO Event-Handler", ["event"])
+ROUND_PREFETCH = REGISTRY.counter("wahlplakat_round_prefetch_total", "Rundenstarts nach der Pause mit (hit) bzw. ohne (miss) vorab geladenen Wahlspruch", ["result"])
+LOBBY_REPLAYS = REGISTRY.counter("wahlplakat_lobby_replays_total", "Beantwortete request_replay Anfragen", ["result"])
+
+
+def track_event(event: str):
+    """
+    Decorator: zählt ein Socket.IO Event und misst die Dauer des Handlers. Im Gateway-Modus läuft
+    der Handler in einem Scope des Environment-Pools (siehe `GameService.db_scope`).
+    """
+    events = SOCKET_EVENTS.labels(event)
+    durations = SOCKET_HANDLER_SECONDS.labels(event)
+    
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                with game_service.db_scope() if game_service else contextlib.nullcontext():
+                    return handler(*args)
+            finally:
+                durations.observe(time.perf_counter() - start)
+                events.inc()
+        return wrapper
+    return decorator
+
+
+@app.route('/metrics')
+def metrics():
+    """Metriken im Prometheus Text-Format"""
+    return Response(REGISTRY.render(), content_type=REGISTRY.CONTENT_TYPE)
 
 
 class GameLobby:
-    """Zentrale Spiel-Lobby - alle Spieler spielen zusammen"""
+    """Spiel-Lobby eines Raums - alle Spieler im Raum spielen zusammen"""
+    
+    ROUND_SECONDS = 15.0  # Antwortzeit pro Runde
+    PAUSE_SECONDS = 5.0  # Pause zwischen Rundenende und nächster Runde
+    TOP_SCORERS = 5  # Anzahl Spieler in der Bestenliste der round_end Zusammenfassung
+    COALESCE_WINDOW = 0.075  # Puffer-Fenster für bündelbare Events in Sekunden, 0 = sofort senden
+    RECONNECT_GRACE_SECONDS = 20.0  # Getrennte Spieler so lange parken statt entfernen, 0 = sofort entfernen
+    REPLAY_BUFFER = 256  # Anzahl der letzten Raum-Frames, die per request_replay nachgeholt werden können
     
-    def __init__(self, db_env):
-        self.db_env = db_env
+    def __init__(self, db_env, room_code: str = DEFAULT_ROOM, emitter: Optional[Callable] = None, timers=None,
+                 points_writer=None, use_postgres: bool = False):
+        """
+        Args:
+            db_env: SillyORM Environment. None = eine Environment pro Thread (bzw. aus dem Pool des Gateways)
+            emitter: Funktion emitter(event, data, to=..., skip_sid=...) für Broadcasts (Standard: Flask-SocketIO)
+            timers: Objekt mit call_later(delay, callback) / call_soon(callback), die Handles mit cancel()
+                zurückgeben (Standard: zentraler Scheduler; im Async-Modus die Event-Loop)
+            points_writer: PointsWriter für Punktestände im Hintergrund (ohne: synchron über db_env)
+            use_postgres: Datenbank für die Environments pro Thread
+        """
+        self._db_env = db_env
+        self.use_postgres = use_postgres
+        self.room_code = room_code  # Zugleich Name des Socket.IO Rooms
+        self.emitter = emitter or socketio.emit
+        self.timers = timers or scheduler
+        self.points_writer = points_writer
+        self.closed = False
         self.players: Dict[str, dict] = {}  # session_token -> {user_id, nickname, sid, answered, points}
         self.sid_to_token: Dict[str, str] = {}  # sid -> session_token für Disconnect-Handling
+        self.parked: Dict[str, object] = {}  # session_token -> Timer-Handle, geparkte Spieler ohne Verbindung (sid None)
+        self.on_parked_expired: Optional[Callable] = None  # on_parked_expired(lobby, session_token, player_info), vom GameService gesetzt
         self.current_wahlspruch = None
+        self.prepared_wahlspruch = None  # Während der Pause vorab geladener Wahlspruch der nächsten Runde
         self.current_quelle = None
-        self.current_answers: Dict[str, str] = {}  # session_token -> partei
-        self.round_timer = None
+        self.current_answers: Dict[str, int] = {}  # session_token -> partei_id
+        self.round_timer = None  # ScheduledCall für das Rundenende
+        self.next_round_timer = None  # ScheduledCall für den Start der nächsten Runde
+        self.next_round_at = None  # time.monotonic() des nächsten Rundenstarts (während der Pause)
         self.round_active = False
         self.round_number = 0
+        self.round_started_at = None  # time.monotonic() beim Rundenstart
+        self.player_version = 0  # Version der Spielerliste, steigt mit jedem player_delta
         self.lock = threading.Lock()
-        
-    def add_player(self, session_token: str, user_id: int, nickname: str, sid: str, points: int):
-        """Fügt einen Spieler zur Lobby hinzu"""
+        self.stream_seq = 0  # Sequenznummer des zuletzt an den Raum gesendeten Frames ('seq' in der Payload)
+        self.replay_buffer = collections.deque(maxlen=self.REPLAY_BUFFER)  # (seq, event, payload) der letzten Frames
+        self._stream_lock = threading.Lock()  # Vergabe der Sequenznummer und Senden in derselben Reihenfolge
+        self.coalescer = EventCoalescer(self._send, self.timers, self.COALESCE_WINDOW) if self.COALESCE_WINDOW > 0 else None
+        self._lock_hold = {}  # operation -> Histogramm-Kind (Cache für _locked)
+    
+    @contextlib.contextmanager
+    def _locked(self, operation: str):
+        """Hält self.lock und misst die Haltezeit (wahlplakat_lobby_lock_hold_seconds{operation})"""
+        histogram = self._lock_hold.get(operation)
+        if histogram is None:
+            histogram = self._lock_hold[operation] = LOBBY_LOCK_HOLD.labels(operation)
         with self.lock:
+            acquired = time.perf_counter()
+            try:
+                yield
+            finally:
+                histogram.observe(time.perf_counter() - acquired)
+    
+    def emit(self, event: str, data: dict, skip_sid: Optional[str] = None):
+        """
+        Sendet ein Event nur an die Spieler dieser Lobby (Socket.IO Room).
+        Hochfrequente Events (Spielerliste, Beitritte, Antworten) werden über den Coalescer gebündelt;
+        vor allen anderen Events wird der Puffer geleert, damit die Reihenfolge erhalten bleibt.
+        """
+        if self.coalescer and skip_sid is None:
+            if event in COALESCABLE_EVENTS:
+                self.coalescer.add(event, data)
+                return
+            # Ein laufender Timer-Flush sendet zuerst, danach der Rest des Puffers und dieses Event
+            with self.coalescer.send_lock:
+                self.coalescer.flush()
+                self._send(event, data, skip_sid)
+            return
+        self._send(event, data, skip_sid)
+    
+    def _send(self, event: str, data: dict, skip_sid: Optional[str] = None):
+        # Einmal kodieren, an alle Spieler des Raums dieselben Bytes
+        if skip_sid is not None:
+            self.emitter(event, freeze(data), to=self.room_code, skip_sid=skip_sid)
+            return
+        
+        # Frames an den ganzen Raum bilden einen lückenlos nummerierten Stream (siehe send_replay)
+        with self._stream_lock:
+            self.stream_seq += 1
+            payload = freeze(dict(data, seq=self.stream_seq))
+            self.replay_buffer.append((self.stream_seq, event, payload))
+            self.emitter(event, payload, to=self.room_code)
+    
+    def _replay_since(self, since: int) -> Optional[List[list]]:
+        """
+        Gepufferte Raum-Frames nach der Sequenznummer `since` (nur unter self._stream_lock aufrufen).
+        
+        Returns:
+            [[event, payload], ...] oder None, wenn Frames nicht mehr im Puffer sind (bzw. `since` unbekannt ist)
+        """
+        if since == self.stream_seq:
+            return []
+        if since > self.stream_seq or not self.replay_buffer or since + 1 < self.replay_buffer[0][0]:
+            return None
+        start = since + 1 - self.replay_buffer[0][0]
+        return [[event, payload] for _, event, payload in itertools.islice(self.replay_buffer, start, None)]
+    
+    def send_replay(self, sid: str, since: int):
+        """
+        Sendet einer Verbindung die Raum-Frames nach `since` als lobby_replay {'seq', 'events'}.
+        Reicht der Puffer nicht zurück, ist events None und 'round' enthält den aktuellen Rundenzustand.
+        """
+        with self._stream_lock:
+            events = self._replay_since(since) if isinstance(since, int) else None
+            reply = {'seq': self.stream_seq, 'events': events}
+            if events is None:
+                with self._locked('send_replay'):
+                    reply['round'] = self._round_state()
+            LOBBY_REPLAYS.labels('replayed' if events is not None else 'too_old').inc()
+            # Unter dem Stream-Lock: spätere Raum-Frames kommen beim Client erst nach der Antwort an
+            self.emitter('lobby_replay', reply, to=sid)
+    
+    def emit_to(self, sid: str, event: str, data: dict):
+        """Sendet ein Event nur an eine einzelne Socket-Verbindung"""
+        self.emitter(event, data, to=sid)
+    
+    def _next_delta(self, changes: List[dict]) -> dict:
+        """
+        Erzeugt ein versioniertes Delta der Spielerliste (nur unter self.lock aufrufen).
+        
+        Änderungen (Schlüssel ist die user_id):
+            {'op': 'join', 'player': {...}}
+            {'op': 'leave', 'user_id': ...}
+            {'op': 'update', 'user_id': ..., <geänderte Felder>}
+            {'op': 'round_reset'}  (alle: answered=False, can_answer=True)
+        """
+        self.player_version += 1
+        return {'version': self.player_version, 'changes': changes}
+    
+    @staticmethod
+    def _public_player(player: dict) -> dict:
+        """Spieler-Eintrag, wie ihn die Clients sehen"""
+        return {
+            'user_id': player['user_id'],
+            'nickname': player['nickname'],
+            'points': player['points'],
+            'answered': player['answered'],
+            'can_answer': player['can_answer']
+        }
+    
+    def close(self):
+        """Schließt die Lobby: laufende Timer stoppen, keine neuen Runden oder Spieler mehr"""
+        with self._locked('close'):
+            self.closed = True
+            self.round_active = False
+            if self.round_timer:
+                self.round_timer.cancel()
+            if self.next_round_timer:
+                self.next_round_timer.cancel()
+            self.prepared_wahlspruch = None
+            for handle in self.parked.values():
+                handle.cancel()
+            self.parked.clear()
+        
+        if self.coalescer:
+            self.coalescer.flush()
+        
+    def add_player(self, session_token: str, user_id: int, nickname: str, sid: str, points: int) -> bool:
+        """
+        Fügt einen Spieler zur Lobby hinzu.
+        
+        Returns:
+            False wenn die Lobby bereits geschlossen wurde
+        """
+        with self._locked('add_player'):
+            if self.closed:
+                return False
+            
             self.players[session_token] = {
                 'user_id': user_id,
                 'nickname': nickname,
@@ -44,16 +283,24 @@ class GameLobby:
             # Wenn Spieler während einer aktiven Runde beitritt, kann er diese Runde nicht antworten
             if self.round_active:
                 self.players[session_token]['can_answer'] = False
+            
+            delta = self._next_delta([{'op': 'join', 'player': self._public_player(self.players[session_token])}])
+        
+        self.emit('player_delta', delta)
+        return True
         
-    def remove_player(self, session_token: str = None, sid: str = None) -> Optional[dict]:
+    def remove_player(self, session_token: str = None, sid: str = None, parked_only: bool = False) -> Optional[dict]:
         """
         Entfernt einen Spieler aus der Lobby.
         Kann entweder per session_token oder sid erfolgen.
         
+        Args:
+            parked_only: Nur entfernen, wenn der Spieler (noch) geparkt ist (Ablauf der Reconnect-Frist)
+        
         Returns:
             Dict mit Spieler-Info falls gefunden, sonst None
         """
-        with self.lock:
+        with self._locked('remove_player'):
             # Finde Token falls nur SID gegeben
             if sid and not session_token:
                 session_token = self.sid_to_token.get(sid)
@@ -61,6 +308,9 @@ class GameLobby:
             if not session_token:
                 return None
             
+            if parked_only and session_token not in self.parked:
+                return None  # Inzwischen wieder verbunden oder bereits entfernt
+            
             # Entferne Spieler
             player_info = None
             if session_token in self.players:
@@ -71,28 +321,155 @@ class GameLobby:
                 if player_info['sid'] in self.sid_to_token:
                     del self.sid_to_token[player_info['sid']]
                 
+                # Wartende Reconnect-Frist stoppen
+                handle = self.parked.pop(session_token, None)
+                if handle:
+                    handle.cancel()
+                
                 # Cleanup Antworten
                 if session_token in self.current_answers:
                     del self.current_answers[session_token]
+                
+                delta = self._next_delta([{'op': 'leave', 'user_id': player_info['user_id']}])
+        
+        if player_info:
+            self.emit('player_delta', delta)
+        return player_info
+    
+    def park_player(self, sid: str) -> Optional[tuple]:
+        """
+        Parkt den Spieler einer getrennten Verbindung für RECONNECT_GRACE_SECONDS, statt ihn zu entfernen.
+        Ohne Broadcast: für die anderen Spieler bleibt er in der Liste. Meldet er sich nicht rechtzeitig
+        per resume_player zurück, wird er entfernt und on_parked_expired aufgerufen.
+        
+        Returns:
+            (session_token, player_info) oder None (Verbindung nicht in der Lobby oder Frist deaktiviert)
+        """
+        if self.RECONNECT_GRACE_SECONDS <= 0:
+            return None
+        
+        with self._locked('park_player'):
+            if self.closed:
+                return None
+            session_token = self.sid_to_token.pop(sid, None)
+            if session_token is None:
+                return None
+            
+            player = self.players[session_token]
+            player['sid'] = None
+            self.parked[session_token] = self.timers.call_later(self.RECONNECT_GRACE_SECONDS, self._expire_parked, session_token)
+            return session_token, player.copy()
+    
+    def resume_player(self, session_token: str, sid: str) -> Optional[dict]:
+        """
+        Bindet einen geparkten Spieler an seine neue Verbindung (O(1), ohne DB-Zugriff und ohne Broadcast).
+        
+        Returns:
+            Zustand für resume_success oder None, wenn der Spieler nicht (mehr) geparkt ist
+        """
+        with self._locked('resume_player'):
+            handle = self.parked.pop(session_token, None)
+            if handle is None:
+                return None
+            handle.cancel()
+            
+            player = self.players[session_token]
+            player['sid'] = sid
+            self.sid_to_token[sid] = session_token
             
-            return player_info
+            return dict(self._round_state(),
+                        room_code=self.room_code,
+                        your_nickname=player['nickname'],
+                        points=player['points'],
+                        answered=player['answered'],
+                        can_answer=player['can_answer'],
+                        player_version=self.player_version)
+    
+    def _round_state(self) -> dict:
+        """Aktueller Rundenzustand für Clients, die Events verpasst haben (nur unter self.lock aufrufen)"""
+        state = {
+            'round_active': self.round_active,
+            'round_number': self.round_number,
+            'partei_version': PARTIES.version
+        }
+        if self.round_active and self.current_wahlspruch:
+            state['wahlspruch'] = self.current_wahlspruch.spruch
+            state['wahlspruch_id'] = self.current_wahlspruch.id
+        return state
+    
+    def _expire_parked(self, session_token: str):
+        """Reconnect-Frist abgelaufen (Timer-Callback): Spieler endgültig entfernen"""
+        player_info = self.remove_player(session_token=session_token, parked_only=True)
+        if player_info and self.on_parked_expired:
+            self.on_parked_expired(self, session_token, player_info)
     
     def get_player_list(self) -> List[dict]:
         """Gibt Liste aller Spieler zurück"""
-        with self.lock:
-            return [
-                {
-                    'nickname': p['nickname'],
-                    'points': p['points'],
-                    'answered': p['answered'],
-                    'can_answer': p['can_answer']
-                }
-                for p in self.players.values()
-            ]
+        return self.get_player_snapshot()['players']
+    
+    def get_player_snapshot(self) -> dict:
+        """Vollständige Spielerliste mit ihrer Version (Basis für nachfolgende player_delta Events)"""
+        with self._locked('get_player_snapshot'):
+            return {
+                'version': self.player_version,
+                'players': [self._public_player(p) for p in self.players.values()]
+            }
+    
+    @property
+    def db_env(self):
+        """Feste Environment der Lobby oder (ohne) die des aufrufenden Threads"""
+        if self._db_env is not None:
+            return self._db_env
+        return DatabaseService.get_thread_environment(use_postgres=self.use_postgres)
     
     def start_new_round(self):
-        """Startet eine neue Runde"""
-        with self.lock:
+        """Startet eine neue Runde (mit dem vorab geladenen Wahlspruch ohne DB-Zugriff)"""
+        if self.closed:
+            return None
+        
+        wahlspruch = self._take_prepared_wahlspruch()
+        if wahlspruch is None:
+            # Wähle zufälligen Wahlspruch (DB-Zugriff außerhalb des Locks)
+            wahlspruch = self.load_wahlspruch(self.db_env)
+        return self._begin_round(wahlspruch)
+    
+    @staticmethod
+    def load_wahlspruch(db_env):
+        """
+        Zufälliger Wahlspruch als einfaches Objekt (id, spruch, partei, partei_id, quelle). Die Felder des
+        Records werden hier gelesen, damit der Rundenstart unter dem Lock keine Datenbank braucht.
+        """
+        wahlspruch = DatabaseService.get_random_wahlspruch(db_env)
+        if not wahlspruch:
+            return None
+        return SimpleNamespace(id=wahlspruch.id, spruch=wahlspruch.spruch, partei=wahlspruch.partei,
+                               partei_id=PARTIES.intern(wahlspruch.partei), quelle=wahlspruch.quelle)
+    
+    def _prefetch_next_round(self, round_number: int):
+        """Lädt während der Pause nach Runde `round_number` den Wahlspruch der nächsten Runde"""
+        if not self.closed:
+            self._store_prepared_wahlspruch(round_number, self.load_wahlspruch(self.db_env))
+    
+    def _store_prepared_wahlspruch(self, round_number: int, wahlspruch):
+        """Merkt sich den vorab geladenen Wahlspruch, solange die nächste Runde noch nicht begonnen hat"""
+        with self._locked('prefetch'):
+            if wahlspruch is not None and not self.closed and not self.round_active and self.round_number == round_number:
+                self.prepared_wahlspruch = wahlspruch
+    
+    def _take_prepared_wahlspruch(self):
+        """Entnimmt den vorab geladenen Wahlspruch (None, wenn das Vorladen nicht rechtzeitig fertig war)"""
+        with self._locked('prefetch'):
+            wahlspruch, self.prepared_wahlspruch = self.prepared_wahlspruch, None
+            if self.round_number > 0:
+                ROUND_PREFETCH.labels('hit' if wahlspruch is not None else 'miss').inc()
+            return wahlspruch
+    
+    def _begin_round(self, wahlspruch):
+        """Setzt den Rundenzustand für den gewählten Wahlspruch und plant das Rundenende ein"""
+        with self._locked('begin_round'):
+            if self.closed:
+                return None
+            
             self.round_number += 1
             self.round_active = True
             self.current_answers = {}
@@ -102,33 +479,43 @@ class GameLobby:
                 player['answered'] = False
                 player['can_answer'] = True
             
-            # Wähle zufälligen Wahlspruch
-            self.current_wahlspruch = DatabaseService.get_random_wahlspruch(self.db_env)
+            self.current_wahlspruch = wahlspruch
             
             if not self.current_wahlspruch:
                 self.round_active = False
                 return None
             
             self.current_quelle = self.current_wahlspruch.quelle
+            self.round_started_at = time.monotonic()
+            self.next_round_at = None
+            ROUNDS_STARTED.inc()
+            delta = self._next_delta([{'op': 'round_reset'}])
             
-            # Starte 15-Sekunden Timer
+            # Rundenende beim Scheduler einplanen
             if self.round_timer:
                 self.round_timer.cancel()
-            self.round_timer = threading.Timer(15.0, self.end_round)
-            self.round_timer.start()
+            self.round_timer = self.timers.call_later(self.ROUND_SECONDS, self.end_round)
             
-            return {
+            round_data = {
                 'round_number': self.round_number,
                 'wahlspruch': self.current_wahlspruch.spruch,
-                'wahlspruch_id': self.current_wahlspruch.id
+                'wahlspruch_id': self.current_wahlspruch.id,
+                'partei_version': PARTIES.version,
+                'sent_at': time.time()  # Wanduhr des Servers, für Zustell-Latenzmessungen (LoadGenerator)
             }
+        
+        self.emit('player_delta', delta)
+        return round_data
     
-    def submit_answer(self, session_token: str, partei: str) -> tuple[bool, str]:
+    def submit_answer(self, session_token: str, partei_id: int) -> tuple[bool, str]:
         """
-        Registriert eine Antwort
+        Registriert eine Antwort (partei_id aus PARTIES)
         Returns: (success, message)
         """
-        with self.lock:
+        if not PARTIES.is_valid(partei_id):
+            return False, "Unbekannte Partei"
+        
+        with self._locked('submit_answer'):
             if not self.round_active:
                 return False, "Keine aktive Runde"
             
@@ -143,110 +530,665 @@ class GameLobby:
             if player['answered']:
                 return False, "Du hast bereits geantwortet"
             
-            self.current_answers[session_token] = partei
+            self.current_answers[session_token] = partei_id
             player['answered'] = True
+            ANSWER_LATENCY.observe(time.monotonic() - self.round_started_at)
+            delta = self._next_delta([{'op': 'update', 'user_id': player['user_id'], 'answered': True}])
             
-            # Prüfe ob alle Spieler die antworten können, geantwortet haben
-            players_who_can_answer = [p for p in self.players.values() if p['can_answer']]
+            # Prüfe ob alle Spieler die antworten können, geantwortet haben (geparkte zählen nicht)
+            players_who_can_answer = [p for p in self.players.values() if p['can_answer'] and p['sid'] is not None]
             all_answered = all(p['answered'] for p in players_who_can_answer)
             
             if all_answered and len(players_who_can_answer) > 0:
                 if self.round_timer:
                     self.round_timer.cancel()
-                threading.Thread(target=self.end_round).start()
-            
-            return True, "Antwort registriert"
+                self.round_timer = self.timers.call_soon(self.end_round)
+        
+        self.emit('player_delta', delta)
+        return True, "Antwort registriert"
     
     def end_round(self):
-        """Beendet die Runde und verteilt Punkte"""
-        with self.lock:
+        """
+        Beendet die Runde und verteilt Punkte. Ablauf in Stufen, damit der Lobby-Lock
+        nur für Kopien gehalten wird:
+        1. _snapshot_round: Antworten und Spielerstand kopieren (unter dem Lock, O(N), kein I/O)
+        2. _score_round: Auswertung ohne Lock
+        3. _apply_scores: neue Punktestände zurückschreiben (unter dem Lock, nur richtige Antworten)
+        4. _persist_points / _publish_round_end: DB-Schreiben im Hintergrund, Broadcast
+        """
+        snapshot = self._snapshot_round()
+        if snapshot is None:
+            return
+        
+        outcome = self._score_round(snapshot, self.TOP_SCORERS)
+        outcome['player_delta'] = self._apply_scores(outcome['point_updates'])
+        self._persist_points(outcome['point_updates'])
+        self._publish_round_end(outcome)
+    
+    def _snapshot_round(self) -> Optional[dict]:
+        """
+        Beendet die laufende Runde und kopiert alles, was zur Auswertung nötig ist.
+        
+        Returns:
+            Dict mit round_number, correct_partei (partei_id), quelle und players
+            [(session_token, user_id, sid, points, can_answer, antwort)] oder None, wenn keine Runde aktiv war
+        """
+        with self._locked('end_round_snapshot'):
             if not self.round_active:
-                return
+                return None
             
             self.round_active = False
             
             if not self.current_wahlspruch:
-                return
+                return None
             
-            correct_partei = self.current_wahlspruch.partei
-            results = []
+            ROUNDS_ENDED.inc()
+            ROUND_DURATION.observe(time.monotonic() - self.round_started_at)
             
-            # Berechne Ergebnisse und update Punkte
-            for session_token, player in self.players.items():
-                answered_partei = self.current_answers.get(session_token, None)
-                
-                # Nur bewerten wenn Spieler antworten konnte
-                if player['can_answer']:
-                    is_correct = answered_partei == correct_partei if answered_partei else False
-                    points_earned = 1 if is_correct else 0
-                    
-                    if is_correct:
-                        # Update Punkte in DB
-                        new_points = player['points'] + points_earned
-                        DatabaseService.update_user_points(self.db_env, player['user_id'], new_points)
-                        player['points'] = new_points
-                else:
-                    is_correct = None  # Konnte nicht antworten
-                    points_earned = 0
+            answers = self.current_answers
+            return {
+                'round_number': self.round_number,
+                'correct_partei': self.current_wahlspruch.partei_id,
+                'quelle': self.current_quelle,
+                'players': [
+                    (token, p['user_id'], p['nickname'], p['sid'], p['points'], p['can_answer'], answers.get(token))
+                    for token, p in self.players.items()
+                ]
+            }
+    
+    @staticmethod
+    def _score_round(snapshot: dict, top_scorers: int = 5) -> dict:
+        """
+        Wertet eine Runde anhand ihres Snapshots aus (ohne Lock, ohne I/O).
+        
+        Returns:
+            Dict mit summary (für alle gleich), results [(sid, eigenes Ergebnis)] und
+            point_updates [(session_token, user_id, neue_punkte)]
+        """
+        correct_partei = snapshot['correct_partei']
+        round_number = snapshot['round_number']
+        results = []
+        point_updates = []
+        distribution = [0] * len(PARTIES)  # Antworten je partei_id
+        totals = []
+        
+        for session_token, user_id, nickname, sid, points, can_answer, answered_partei in snapshot['players']:
+            # Nur bewerten wenn Spieler antworten konnte
+            if can_answer:
+                answered = answered_partei is not None
+                is_correct = answered_partei == correct_partei
+                points_earned = 1 if is_correct else 0
                 
-                results.append({
-                    'nickname': player['nickname'],
-                    'answered': answered_partei,
-                    'correct': is_correct,
-                    'points_earned': points_earned,
-                    'total_points': player['points'],
-                    'could_answer': player['can_answer']
-                })
-        
-        # Sende Ergebnisse an alle Clients (außerhalb des Locks)
-        socketio.emit('round_end', {
-            'correct_partei': correct_partei,
+                if is_correct:
+                    points += points_earned
+                    point_updates.append((session_token, user_id, points))
+                if answered:
+                    distribution[answered_partei] += 1
+                ANSWERS.labels("correct" if is_correct else ("incorrect" if answered else "none")).inc()
+            else:
+                is_correct = None  # Konnte nicht antworten
+                points_earned = 0
+            
+            totals.append((points, nickname))
+            
+            # Eigenes Ergebnis geht nur an die Verbindung des Spielers
+            results.append((sid, {
+                'round_number': round_number,
+                'answered': answered_partei,
+                'correct': is_correct,
+                'points_earned': points_earned,
+                'total_points': points,
+                'could_answer': can_answer
+            }))
+        
+        summary = {
+            'round_number': round_number,
+            'correct_partei_id': correct_partei,
+            'partei_version': PARTIES.version,
+            'quelle': snapshot['quelle'],
+            'distribution': [[partei_id, count] for partei_id, count in enumerate(distribution) if count],
+            'answer_count': sum(distribution),
+            'correct_count': len(point_updates),
+            'player_count': len(snapshot['players']),
+            'top_scorers': [
+                {'nickname': nickname, 'points': points}
+                for points, nickname in heapq.nlargest(top_scorers, totals, key=lambda entry: entry[0])
+            ]
+        }
+        
+        return {
+            'summary': summary,
             'results': results,
-            'quelle': self.current_quelle
-        })
+            'point_updates': point_updates
+        }
+    
+    def _apply_scores(self, point_updates: List[tuple]) -> dict:
+        """Übernimmt die neuen Punktestände in die Lobby und erzeugt das passende player_delta"""
+        with self._locked('apply_scores'):
+            changes = []
+            for session_token, user_id, new_points in point_updates:
+                player = self.players.get(session_token)
+                if player:  # Spieler kann die Lobby inzwischen verlassen haben
+                    player['points'] = new_points
+                    changes.append({'op': 'update', 'user_id': user_id, 'points': new_points})
+            return self._next_delta(changes)
+    
+    def _persist_points(self, point_updates: List[tuple]):
+        """Übergibt die neuen Punktestände an den PointsWriter (ohne Writer: synchron in die DB)"""
+        updates = [(user_id, new_points) for _, user_id, new_points in point_updates]
+        if self.points_writer:
+            self.points_writer.submit(updates)
+            return
+        for user_id, new_points in updates:
+            DatabaseService.update_user_points(self.db_env, user_id, new_points)
+    
+    def _publish_round_end(self, outcome: dict):
+        """
+        Sendet die Rundenauswertung: eine gemeinsame Zusammenfassung an den Raum (einmal serialisiert)
+        und das eigene Ergebnis als kleines round_result an jeden Spieler. Danach wird die nächste Runde eingeplant.
+        """
+        self.emit('player_delta', outcome['player_delta'])
+        outcome['summary']['sent_at'] = time.time()
+        self.emit('round_end', outcome['summary'])
+        for sid, result in outcome['results']:
+            if sid is not None:  # Geparkte Spieler erhalten ihren Stand mit resume_success
+                self.emit_to(sid, 'round_result', result)
         
-        # Starte nach 5 Sekunden neue Runde
-        threading.Timer(5.0, self._auto_start_next_round).start()
+        # Starte nach der Pause eine neue Runde, den Wahlspruch dafür schon jetzt laden
+        self.next_round_at = time.monotonic() + self.PAUSE_SECONDS
+        self.next_round_timer = self.timers.call_later(self.PAUSE_SECONDS, self._auto_start_next_round)
+        self.timers.call_soon(self._prefetch_next_round, outcome['summary']['round_number'])
     
     def _auto_start_next_round(self):
         """Startet automatisch die nächste Runde"""
         if len(self.players) > 0:  # Nur wenn noch Spieler in der Lobby sind
             round_data = self.start_new_round()
             if round_data:
-                socketio.emit('new_round', round_data)
+                self.emit('new_round', round_data)
     
     def get_current_quelle(self, session_token: str) -> Optional[str]:
         """Gibt die Quelle zurück wenn Spieler geantwortet hat"""
-        with self.lock:
+        with self._locked('get_current_quelle'):
             if session_token in self.players and self.players[session_token]['answered']:
                 return self.current_quelle
             return None
+    
+    # ==================== WARMSTART-SNAPSHOT ====================
+    
+    @staticmethod
+    def _wahlspruch_state(wahlspruch) -> Optional[dict]:
+        if wahlspruch is None:
+            return None
+        return {'id': wahlspruch.id, 'spruch': wahlspruch.spruch, 'partei': wahlspruch.partei, 'quelle': wahlspruch.quelle}
+    
+    @staticmethod
+    def _restore_wahlspruch(state: Optional[dict]):
+        # IDs gelten nur für den laufenden Prozess: im Snapshot steht der Name
+        if state is None:
+            return None
+        return SimpleNamespace(**state, partei_id=PARTIES.intern(state['partei']))
+    
+    def export_state(self) -> dict:
+        """Kopie des Lobby-Zustands für den Snapshot, Timer als Restlaufzeit in Sekunden"""
+        with self._locked('export_state'):
+            now = time.monotonic()
+            round_remaining = None
+            if self.round_active:
+                round_remaining = max(0.0, self.round_started_at + self.ROUND_SECONDS - now)
+            next_round_remaining = None
+            if not self.round_active and self.next_round_at is not None:
+                next_round_remaining = max(0.0, self.next_round_at - now)
+            
+            return {
+                'room_code': self.room_code,
+                'players': {token: dict(player, sid=None) for token, player in self.players.items()},
+                'current_answers': {token: PARTIES.name_of(partei_id) for token, partei_id in self.current_answers.items()},
+                'round_active': self.round_active,
+                'round_number': self.round_number,
+                'round_remaining': round_remaining,
+                'next_round_remaining': next_round_remaining,
+                'wahlspruch': self._wahlspruch_state(self.current_wahlspruch),
+                'prepared_wahlspruch': self._wahlspruch_state(self.prepared_wahlspruch),
+                'player_version': self.player_version,
+                'stream_seq': self.stream_seq
+            }
+    
+    def restore_state(self, state: dict, elapsed: float) -> List[str]:
+        """
+        Übernimmt einen mit export_state gesicherten Zustand und plant die Timer mit der Restlaufzeit
+        abzüglich `elapsed` neu ein. Verbindungen überleben keinen Neustart: alle Spieler warten
+        geparkt auf resume_session (ohne Reconnect-Frist werden keine Spieler übernommen).
+        
+        Returns:
+            Session-Tokens der geparkten Spieler
+        """
+        with self._stream_lock:
+            self.stream_seq = state['stream_seq']  # Ältere Frames gibt es nicht mehr: Replay liefert den Zustand
+            self.replay_buffer.clear()
+        
+        with self._locked('restore_state'):
+            if self.closed:
+                return []
+            
+            players = state['players'] if self.RECONNECT_GRACE_SECONDS > 0 else {}
+            self.players = {token: dict(player, sid=None) for token, player in players.items()}
+            self.sid_to_token = {}
+            self.current_answers = {token: PARTIES.intern(partei) for token, partei in state['current_answers'].items()
+                                    if token in self.players}
+            self.round_number = state['round_number']
+            self.round_active = state['round_active'] and state['wahlspruch'] is not None
+            self.current_wahlspruch = self._restore_wahlspruch(state['wahlspruch'])
+            self.current_quelle = self.current_wahlspruch.quelle if self.current_wahlspruch else None
+            self.prepared_wahlspruch = self._restore_wahlspruch(state['prepared_wahlspruch'])
+            self.player_version = state['player_version']
+            
+            now = time.monotonic()
+            if self.round_active:
+                remaining = max(0.0, state['round_remaining'] - elapsed)
+                self.round_started_at = now - (self.ROUND_SECONDS - remaining)
+                self.round_timer = self.timers.call_later(remaining, self.end_round)
+            elif self.players and state['next_round_remaining'] is not None:
+                remaining = max(0.0, state['next_round_remaining'] - elapsed)
+                self.next_round_at = now + remaining
+                self.next_round_timer = self.timers.call_later(remaining, self._auto_start_next_round)
+            
+            for token in self.players:
+                self.parked[token] = self.timers.call_later(self.RECONNECT_GRACE_SECONDS, self._expire_parked, token)
+            return list(self.players)
+    
+    def set_player_points(self, session_token: str, points: int):
+        """Korrigiert den Punktestand eines Spielers (Abgleich mit der Datenbank nach einem Warmstart)"""
+        with self._locked('set_player_points'):
+            player = self.players.get(session_token)
+            if player is None or player['points'] == points:
+                return
+            player['points'] = points
+            delta = self._next_delta([{'op': 'update', 'user_id': player['user_id'], 'points': points}])
+        
+        self.emit('player_delta', delta)
 
 
 class GameService:
-    """Verwaltet die zentrale Spiel-Lobby"""
+    """Verwaltet alle Spiel-Lobbys (Räume) des Servers"""
     
-    def __init__(self, db_env, host: str = "0.0.0.0", port: int = 5000):
-        self.db_env = db_env
+    def __init__(self, db_env, host: str = "0.0.0.0", port: int = 5000, network_service=None,
+                 use_postgres: bool = False, lobby_factory: Optional[Callable[[str], GameLobby]] = None):
+        """
+        Args:
+            db_env: SillyORM Environment. None = eine Environment pro Thread (siehe `db_env`)
+            network_service: Optionaler NetworkService. Wenn gesetzt, werden dessen RPC-Methoden
+                auf demselben Port ausgeliefert (Single-Port Gateway) und Session-Tokens über
+                dessen Session-Registry aufgelöst.
+            use_postgres: Datenbank für die Environments pro Thread
+            lobby_factory: Erzeugt die Lobby zu einem Raum-Code (Standard: GameLobby)
+        """
+        self._db_env = db_env
+        self.use_postgres = use_postgres
         self.host = host
         self.port = port
-        self.lobby = GameLobby(db_env)
+        self.points_writer = PointsWriter(lambda: self.db_env)
+        self.lobby_factory = lobby_factory or (lambda room_code: GameLobby(self._db_env, room_code, points_writer=self.points_writer,
+                                                                           use_postgres=self.use_postgres))
+        self.lobbies: Dict[str, GameLobby] = {DEFAULT_ROOM: self._new_lobby(DEFAULT_ROOM)}  # room_code -> Lobby
+        self.lobbies_lock = threading.Lock()
         self.session_to_sid: Dict[str, str] = {}  # session_token -> socket_id
+        self.sid_to_room: Dict[str, str] = {}  # socket_id -> room_code
+        self.parked_sessions: Dict[str, str] = {}  # session_token -> room_code geparkter Spieler (Reconnect-Frist)
+        self.network_service = network_service
+        self.env_pool = network_service.env_pool if network_service else None
+        self.snapshots: Optional[SnapshotManager] = None
+        
+        # Partei-IDs beim Start vergeben (alphabetisch: für die Parteien der Datenbank in allen Worker-Prozessen gleich)
+        PARTIES.load(self.db_env)
+        logging.info(f"🏛️ {len(PARTIES)} Parteien geladen (Tabelle {PARTIES.version})")
+        
+        LOBBY_PLAYERS.set_function(lambda: sum(len(lobby.players) for lobby in list(self.lobbies.values())))
+        LOBBIES_OPEN.set_function(lambda: len(self.lobbies))
+        
+        if network_service:
+            mount_rpc(app, network_service)
+    
+    @property
+    def db_env(self):
+        """Gemeinsame Environment oder (ohne feste Environment) die des aufrufenden Threads"""
+        if self._db_env is not None:
+            return self._db_env
+        return DatabaseService.get_thread_environment(use_postgres=self.use_postgres)
+    
+    def db_scope(self):
+        """
+        Scope für einen Socket.IO Handler: mit dem Environment-Pool des NetworkService (Gateway-Modus,
+        ein Thread pro Anfrage) leiht sich der Handler dessen Environments wie die RPC-Routen
+        """
+        return self.env_pool.scope() if self.env_pool else contextlib.nullcontext()
+    
+    @property
+    def lobby(self) -> GameLobby:
+        """Die öffentliche Standard-Lobby"""
+        return self.lobbies[DEFAULT_ROOM]
+    
+    def get_lobby(self, room_code: Optional[str]) -> Optional[GameLobby]:
+        """Gibt die Lobby zu einem Raum-Code zurück (ohne Code: öffentliche Lobby)"""
+        return self.lobbies.get(normalize_room_code(room_code))
+    
+    def get_lobby_for_sid(self, sid: str) -> Optional[GameLobby]:
+        """Gibt die Lobby zurück, in der sich die Socket-Verbindung gerade befindet"""
+        room_code = self.sid_to_room.get(sid)
+        return self.lobbies.get(room_code) if room_code else None
+    
+    def create_lobby(self, user_id: int) -> GameLobby:
+        """
+        Erstellt einen neuen Raum mit zufälligem Code und eigener Lobby.
+        Der Raum wird zusätzlich in der Datenbank angelegt.
+        
+        Raises:
+            RuntimeError: Wenn kein freier Raum-Code gefunden wurde
+        """
+        for _ in range(10):
+            room_code = self._new_room_code()
+            if room_code in self.lobbies:
+                continue
+            if not DatabaseService.create_new_room(self.db_env, room_code, user_id):
+                continue
+            
+            lobby = self._new_lobby(room_code)
+            with self.lobbies_lock:
+                self.lobbies[room_code] = lobby
+            logging.info(f"🚪 Raum {room_code} erstellt")
+            return lobby
+        
+        raise RuntimeError("Kein freier Raum-Code gefunden")
+    
+    def _new_lobby(self, room_code: str) -> GameLobby:
+        """Erzeugt die Lobby über die lobby_factory und verbindet sie mit dem Service"""
+        lobby = self.lobby_factory(room_code)
+        lobby.on_parked_expired = self._expire_parked
+        return lobby
+    
+    def _new_room_code(self) -> str:
+        """Zufälliger Raum-Code (Unterklassen können die Auswahl einschränken)"""
+        return ''.join(secrets.choice(ROOM_CODE_ALPHABET) for _ in range(ROOM_CODE_LENGTH))
+    
+    def attach_player(self, lobby: GameLobby, sid: str, session_token: str, user) -> bool:
+        """
+        Fügt den User mit seiner Socket-Verbindung der Lobby hinzu und merkt sich die Zuordnung.
+        
+        Returns:
+            False wenn die Lobby inzwischen geschlossen wurde
+        """
+        if not lobby.add_player(session_token, user.id, user.nickname, sid, user.points):
+            return False
+        self.session_to_sid[session_token] = sid
+        self.sid_to_room[sid] = lobby.room_code
+        return True
+    
+    def detach_player(self, sid: str, session_token: str = None) -> tuple:
+        """
+        Entfernt die Socket-Verbindung (bzw. den Session-Token) aus ihrer aktuellen Lobby.
+        Bei Reconnect mit neuer Socket-Verbindung liegt der Spieler unter der alten SID.
+        
+        Returns:
+            (lobby, alte_sid, player_info) - lobby ist None, wenn die Verbindung in keiner Lobby war
+        """
+        old_sid = self.session_to_sid.get(session_token, sid) if session_token else sid
+        room_code = self.sid_to_room.pop(old_sid, None)
+        if room_code is None and session_token:
+            # Geparkter Spieler (Verbindung abgebrochen, Reconnect-Frist läuft)
+            room_code = self.parked_sessions.pop(session_token, None)
+        lobby = self.lobbies.get(room_code) if room_code else None
+        if not lobby:
+            return None, old_sid, None
+        
+        player_info = lobby.remove_player(session_token=session_token, sid=old_sid)
+        return lobby, old_sid, player_info
+    
+    def park_player(self, sid: str) -> Optional[dict]:
+        """
+        Parkt den Spieler einer getrennten Verbindung in seiner Lobby, bis er sich per
+        resume_player zurückmeldet oder die Reconnect-Frist abläuft.
+        
+        Returns:
+            Dict mit Spieler-Info oder None (nicht in einer Lobby oder Frist deaktiviert)
+        """
+        lobby = self.get_lobby_for_sid(sid)
+        parked = lobby.park_player(sid) if lobby else None
+        if not parked:
+            return None
+        
+        session_token, player_info = parked
+        self.sid_to_room.pop(sid, None)
+        if self.session_to_sid.get(session_token) == sid:
+            del self.session_to_sid[session_token]
+        self.parked_sessions[session_token] = lobby.room_code
+        return player_info
+    
+    def resume_player(self, sid: str, session_token: str, room_code: Optional[str] = None) -> tuple:
+        """
+        Übernimmt einen geparkten Spieler mit der neuen Socket-Verbindung (nur Dict-Zugriffe,
+        keine Datenbank und keine Broadcasts).
+        
+        Args:
+            room_code: Raum, in dem der Client zu sein glaubt (None = beliebig)
+        
+        Returns:
+            (lobby, state) - (None, None) wenn zum Token kein geparkter Spieler existiert
+        """
+        parked_room = self.parked_sessions.get(session_token)
+        if parked_room is None or (room_code is not None and parked_room != room_code) or sid in self.sid_to_room:
+            return None, None
+        
+        del self.parked_sessions[session_token]
+        lobby = self.lobbies.get(parked_room)
+        state = lobby.resume_player(session_token, sid) if lobby else None
+        if state is None:
+            return None, None
+        
+        self.session_to_sid[session_token] = sid
+        self.sid_to_room[sid] = lobby.room_code
+        return lobby, state
+    
+    def _expire_parked(self, lobby: GameLobby, session_token: str, player_info: dict):
+        """Reconnect-Frist abgelaufen: wie ein Disconnect ohne Frist (player_left, leeren Raum schließen)"""
+        if self.parked_sessions.get(session_token) == lobby.room_code:
+            del self.parked_sessions[session_token]
+        
+        lobby.emit('player_left', {
+            'nickname': player_info['nickname'],
+            'reason': 'disconnect'
+        })
+        logging.info(f"👋 {player_info['nickname']} wurde nach Ablauf der Reconnect-Frist aus der Lobby entfernt")
+        self.close_lobby_if_empty(lobby)
+    
+    def get_leaderboard(self, limit: int = 10) -> List[dict]:
+        """Top-Spieler mit Rang für das leaderboard_update Event"""
+        top_users = DatabaseService.get_top_users(self.db_env, limit=limit)
+        return [
+            {
+                'rank': i,
+                'nickname': user.nickname,
+                'points': user.points
+            }
+            for i, user in enumerate(top_users, 1)
+        ]
+    
+    def close_lobby_if_empty(self, lobby: GameLobby):
+        """Schließt einen privaten Raum, sobald der letzte Spieler gegangen ist"""
+        if self._unregister_if_empty(lobby):
+            self._close_room_record(lobby.room_code)
+    
+    def _unregister_if_empty(self, lobby: GameLobby) -> bool:
+        """Entfernt einen leeren privaten Raum aus dem Speicher und stoppt seine Timer (ohne DB-Zugriff)"""
+        if lobby.room_code == DEFAULT_ROOM:
+            return False
+        
+        with self.lobbies_lock:
+            with lobby.lock:
+                if lobby.players or lobby.closed:
+                    return False
+                lobby.closed = True
+            self.lobbies.pop(lobby.room_code, None)
+        
+        lobby.close()
+        logging.info(f"🚪 Raum {lobby.room_code} geschlossen (leer)")
+        return True
+    
+    def _close_room_record(self, room_code: str):
+        """Setzt room_closed_at des Raums in der Datenbank"""
+        room = DatabaseService.get_room_by_code(self.db_env, room_code)
+        if room:
+            DatabaseService.close_room(self.db_env, room[0].id)
+    
+    def get_session_user(self, session_token: str):
+        """
+        Löst einen Session-Token zu einem User auf.
+        Im Gateway-Modus über die gemeinsame Session-Registry des NetworkService: sie kennt pro
+        Benutzer nur den Token des letzten Logins (wie die Datenbank). Geladen wird danach nur
+        noch der User-Record per ID für Nickname und aktuelle Punkte.
+        
+        Returns:
+            User-Record oder None
+        """
+        if self.network_service:
+            user_id = self.network_service._validate_session(session_token)
+            if not user_id:
+                return None
+            user = DatabaseService.get_user_by_id(self.db_env, user_id)
+        else:
+            user = DatabaseService.get_user_by_session_token(self.db_env, session_token)
+        
+        return user[0] if user else None
+    
+    # ==================== WARMSTART-SNAPSHOT ====================
+    
+    def enable_snapshots(self, snapshots: SnapshotManager):
+        """Sichert die Lobbys im Snapshot (beim Beenden, periodisch) und lädt sie beim Start"""
+        self.snapshots = snapshots
+        snapshots.register('lobbies', self.capture_lobbies, self.restore_lobbies, self.verify_lobbies)
+    
+    def capture_lobbies(self) -> List[dict]:
+        return [lobby.export_state() for lobby in list(self.lobbies.values())]
+    
+    def restore_lobbies(self, states: List[dict], elapsed: float):
+        """Stellt die Lobbys aus dem Snapshot wieder her, ihre Spieler warten geparkt auf den Reconnect"""
+        players = 0
+        for state in states:
+            room_code = state['room_code']
+            lobby = self.lobbies.get(room_code)
+            if lobby is None:
+                if not state['players']:
+                    continue
+                lobby = self._new_lobby(room_code)
+                with self.lobbies_lock:
+                    self.lobbies[room_code] = lobby
+            
+            for session_token in lobby.restore_state(state, elapsed):
+                self.parked_sessions[session_token] = room_code
+                players += 1
+        logging.info(f"♻️ {len(states)} Lobbys mit {players} Spielern aus dem Snapshot übernommen")
+    
+    def verify_lobbies(self, states: List[dict]):
+        """
+        Gleicht die übernommenen Lobbys im Hintergrund mit der Datenbank ab (die Datenbank gewinnt):
+        Punktestände korrigieren, gelöschte User entfernen, inzwischen geschlossene Räume schließen.
+        """
+        fixes = {'points': [], 'remove': [], 'close': []}
+        for state in states:
+            room_code = state['room_code']
+            if room_code != DEFAULT_ROOM:
+                room = DatabaseService.get_room_by_code(self.db_env, room_code)
+                if not room or room[0].room_closed_at is not None:
+                    fixes['close'].append(room_code)
+                    continue
+            
+            for session_token, player in state['players'].items():
+                user = DatabaseService.get_user_by_id(self.db_env, player['user_id'])
+                if not user:
+                    fixes['remove'].append((room_code, session_token))
+                elif user[0].points != player['points']:
+                    fixes['points'].append((room_code, session_token, user[0].points))
+        
+        self._apply_snapshot_fixes(fixes)
+    
+    def _apply_snapshot_fixes(self, fixes: dict):
+        """Wendet die Ergebnisse von verify_lobbies an"""
+        for room_code, session_token, points in fixes['points']:
+            lobby = self.lobbies.get(room_code)
+            if lobby:
+                lobby.set_player_points(session_token, points)
+        
+        for room_code, session_token in fixes['remove']:
+            lobby = self.lobbies.get(room_code)
+            if lobby:
+                lobby.remove_player(session_token=session_token)
+            if self.parked_sessions.get(session_token) == room_code:
+                del self.parked_sessions[session_token]
+        
+        for room_code in fixes['close']:
+            lobby = self.lobbies.get(room_code)
+            if not lobby:
+                continue
+            for session_token in list(lobby.players):
+                lobby.remove_player(session_token=session_token)
+                if self.parked_sessions.get(session_token) == room_code:
+                    del self.parked_sessions[session_token]
+            self._unregister_if_empty(lobby)
+        
+        if any(fixes.values()):
+            logging.info(f"♻️ Snapshot-Abgleich: {len(fixes['points'])} Punktestände korrigiert, "
+                         f"{len(fixes['remove'])} Spieler entfernt, {len(fixes['close'])} Räume geschlossen")
     
     def start(self):
         """Startet den GameService Server"""
         logging.info(f"🎮 GameService läuft auf {self.host}:{self.port}")
-        socketio.run(app, host=self.host, port=self.port, debug=False, allow_unsafe_werkzeug=True)
+        if self.snapshots:
+            self.snapshots.restore()
+            self.snapshots.start_periodic(scheduler)
+        try:
+            socketio.run(app, host=self.host, port=self.port, debug=False, allow_unsafe_werkzeug=True)
+        finally:
+            if self.snapshots:
+                self.snapshots.stop()
+                self.snapshots.save('shutdown')
+            self.points_writer.stop()
 
 
 # Globale GameService Instanz
 game_service: Optional[GameService] = None
 
 
-def init_game_service(db_env):
-    """Initialisiert den GameService"""
+def init_game_service(db_env, network_service=None):
+    """
+    Initialisiert den GameService (optional mit NetworkService für den Single-Port Gateway-Modus).
+    db_env None = Environments pro Thread bzw. aus dem Pool des NetworkService
+    """
     global game_service
-    game_service = GameService(db_env)
+    game_service = GameService(db_env, network_service=network_service,
+                               use_postgres=network_service.use_postgres if network_service else False)
+
+
+def _leave_current_lobby(sid: str, reason: str, session_token: str = None) -> Optional[dict]:
+    """
+    Entfernt die Socket-Verbindung (bzw. den Session-Token) aus ihrer aktuellen Lobby,
+    benachrichtigt die restlichen Spieler des Raums und schließt leere private Räume.
+    
+    Returns:
+        Dict mit Spieler-Info falls gefunden, sonst None
+    """
+    lobby, old_sid, player_info = game_service.detach_player(sid, session_token)
+    if not lobby:
+        return None
+    
+    leave_room(lobby.room_code, sid=old_sid, namespace='/')
+    
+    if player_info:
+        # Benachrichtige andere Spieler im Raum (die Spielerliste folgt per player_delta)
+        lobby.emit('player_left', {
+            'nickname': player_info['nickname'],
+            'reason': reason
+        })
+    
+    game_service.close_lobby_if_empty(lobby)
+    return player_info
 
 
 # ==================== SOCKETIO EVENT HANDLERS ====================
@@ -255,6 +1197,7 @@ def init_game_service(db_env):
 def handle_connect():
     """Client verbindet sich"""
     logging.info(f"🔌 Client verbunden: {request.sid}")
+    SOCKET_CONNECTIONS.inc()
     emit('connected', {'message': 'Verbindung erfolgreich'})
 
 
@@ -262,32 +1205,56 @@ def handle_connect():
 def handle_disconnect():
     """Client trennt Verbindung - automatische Erkennung"""
     logging.info(f"🔌 Client getrennt: {request.sid}")
+    SOCKET_CONNECTIONS.dec()
     
     if not game_service:
         return
     
+    with game_service.db_scope():
+        _disconnect_player(request.sid)
+
+
+def _disconnect_player(sid: str):
+    """Parkt bzw. entfernt den Spieler einer getrennten Verbindung"""
+    # Spieler zunächst parken: bei einem Reconnect innerhalb der Frist ohne erneuten Beitritt weiterspielen
+    player_info = game_service.park_player(sid)
+    if player_info:
+        logging.info(f"⏸️ {player_info['nickname']} getrennt, wartet {GameLobby.RECONNECT_GRACE_SECONDS:g}s auf Reconnect")
+        return
+    
     # Finde und entferne Spieler anhand der Socket-ID
-    player_info = game_service.lobby.remove_player(sid=request.sid)
+    player_info = _leave_current_lobby(sid, 'disconnect')
     
     if player_info:
-        nickname = player_info['nickname']
+        logging.info(f"👋 {player_info['nickname']} wurde automatisch aus der Lobby entfernt (Disconnect)")
+
+
+@socketio.on('create_room')
+@track_event('create_room')
+def handle_create_room(data):
+    """Spieler erstellt einen privaten Raum (Beitritt erfolgt danach per join_game mit Raum-Code)"""
+    try:
+        if not game_service:
+            emit('error', {'message': 'GameService nicht initialisiert'})
+            return
         
-        # Benachrichtige andere Spieler über Disconnect
-        emit('player_left', {
-            'nickname': nickname,
-            'reason': 'disconnect'
-        }, broadcast=True)
+        user = game_service.get_session_user(data.get('token'))
+        if not user:
+            emit('error', {'message': 'Ungültige Session'})
+            return
         
-        # Update Spielerliste
-        player_list = game_service.lobby.get_player_list()
-        emit('player_list_update', {'players': player_list}, broadcast=True)
+        lobby = game_service.create_lobby(user.id)
+        emit('room_created', {'room_code': lobby.room_code})
         
-        logging.info(f"👋 {nickname} wurde automatisch aus der Lobby entfernt (Disconnect)")
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei create_room: {e}")
+        emit('error', {'message': str(e)})
 
 
 @socketio.on('join_game')
+@track_event('join_game')
 def handle_join_game(data):
-    """Spieler tritt dem Spiel bei"""
+    """Spieler tritt dem Spiel bei (optional mit Raum-Code, sonst öffentliche Lobby)"""
     try:
         session_token = data.get('token')
         
@@ -295,62 +1262,98 @@ def handle_join_game(data):
             emit('error', {'message': 'GameService nicht initialisiert'})
             return
         
-        # Validiere Session Token über DatabaseService
-        user = DatabaseService.get_user_by_session_token(game_service.db_env, session_token)
+        # Validiere Session Token
+        user = game_service.get_session_user(session_token)
         
         if not user:
             emit('error', {'message': 'Ungültige Session'})
             return
         
-        user = user[0]
+        lobby = game_service.get_lobby(data.get('room'))
+        if not lobby:
+            emit('error', {'message': 'Raum nicht gefunden'})
+            return
         
-        # Entferne Spieler falls schon in Lobby (reconnect)
-        game_service.lobby.remove_player(session_token)
+        # Entferne Spieler falls schon in einer Lobby (reconnect oder Raumwechsel)
+        _leave_current_lobby(request.sid, 'request', session_token)
         
         # Füge zur Lobby hinzu
-        game_service.lobby.add_player(session_token, user.id, user.nickname, request.sid, user.points)
-        game_service.session_to_sid[session_token] = request.sid
+        if not game_service.attach_player(lobby, request.sid, session_token, user):
+            emit('error', {'message': 'Raum wurde geschlossen'})
+            return
+        join_room(lobby.room_code)
         
-        # Sende aktuelle Spielerliste an alle
-        player_list = game_service.lobby.get_player_list()
-        emit('player_list_update', {'players': player_list}, broadcast=True)
+        # Die anderen Spieler im Raum erhalten den Beitritt als player_delta,
+        # der neue Spieler die vollständige Liste samt Version
+        snapshot = lobby.get_player_snapshot()
         
-        # Benachrichtige andere über neuen Spieler
-        emit('player_joined', {
+        # Benachrichtige andere über neuen Spieler (gebündelt, der Client ignoriert sich selbst)
+        lobby.emit('player_joined', {
             'nickname': user.nickname,
             'points': user.points
-        }, broadcast=True, include_self=False)
+        })
         
         # Sende Success an Spieler mit aktueller Rundeinfo
         emit('join_success', {
-            'players': player_list,
+            'players': snapshot['players'],
+            'player_version': snapshot['version'],
             'your_nickname': user.nickname,
-            'round_active': game_service.lobby.round_active,
-            'round_number': game_service.lobby.round_number
+            'room_code': lobby.room_code,
+            'round_active': lobby.round_active,
+            'round_number': lobby.round_number,
+            'parteien': PARTIES.table()
         })
         
         # Wenn aktive Runde läuft, sende aktuellen Wahlspruch
-        if game_service.lobby.round_active and game_service.lobby.current_wahlspruch:
+        if lobby.round_active and lobby.current_wahlspruch:
             emit('new_round', {
-                'round_number': game_service.lobby.round_number,
-                'wahlspruch': game_service.lobby.current_wahlspruch.spruch,
-                'wahlspruch_id': game_service.lobby.current_wahlspruch.id
+                'round_number': lobby.round_number,
+                'wahlspruch': lobby.current_wahlspruch.spruch,
+                'wahlspruch_id': lobby.current_wahlspruch.id,
+                'partei_version': PARTIES.version
             })
         
         # Starte erste Runde wenn erster Spieler
-        if len(game_service.lobby.players) == 1 and not game_service.lobby.round_active:
-            round_data = game_service.lobby.start_new_round()
+        if len(lobby.players) == 1 and not lobby.round_active:
+            round_data = lobby.start_new_round()
             if round_data:
-                socketio.emit('new_round', round_data)
+                lobby.emit('new_round', round_data)
         
-        logging.info(f"✅ {user.nickname} ist der Lobby beigetreten")
+        logging.info(f"✅ {user.nickname} ist der Lobby {lobby.room_code} beigetreten")
         
     except Exception as e:
         logging.exception(f"❌ Fehler bei join_game: {e}")
         emit('error', {'message': str(e)})
 
 
+@socketio.on('resume_session')
+@track_event('resume_session')
+def handle_resume_session(data):
+    """
+    Client hat sich nach einem Verbindungsabbruch neu verbunden: Der geparkte Spieler wird ohne
+    erneuten Beitritt übernommen. Bei resume_failed tritt der Client per join_game neu bei.
+    """
+    try:
+        if not game_service:
+            emit('error', {'message': 'GameService nicht initialisiert'})
+            return
+        
+        lobby, state = game_service.resume_player(request.sid, data.get('token'), normalize_room_code(data.get('room')))
+        if not lobby:
+            emit('resume_failed', {'message': 'Keine wartende Sitzung'})
+            return
+        
+        join_room(lobby.room_code)
+        emit('resume_success', state)
+        logging.info(f"🔁 {state['your_nickname']} ist wieder mit der Lobby {lobby.room_code} verbunden")
+        
+    except Exception as e:
+        logging.exception(f"❌ Fehler bei resume_session: {e}")
+        emit('error', {'message': str(e)})
+
+
 @socketio.on('leave_game')
+@track_event('leave_game')
 def handle_leave_game(data):
     """Spieler verlässt das Spiel bewusst"""
     try:
@@ -360,7 +1363,7 @@ def handle_leave_game(data):
         if not game_service:
             return
         
-        player_info = game_service.lobby.remove_player(session_token)
+        player_info = _leave_current_lobby(request.sid, reason, session_token)
         
         if player_info:
             nickname = player_info['nickname']
@@ -368,16 +1371,6 @@ def handle_leave_game(data):
             if session_token in game_service.session_to_sid:
                 del game_service.session_to_sid[session_token]
             
-            # Benachrichtige andere
-            emit('player_left', {
-                'nickname': nickname,
-                'reason': reason
-            }, broadcast=True)
-            
-            # Update Spielerliste
-            player_list = game_service.lobby.get_player_list()
-            emit('player_list_update', {'players': player_list}, broadcast=True)
-            
             if reason == 'crash':
                 logging.warning(f"👋 {nickname} hat die Lobby verlassen (Crash)")
             else:
@@ -388,35 +1381,37 @@ def handle_leave_game(data):
 
 
 @socketio.on('submit_answer')
+@track_event('submit_answer')
 def handle_submit_answer(data):
     """Spieler gibt Antwort ab"""
     try:
         session_token = data.get('token')
-        partei = data.get('partei')
+        partei_id = data.get('partei_id')
         
         if not game_service:
             emit('error', {'message': 'GameService nicht initialisiert'})
             return
         
+        lobby = game_service.get_lobby_for_sid(request.sid)
+        if not lobby:
+            emit('error', {'message': 'Nicht in der Lobby'})
+            return
+        
         # Registriere Antwort
-        success, message = game_service.lobby.submit_answer(session_token, partei)
+        success, message = lobby.submit_answer(session_token, partei_id)
         
         if success:
-            player = game_service.lobby.players[session_token]
+            player = lobby.players[session_token]
             
             # Bestätige Antwort an Spieler
-            emit('answer_accepted', {'partei': partei})
+            emit('answer_accepted', {'partei_id': partei_id})
             
-            # Benachrichtige andere Spieler
-            emit('player_answered', {
+            # Benachrichtige andere Spieler (gebündelt, der Client ignoriert sich selbst)
+            lobby.emit('player_answered', {
                 'nickname': player['nickname']
-            }, broadcast=True, include_self=False)
-            
-            # Update Spielerliste
-            player_list = game_service.lobby.get_player_list()
-            emit('player_list_update', {'players': player_list}, broadcast=True)
+            })
             
-            logging.info(f"✓ {player['nickname']} hat geantwortet: {partei}")
+            logging.info(f"✓ {player['nickname']} hat geantwortet: {PARTIES.name_of(partei_id)}")
         else:
             emit('error', {'message': message})
         
@@ -425,7 +1420,39 @@ def handle_submit_answer(data):
         emit('error', {'message': str(e)})
 
 
+@socketio.on('request_parteien')
+@track_event('request_parteien')
+def handle_request_parteien(data=None):
+    """Client fordert die Partei-Tabelle an (z.B. wenn new_round eine andere partei_version meldet)"""
+    emit('parteien_update', PARTIES.table())
+
+
+@socketio.on('request_player_list')
+@track_event('request_player_list')
+def handle_request_player_list(data=None):
+    """Client fordert die vollständige Spielerliste an (z.B. nach einer Lücke in den player_delta Versionen)"""
+    if not game_service:
+        return
+    
+    lobby = game_service.get_lobby_for_sid(request.sid)
+    if lobby:
+        emit('player_list_update', lobby.get_player_snapshot())
+
+
+@socketio.on('request_replay')
+@track_event('request_replay')
+def handle_request_replay(data):
+    """Client hat eine Lücke in den Sequenznummern (oder einen Reconnect): verpasste Raum-Frames nachsenden"""
+    if not game_service:
+        return
+    
+    lobby = game_service.get_lobby_for_sid(request.sid)
+    if lobby:
+        lobby.send_replay(request.sid, data.get('since'))
+
+
 @socketio.on('request_quelle')
+@track_event('request_quelle')
 def handle_request_quelle(data):
     """Spieler fordert Quelle an (nach eigener Antwort)"""
     try:
@@ -435,7 +1462,8 @@ def handle_request_quelle(data):
             emit('error', {'message': 'GameService nicht initialisiert'})
             return
         
-        quelle = game_service.lobby.get_current_quelle(session_token)
+        lobby = game_service.get_lobby_for_sid(request.sid)
+        quelle = lobby.get_current_quelle(session_token) if lobby else None
         
         if quelle is not None:
             emit('quelle_response', {'quelle': quelle})
@@ -448,6 +1476,7 @@ def handle_request_quelle(data):
 
 
 @socketio.on('request_leaderboard')
+@track_event('request_leaderboard')
 def handle_request_leaderboard():
     """Client fordert Leaderboard an"""
     try:
@@ -455,17 +1484,7 @@ def handle_request_leaderboard():
             emit('error', {'message': 'GameService nicht initialisiert'})
             return
         
-        top_users = DatabaseService.get_top_users(game_service.db_env, limit=10)
-        
-        leaderboard = []
-        for i, user in enumerate(top_users, 1):
-            leaderboard.append({
-                'rank': i,
-                'nickname': user.nickname,
-                'points': user.points
-            })
-        
-        emit('leaderboard_update', {'leaderboard': leaderboard})
+        emit('leaderboard_update', {'leaderboard': game_service.get_leaderboard(limit=10)})
         
     except Exception as e:
         logging.exception(f"❌ Fehler bei request_leaderboard: {e}")
@@ -0,0 +1,59 @@
+import contextlib
+from flask import Flask, Response, request
+from xmlrpc.server import SimpleXMLRPCDispatcher
+from RpcServer import request_context, dispatch_json_request, JSON_RPC_PATH, InstrumentedDispatchMixin
+import logging
+
+
+class InstrumentedDispatcher(InstrumentedDispatchMixin, SimpleXMLRPCDispatcher):
+    """SimpleXMLRPCDispatcher mit RPC-Metriken"""
+
+
+def mount_rpc(app: Flask, service) -> SimpleXMLRPCDispatcher:
+    """
+    Hängt die RPC-Schnittstelle des NetworkService als Routen an die Flask-App,
+    die auch Socket.IO ausliefert (Single-Port Gateway).
+
+    - POST /RPC2: XML-RPC (inkl. system.multicall)
+    - POST /JSON: kompakter JSON-Endpoint
+
+    Beide Routen nutzen dieselbe Methoden-Registry wie der eigenständige RPC-Server,
+    laufen aber im Worker-Modell des Game-Servers. Da Werkzeug jede Anfrage in einem neuen
+    Thread bearbeitet, kommen die Datenbank-Environments aus `service.env_pool` (sofern gesetzt).
+
+    Args:
+        app: Flask-App des GameServers
+        service: NetworkService Instanz (wird nicht selbst gestartet)
+
+    Returns:
+        Der verwendete Dispatcher
+    """
+    dispatcher = InstrumentedDispatcher(allow_none=True, encoding=None)
+    dispatcher.register_instance(service)
+    dispatcher.register_multicall_functions()
+
+    def db_scope():
+        return service.env_pool.scope() if service.env_pool else contextlib.nullcontext()
+
+    @app.route('/RPC2', methods=['POST'])
+    def xmlrpc_endpoint():
+        request_context.client_ip = request.remote_addr
+        try:
+            with db_scope():
+                body = dispatcher._marshaled_dispatch(request.get_data())
+        finally:
+            request_context.client_ip = None
+        return Response(body, content_type='text/xml')
+
+    @app.route(JSON_RPC_PATH, methods=['POST'])
+    def json_endpoint():
+        request_context.client_ip = request.remote_addr
+        try:
+            with db_scope():
+                body = dispatch_json_request(dispatcher._dispatch, request.get_data())
+        finally:
+            request_context.client_ip = None
+        return Response(body, content_type='application/json')
+
+    logging.info(f"🔗 RPC-Endpoints /RPC2 und {JSON_RPC_PATH} am GameServer registriert")
+    return dispatcher
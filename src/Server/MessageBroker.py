@@ -0,0 +1,209 @@
+"""
+Minimaler Publish/Subscribe-Broker über TCP (nur Standardbibliothek).
+
+Ersatz für Redis, wenn der Game-Server lokal oder in Tests mit mehreren Worker-Prozessen
+läuft: jeder Frame, den ein Client sendet, wird an alle Verbindungen verteilt, die den Kanal
+abonniert haben (auch an den Absender - die Socket.IO Client-Manager filtern eigene Nachrichten
+selbst). Verbindungen ohne Abonnement (reine Sender) erhalten nichts.
+
+Frame-Format: 4 Byte Länge (big-endian) + Kanalname (UTF-8) + 0x00 + Nutzdaten
+Abonnieren: Frame auf dem Kanal SUBSCRIBE_CHANNEL mit dem Kanalnamen als Nutzdaten.
+
+Jeder Abonnent hat eine eigene Sende-Warteschlange: ein langsamer Abonnent bremst weder den
+Absender noch die anderen Abonnenten. Wächst seine Warteschlange über MAX_PENDING_BYTES, wird
+er getrennt (wie Redis bei überschrittenem Ausgabepuffer) und verbindet sich neu.
+
+Standalone:
+    python MessageBroker.py --host 127.0.0.1 --port 6380
+"""
+import argparse
+import asyncio
+import logging
+import struct
+import threading
+from typing import AsyncIterator, Optional, Set, Tuple
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+MAX_PENDING_BYTES = 64 * 1024 * 1024  # Sende-Warteschlange je Abonnent
+DEFAULT_BROKER_PORT = 6380
+SUBSCRIBE_CHANNEL = "\x01subscribe"
+
+
+def encode_frame(channel: str, body: bytes) -> bytes:
+    payload = channel.encode("utf-8") + b"\x00" + body
+    return HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Liest einen rohen Frame (Kanal + Nutzdaten). Wirft IncompleteReadError am Verbindungsende."""
+    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame zu groß: {length} Bytes")
+    return await reader.readexactly(length)
+
+
+def split_frame(payload: bytes) -> Tuple[str, bytes]:
+    channel, _, body = payload.partition(b"\x00")
+    return channel.decode("utf-8"), body
+
+
+class _Subscriber:
+    """Verbindung eines Clients mit ihren Abonnements und eigener Sende-Warteschlange"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.channels: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pending = 0  # Bytes in der Warteschlange
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str):
+        self.channels.add(channel)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def offer(self, frame: bytes) -> bool:
+        """Reiht einen Frame ein (ohne zu warten). False = Warteschlange voll"""
+        if self.pending + len(frame) > MAX_PENDING_BYTES:
+            return False
+        self.pending += len(frame)
+        self.queue.put_nowait(frame)
+        return True
+
+    async def _write_loop(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                self.pending -= len(frame)
+                self.writer.write(frame)
+                while not self.queue.empty():
+                    frame = self.queue.get_nowait()
+                    self.pending -= len(frame)
+                    self.writer.write(frame)
+                await self.writer.drain()
+        except ConnectionError:
+            self.writer.close()
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.writer.close()
+
+
+class MessageBroker:
+    """Verteilt jeden empfangenen Frame an die Abonnenten seines Kanals"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_BROKER_PORT):
+        self.host = host
+        self.port = port
+        self._clients: Set[_Subscriber] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.frames_forwarded = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Bei Port 0 den tatsächlich gewählten Port übernehmen
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"📮 MessageBroker läuft auf {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def run_in_thread(self) -> threading.Thread:
+        """Startet den Broker mit eigener Event-Loop in einem Daemon-Thread (wartet, bis er lauscht)"""
+        ready = threading.Event()
+
+        async def main():
+            await self.start()
+            ready.set()
+            await self.serve_forever()
+
+        thread = threading.Thread(target=asyncio.run, args=(main(),), name="MessageBroker", daemon=True)
+        thread.start()
+        ready.wait(5.0)
+        return thread
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Subscriber(writer)
+        self._clients.add(client)
+        try:
+            while True:
+                payload = await read_frame(reader)
+                channel, body = split_frame(payload)
+                if channel == SUBSCRIBE_CHANNEL:
+                    client.subscribe(body.decode("utf-8"))
+                    continue
+
+                frame = HEADER.pack(len(payload)) + payload
+                for subscriber in list(self._clients):
+                    if channel in subscriber.channels and not subscriber.offer(frame):
+                        logging.warning(f"⚠️ MessageBroker: Abonnent kommt nicht hinterher "
+                                        f"({subscriber.pending} Bytes ausstehend), trenne Verbindung")
+                        self._clients.discard(subscriber)
+                        subscriber.close()
+                self.frames_forwarded += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logging.warning(f"⚠️ MessageBroker: Client-Verbindung fehlerhaft: {e}")
+        finally:
+            self._clients.discard(client)
+            client.close()
+
+
+class BrokerConnection:
+    """Asynchroner Client für den MessageBroker"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def send(self, channel: str, body: bytes):
+        async with self._lock:
+            await self.connect()
+            self._writer.write(encode_frame(channel, body))
+            await self._writer.drain()
+
+    async def frames(self, channel: str) -> AsyncIterator[bytes]:
+        """Abonniert den Kanal und liefert die Nutzdaten seiner Frames (verbindet bei Abbruch neu)"""
+        while True:
+            try:
+                await self.connect()
+                self._writer.write(encode_frame(SUBSCRIBE_CHANNEL, channel.encode("utf-8")))
+                await self._writer.drain()
+                while True:
+                    frame_channel, body = split_frame(await read_frame(self._reader))
+                    if frame_channel == channel:
+                        yield body
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                logging.warning(f"⚠️ Verbindung zum MessageBroker verloren ({e}), verbinde neu...")
+                self._writer = None
+                await asyncio.sleep(1.0)
+
+
+def parse_broker_url(url: str) -> Tuple[str, int]:
+    """broker://host:port -> (host, port)"""
+    address = url.split("://", 1)[-1].rstrip("/")
+    host, _, port = address.partition(":")
+    return host or "127.0.0.1", int(port or DEFAULT_BROKER_PORT)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MessageBroker für den WahlplakatGame Cluster-Modus")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_BROKER_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(MessageBroker(args.host, args.port).serve_forever())
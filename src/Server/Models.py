@@ -34,3 +34,17 @@ class Wahlspruch(sillyorm.model.Model):
         return f"{self.spruch} ({self.partei})"
 
 
+class Room(sillyorm.model.Model):
+    """
+    Ein Spielraum (eigene Lobby mit eigenem Rundenablauf)
+    """
+
+    _name = "room"
+
+    room_code = sillyorm.fields.String(length=12, required=True)
+    room_created_by = sillyorm.fields.Integer()
+    room_created_at = sillyorm.fields.Datetime(None)
+    room_closed_at = sillyorm.fields.Datetime(None)
+
+    def __str__(self):
+        return self.room_code
@@ -1,39 +1,96 @@
-from xmlrpc.server import SimpleXMLRPCServer
-from xmlrpc.server import SimpleXMLRPCRequestHandler
 import hashlib
+import ipaddress
+import json
 import secrets
 import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-from DatabaseService import DatabaseService
+from typing import Dict, List, Optional, Sequence, Tuple
+from DatabaseService import DatabaseService, EnvironmentPool
+from RpcServer import RequestHandler, PooledXMLRPCServer, InstrumentedXMLRPCServer, RPC_TRANSPORTS, get_client_ip
+from RateLimiter import TokenBucketLimiter
+from Metrics import REGISTRY
+import WireFormat
 import sillyorm
 import logging
 
 
-class RequestHandler(SimpleXMLRPCRequestHandler):
-    """Custom request handler for logging"""
-    rpc_paths = ('/RPC2',)
-
-
 class NetworkService:
     """
     RPC Service für das WahlplakatGame.
     Behandelt synchrone Operationen wie Authentication, Room Management, etc.
     """
     
-    def __init__(self, host: str = "localhost", port: int = 8000, use_postgres: bool = False):
+    # Wie lange selten geänderte Daten (Parteien, Korpus-Infos) serverseitig zwischengespeichert werden
+    CONTENT_CACHE_TTL = 30.0
+    
+    # Rate-Limits für Auth-RPCs: (Tokens pro Sekunde, Burst).
+    # Pro IP großzügig: eine Schulklasse mit 200 Schülern hinter einer NAT-Adresse braucht beim
+    # Stundenbeginn rund 600 Aufrufe (Namensprüfung, Registrierung, Login). Netze aus
+    # `trusted_networks` (z.B. das Schulnetz) umgehen das IP-Limit ganz.
+    # Pro Account zählen nur fehlgeschlagene Logins, damit Fremde niemanden aussperren,
+    # solange sie das Passwort nicht raten.
+    RATE_LIMIT_PER_IP = (10.0, 600)
+    RATE_LIMIT_PER_ACCOUNT = (0.1, 5)
+    RATE_LIMIT_MESSAGE = "Zu viele Anfragen. Bitte warte einen Moment und versuche es erneut."
+    
+    def __init__(self, host: str = "localhost", port: int = 8000, use_postgres: bool = False,
+                 max_workers: int = 16, max_queue: int = 256, request_timeout: float = 10.0,
+                 keepalive_timeout: float = 5.0, env_pool: Optional[EnvironmentPool] = None,
+                 rate_limit_per_ip: Tuple[float, int] = RATE_LIMIT_PER_IP,
+                 rate_limit_per_account: Tuple[float, int] = RATE_LIMIT_PER_ACCOUNT,
+                 trusted_networks: Sequence[str] = ()):
+        """
+        Args:
+            max_workers: Anzahl Worker-Threads (0 = klassischer Single-Thread Server)
+            max_queue: Maximale Anzahl wartender Verbindungen bevor "Server ausgelastet" gemeldet wird
+                (groß genug, dass 200 gleichzeitig einloggende Clients warten statt abgewiesen zu werden)
+            request_timeout: Socket-Timeout pro Anfrage in Sekunden
+            keepalive_timeout: Idle-Timeout für HTTP/1.1 Keep-Alive Verbindungen (0 = aus)
+            env_pool: Begrenzter Environment-Pool für die RPC-Routen im Gateway-Modus, wo jede
+                Anfrage in einem neuen Thread läuft (None = eine Environment pro Worker-Thread)
+            rate_limit_per_ip: (Tokens pro Sekunde, Burst) für Auth-Aufrufe pro Client-IP
+            rate_limit_per_account: (Tokens pro Sekunde, Burst) für fehlgeschlagene Logins pro Nickname
+            trusted_networks: Netze in CIDR-Schreibweise (z.B. "10.0.0.0/8"), die das IP-Limit umgehen
+        """
         self.host = host
         self.port = port
         self.use_postgres = use_postgres
-        self.env = DatabaseService.get_sillyorm_environment(use_postgres=use_postgres)
+        self.max_workers = max_workers
+        self.env_pool = env_pool
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
         self.server = None
         
-        # Active sessions cache (token -> user_id)
+        # Active sessions cache (token -> user_id). Pro Benutzer gilt nur der Token des letzten
+        # Logins (wie in der Datenbank), `_user_sessions` hält ihn für das Verwerfen des alten
         self.active_sessions: Dict[str, int] = {}
+        self._user_sessions: Dict[int, str] = {}  # user_id -> token
+        self._sessions_lock = threading.Lock()
         
         # Room state cache (room_code -> list of user_ids)
         self.room_players: Dict[str, List[int]] = {}
         
+        # Cache für selten geänderte Daten (key -> (erstellt_um, payload, version))
+        self._content_cache: Dict[str, Tuple[float, Dict, str]] = {}
+        
+        # Token-Buckets für login, register_account und check_username_available
+        self.ip_limiter = TokenBucketLimiter(*rate_limit_per_ip)
+        self.account_limiter = TokenBucketLimiter(*rate_limit_per_account)
+        self.trusted_networks = [ipaddress.ip_network(network, strict=False) for network in trusted_networks]
+        
+        # Metriken (werden erst beim Abruf von /metrics ausgewertet)
+        REGISTRY.gauge("wahlplakat_rpc_active_sessions", "Gecachte Session-Tokens").set_function(lambda: len(self.active_sessions))
+        rate_limited = REGISTRY.counter("wahlplakat_rpc_rate_limited_total", "Durch Rate-Limiting abgelehnte Auth-Aufrufe", ["limiter"])
+        rate_limited.labels("ip").set_function(lambda: self.ip_limiter.rejected)
+        rate_limited.labels("account").set_function(lambda: self.account_limiter.rejected)
+
+    @property
+    def env(self) -> sillyorm.Environment:
+        """Datenbank-Environment des aktuellen Worker-Threads (bzw. aus env_pool, siehe Gateway)"""
+        return DatabaseService.get_thread_environment(use_postgres=self.use_postgres)
+        
     def _hash_password(self, password: str) -> str:
         """Hash a password using SHA-256"""
         return hashlib.sha256(password.encode('utf-8')).hexdigest()
@@ -54,11 +111,85 @@ class NetworkService:
         user = DatabaseService.get_user_by_session_token(self.env, token)
         if user:
             user_id = user[0].id
-            self.active_sessions[token] = user_id
+            self._cache_session(token, user_id)
             return user_id
         
         return None
     
+    def _cache_session(self, token: str, user_id: int):
+        """Merkt sich den Token eines Benutzers und verwirft dessen vorherigen (neuer Login ersetzt ihn)"""
+        with self._sessions_lock:
+            previous = self._user_sessions.get(user_id)
+            if previous is not None and previous != token:
+                self.active_sessions.pop(previous, None)
+            self._user_sessions[user_id] = token
+            self.active_sessions[token] = user_id
+    
+    def _drop_session(self, token: str):
+        """Entfernt einen Token aus dem Cache (Logout, ungültig laut Datenbank)"""
+        with self._sessions_lock:
+            user_id = self.active_sessions.pop(token, None)
+            if user_id is not None and self._user_sessions.get(user_id) == token:
+                del self._user_sessions[user_id]
+    
+    def _content_version(self, payload: Dict) -> str:
+        """Berechnet eine Version (ETag) aus dem Inhalt einer Antwort"""
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()[:16]
+    
+    def _cached_content(self, key: str, loader) -> Tuple[Dict, str]:
+        """
+        Gibt (payload, version) für selten geänderte Daten zurück.
+        `loader` wird höchstens alle CONTENT_CACHE_TTL Sekunden aufgerufen.
+        """
+        cached = self._content_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.CONTENT_CACHE_TTL:
+            return cached[1], cached[2]
+        
+        payload = loader()
+        version = self._content_version(payload)
+        self._content_cache[key] = (time.monotonic(), payload, version)
+        return payload, version
+    
+    def _versioned_response(self, payload: Dict, version: str, if_version: Optional[str]) -> Dict:
+        """
+        Baut eine Antwort mit Version. Kennt der Client die aktuelle Version bereits,
+        wird nur {"success": True, "not_modified": True, "version": ...} gesendet.
+        """
+        if if_version and if_version == version:
+            return {"success": True, "not_modified": True, "version": version}
+        return {"success": True, **payload, "version": version}
+    
+    def _is_trusted(self, client_ip: str) -> bool:
+        """Prüft ob die Client-IP in einem der `trusted_networks` liegt"""
+        if not self.trusted_networks:
+            return False
+        try:
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_networks)
+    
+    def _is_rate_limited(self, nickname: Optional[str] = None) -> bool:
+        """
+        Prüft die Rate-Limits für die aktuelle Client-IP und (optional) den Nickname.
+        Wird vor jeder DB- oder Hash-Arbeit aufgerufen.
+        
+        Der Eimer pro Konto gilt nur für den Nickname (unabhängig von der IP, damit
+        wechselnde Adressen ihn nicht umgehen) und wird hier nur geprüft, nicht belastet:
+        abgebucht wird erst bei einem falschen Passwort (siehe `_charge_failed_login`).
+        """
+        client_ip = get_client_ip()
+        if not self._is_trusted(client_ip) and not self.ip_limiter.allow(client_ip):
+            return True
+        if isinstance(nickname, str) and nickname and not self.account_limiter.check(nickname.lower()):
+            return True
+        return False
+    
+    def _charge_failed_login(self, nickname: str):
+        """Bucht einen fehlgeschlagenen Login vom Eimer des Nicknames ab"""
+        self.account_limiter.allow(nickname.lower())
+    
     # ==================== AUTHENTICATION ====================
     
     def register_account(self, nickname: str, password: str) -> Dict:
@@ -68,6 +199,9 @@ class NetworkService:
         Returns:
             {"success": bool, "message": str, "user_id": int (optional)}
         """
+        if self._is_rate_limited():
+            return {"success": False, "rate_limited": True, "message": self.RATE_LIMIT_MESSAGE}
+        
         try:
             # Validate input
             if not nickname or len(nickname) > 18:
@@ -112,23 +246,31 @@ class NetworkService:
         Meldet einen Benutzer an und gibt einen Session-Token zurück.
         
         Returns:
-            {"success": bool, "message": str, "token": str (optional), "user_id": int (optional)}
+            {"success": bool, "message": str, "token": str (optional), "user_id": int (optional),
+             "server_info": {"transports": list, "socketio": dict} (optional)}
         """
+        if self._is_rate_limited(nickname):
+            return {"success": False, "rate_limited": True, "message": self.RATE_LIMIT_MESSAGE}
+        
         try:
             # Get user from database
             user = DatabaseService.get_user_by_nickname(self.env, nickname)
             
             if not user:
+                self._charge_failed_login(nickname)
                 return {
                     "success": False,
                     "message": "Ungültiger Nickname oder Passwort."
                 }
             
             user = user[0]
+            # Benötigte Felder mit einer Abfrage lesen (jeder Feldzugriff wäre ein eigenes SELECT)
+            fields = user.read(["password", "nickname", "points"])[0]
             
             # Verify password
             hashed_password = self._hash_password(password)
-            if user.password != hashed_password:
+            if fields["password"] != hashed_password:
+                self._charge_failed_login(nickname)
                 return {
                     "success": False,
                     "message": "Ungültiger Nickname oder Passwort."
@@ -140,18 +282,21 @@ class NetworkService:
             # Update user session
             DatabaseService.update_user_session(self.env, user.id, token, ip_address)
             
-            # Cache session
-            self.active_sessions[token] = user.id
+            # Cache session (der bisherige Token des Benutzers ist damit ungültig)
+            self._cache_session(token, user.id)
+            last_login = user.read(["last_login_ip", "last_login_time"])[0]
             
             return {
                 "success": True,
                 "message": "Erfolgreich angemeldet!",
                 "token": token,
                 "user_id": user.id,
-                "nickname": user.nickname,
-                "points": user.points,
-                "last_login_ip": user.last_login_ip,
-                "last_login_time": user.last_login_time
+                "nickname": fields["nickname"],
+                "points": fields["points"],
+                "last_login_ip": last_login["last_login_ip"],
+                "last_login_time": last_login["last_login_time"],
+                # Verbindungs-Einstellungen gleich mitschicken: der Client spart den get_server_info Round-Trip
+                "server_info": self._client_settings()
             }
             
         except Exception as e:
@@ -177,8 +322,7 @@ class NetworkService:
                 }
             
             # Remove from active sessions
-            if token in self.active_sessions:
-                del self.active_sessions[token]
+            self._drop_session(token)
             
             # Clear session token in database
             DatabaseService.update_user_session(self.env, user_id, "", "")
@@ -229,6 +373,9 @@ class NetworkService:
         Returns:
             {"available": bool, "message": str}
         """
+        if self._is_rate_limited():
+            return {"available": False, "rate_limited": True, "message": self.RATE_LIMIT_MESSAGE}
+        
         try:
             # Validate input length
             if not nickname or len(nickname) > 18:
@@ -311,12 +458,16 @@ class NetworkService:
     
     # ==================== LEADERBOARD ====================
     
-    def get_leaderboard(self, limit: int = 10) -> Dict:
+    def get_leaderboard(self, limit: int = 10, if_version: Optional[str] = None) -> Dict:
         """
         Gibt die Bestenliste zurück.
         
+        Args:
+            limit: Anzahl der Top-Spieler
+            if_version: Zuletzt erhaltene Version; ist sie aktuell, wird "not_modified" geantwortet
+        
         Returns:
-            {"success": bool, "leaderboard": list}
+            {"success": bool, "leaderboard": list, "version": str} oder {"success": True, "not_modified": True, "version": str}
         """
         try:
             top_users = DatabaseService.get_top_users(self.env, limit=limit)
@@ -329,10 +480,8 @@ class NetworkService:
                     "points": user.points
                 })
             
-            return {
-                "success": True,
-                "leaderboard": leaderboard
-            }
+            payload = {"leaderboard": leaderboard}
+            return self._versioned_response(payload, self._content_version(payload), if_version)
             
         except Exception as e:
             return {
@@ -390,14 +539,22 @@ class NetworkService:
                 "message": f"Fehler beim Abrufen der Statistiken: {str(e)}"
             }
     
-    def get_alle_parteien(self, token: str) -> Dict:
+    def get_alle_parteien(self, token: str, if_version: Optional[str] = None) -> Dict:
+        """
+        Gibt alle Parteien zurück, die aktuell in der Datenbank vorkommen.
+        
+        Returns:
+            {"success": bool, "parteien": list, "version": str} oder {"success": True, "not_modified": True, "version": str}
+        """
         try:
             user_id = self._validate_session(token)
             if user_id == None:
                 return {"success": False, "message": "Nicht angemeldet (Token Invalid)"}
             
-            parteien = DatabaseService.get_alle_parteien(self.env)
-            return {"success": True, "parteien": parteien}
+            payload, version = self._cached_content(
+                "parteien", lambda: {"parteien": DatabaseService.get_alle_parteien(self.env)}
+            )
+            return self._versioned_response(payload, version, if_version)
         except Exception as e:
             return {
                 "success": False,
@@ -405,6 +562,30 @@ class NetworkService:
             }
 
 
+    def get_corpus_info(self, if_version: Optional[str] = None) -> Dict:
+        """
+        Gibt Metadaten über die Wahlspruch-Sammlung zurück (Anzahl Sprüche und Parteien).
+        
+        Returns:
+            {"success": bool, "total_wahlsprueche": int, "total_parteien": int, "version": str}
+            oder {"success": True, "not_modified": True, "version": str}
+        """
+        try:
+            payload, version = self._cached_content(
+                "corpus",
+                lambda: {
+                    "total_wahlsprueche": DatabaseService.count_wahlsprueche(self.env),
+                    "total_parteien": len(DatabaseService.get_alle_parteien(self.env))
+                }
+            )
+            return self._versioned_response(payload, version, if_version)
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Fehler beim Abrufen der Korpus-Informationen: {str(e)}"
+            }
+
+
     # ==================== UTILITY ====================
     
     def get_server_info(self) -> Dict:
@@ -423,7 +604,13 @@ class NetworkService:
                 "info": {
                     "total_users": total_users,
                     "total_wahlsprueche": total_wahlsprueche,
-                    "active_sessions": len(self.active_sessions)
+                    "active_sessions": len(self.active_sessions),
+                    **self._client_settings(),
+                    "rate_limits": {
+                        "ip": self.ip_limiter.get_stats(),
+                        "account": self.account_limiter.get_stats()
+                    },
+                    "rpc_pool": self.server.get_pool_stats() if isinstance(self.server, PooledXMLRPCServer) else None
                 }
             }
             
@@ -433,22 +620,78 @@ class NetworkService:
                 "message": f"Fehler beim Abrufen der Server-Informationen: {str(e)}"
             }
     
+    def _client_settings(self) -> Dict:
+        """Was ein Client zum Verbinden braucht (RPC-Transporte, Socket.IO Kodierung), ohne DB-Zugriff"""
+        return {
+            "transports": RPC_TRANSPORTS,
+            "socketio": WireFormat.settings()
+        }
+    
     # ==================== SERVER CONTROL ====================
     
+    # ==================== WARMSTART-SNAPSHOT ====================
+    
+    # Nicht per RPC erreichbar (register_instance veröffentlicht alle Methoden ohne Unterstrich):
+    # angemeldet wird der Abschnitt über die Modul-Funktion enable_snapshots()
+    
+    def _capture_caches(self) -> Dict:
+        now = time.monotonic()
+        return {
+            'sessions': dict(self.active_sessions),
+            'content': {key: (now - created, payload, version) for key, (created, payload, version) in list(self._content_cache.items())}
+        }
+    
+    def _restore_caches(self, data: Dict, elapsed: float):
+        """Übernimmt die Caches, Inhalte nur soweit sie noch nicht abgelaufen sind"""
+        for token, user_id in data['sessions'].items():
+            self._cache_session(token, user_id)
+        now = time.monotonic()
+        for key, (age, payload, version) in data['content'].items():
+            if age + elapsed < self.CONTENT_CACHE_TTL:
+                self._content_cache[key] = (now - age - elapsed, payload, version)
+    
+    def _verify_caches(self, data: Dict):
+        """Entfernt Session-Tokens, die laut Datenbank nicht mehr gültig sind (Logout, neuer Login)"""
+        env = self.env
+        stale = 0
+        for token, user_id in data['sessions'].items():
+            user = DatabaseService.get_user_by_session_token(env, token)
+            if not user or user[0].id != user_id:
+                if self.active_sessions.get(token) == user_id:
+                    self._drop_session(token)
+                stale += 1
+        if stale:
+            logging.info(f"♻️ Snapshot-Abgleich: {stale} ungültige Session-Tokens verworfen")
+    
     def start(self):
         """Startet den RPC Server"""
         try:
-            self.server = SimpleXMLRPCServer(
-                (self.host, self.port),
-                requestHandler=RequestHandler,
-                allow_none=True
-            )
+            if self.max_workers > 0:
+                self.server = PooledXMLRPCServer(
+                    (self.host, self.port),
+                    max_workers=self.max_workers,
+                    max_queue=self.max_queue,
+                    request_timeout=self.request_timeout,
+                    keepalive_timeout=self.keepalive_timeout,
+                    requestHandler=RequestHandler,
+                    allow_none=True
+                )
+            else:
+                self.server = InstrumentedXMLRPCServer(
+                    (self.host, self.port),
+                    requestHandler=RequestHandler,
+                    allow_none=True
+                )
             
             # Register all public methods
             self.server.register_instance(self)
+            # system.multicall für gebündelte Aufrufe (ein HTTP-Request für mehrere Methoden)
+            self.server.register_multicall_functions()
             
-            print(f"🚀 NetworkService läuft auf {self.host}:{self.port}")
+            print(f"🚀 NetworkService läuft auf {self.host}:{self.port} (XML-RPC: /RPC2, JSON: /JSON)")
             print(f"📊 Database: {'PostgreSQL' if self.use_postgres else 'SQLite'}")
+            if self.max_workers > 0:
+                print(f"🧵 Worker-Pool: {self.max_workers} Threads, Warteschlange: {self.max_queue}")
             print("="*60)
             
             self.server.serve_forever()
@@ -463,9 +706,16 @@ class NetworkService:
         """Stoppt den RPC Server"""
         if self.server:
             self.server.shutdown()
+            self.server.server_close()
             logging.info("✅ Server erfolgreich beendet.")
 
 
+def enable_snapshots(network_service: NetworkService, snapshots):
+    """Sichert Session- und Inhalts-Cache des NetworkService im Snapshot (siehe Snapshot.SnapshotManager)"""
+    snapshots.register('rpc_caches', network_service._capture_caches, network_service._restore_caches,
+                       network_service._verify_caches)
+
+
 if __name__ == "__main__":
     # Beispiel: Server starten
     service = NetworkService(host="localhost", port=8000, use_postgres=False)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import threading
+from typing import Dict, Optional, Tuple
+
+from DatabaseService import DatabaseService
+
+
+class PartyRegistry:
+    """
+    Parteien im Spielprotokoll als kleine Ganzzahl-IDs (Index in `names`).
+
+    Die IDs werden beim Serverstart aus der Datenbank vergeben (alphabetisch, die Parteien der
+    Datenbank erhalten so in allen Prozessen eines Clusters dieselben IDs) und danach nur noch
+    ergänzt, nie umnummeriert. Später ergänzte Parteien (intern() beim Laden eines Wahlspruchs)
+    erhalten die nächste freie ID dieses Prozesses, die Tabellen der Worker können dann abweichen.
+    Maßgeblich für einen Raum ist die Tabelle seines Besitzers: dort laufen join_success,
+    resume_success und request_parteien (im Cluster-Modus über den LobbyBus).
+
+    `version` ändert sich mit jeder Ergänzung: Clients erhalten die Tabelle einmal mit join_success
+    und fordern sie per request_parteien neu an, wenn eine andere Version gemeldet wird.
+    """
+
+    def __init__(self):
+        self.names: Tuple[str, ...] = ()  # partei_id -> Name (wird nur ersetzt, nie verändert)
+        self.ids: Dict[str, int] = {}  # Name -> partei_id
+        self.version = self._version(self.names)
+        self._table = {'version': self.version, 'names': []}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(names: Tuple[str, ...]) -> str:
+        return hashlib.sha1(json.dumps(names, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+    def load(self, db_env):
+        """Vergibt IDs für alle Parteien der Datenbank (bereits bekannte behalten ihre ID)"""
+        for name in DatabaseService.get_alle_parteien(db_env):
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """ID der Partei, unbekannte Parteien erhalten die nächste freie ID"""
+        partei_id = self.ids.get(name)
+        if partei_id is not None:
+            return partei_id
+
+        with self._lock:
+            partei_id = self.ids.get(name)
+            if partei_id is None:
+                # Erst die neue Liste, dann das Mapping: jede veröffentlichte ID ist gültig
+                names = self.names + (name,)
+                self.names = names
+                partei_id = self.ids[name] = len(names) - 1
+                self.version = self._version(names)
+                self._table = {'version': self.version, 'names': list(names)}
+            return partei_id
+
+    def is_valid(self, partei_id) -> bool:
+        """O(1)-Prüfung einer eingereichten ID"""
+        return type(partei_id) is int and 0 <= partei_id < len(self.names)
+
+    def name_of(self, partei_id: int) -> Optional[str]:
+        return self.names[partei_id] if self.is_valid(partei_id) else None
+
+    def table(self) -> dict:
+        """Tabelle für die Clients: {'version': ..., 'names': [Name je partei_id]}"""
+        return self._table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+# Gemeinsame Tabelle aller Lobbys eines Prozesses
+PARTIES = PartyRegistry()
@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Tuple
+
+from DatabaseService import DatabaseService
+from Metrics import REGISTRY
+
+POINTS_WRITER_PENDING = REGISTRY.gauge("wahlplakat_points_writer_pending", "Noch nicht geschriebene Punktestände")
+POINTS_WRITTEN = REGISTRY.counter("wahlplakat_points_written_total", "Von PointsWriter geschriebene Punktestände")
+POINTS_WRITE_BATCHES = REGISTRY.counter("wahlplakat_points_write_batches_total", "Von PointsWriter geschriebene Batches")
+
+
+class PointsWriter:
+    """
+    Schreibt Punktestände im Hintergrund in die Datenbank, damit das Rundenende
+    weder den Lobby-Lock noch die Event-Loop für DB-Zugriffe blockiert.
+
+    Updates werden pro user_id zusammengefasst (latest-wins): kommen mehrere Runden-Ergebnisse
+    eines Spielers an, bevor geschrieben wurde, wird nur der neueste Punktestand geschrieben.
+    """
+
+    def __init__(self, env_provider: Callable[[], object], name: str = "PointsWriter"):
+        """
+        Args:
+            env_provider: Liefert die SillyORM Environment für den Writer-Thread
+        """
+        self.env_provider = env_provider
+        self._pending: Dict[int, int] = {}  # user_id -> neue Punkte
+        self._condition = threading.Condition()
+        self._running = True
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        POINTS_WRITER_PENDING.set_function(lambda: len(self._pending))
+
+    def submit(self, point_updates: Iterable[Tuple[int, int]]):
+        """Übernimmt [(user_id, neue_punkte)] zum Schreiben (kehrt sofort zurück)"""
+        with self._condition:
+            for user_id, points in point_updates:
+                self._pending[user_id] = points
+            if self._pending:
+                self._condition.notify()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wartet, bis alle übergebenen Punktestände geschrieben sind"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self, timeout: float = 5.0):
+        """Schreibt ausstehende Punktestände und beendet den Writer-Thread"""
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or not self._running)
+                if not self._pending and not self._running:
+                    return
+                batch, self._pending = self._pending, {}
+                self._busy = True
+
+            try:
+                env = self.env_provider()
+                for user_id, points in batch.items():
+                    DatabaseService.update_user_points(env, user_id, points)
+                POINTS_WRITTEN.inc(len(batch))
+                POINTS_WRITE_BATCHES.inc()
+            except Exception as e:
+                logging.exception(f"❌ Fehler beim Schreiben von {len(batch)} Punktestand/-ständen: {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
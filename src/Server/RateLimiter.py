@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+
+class TokenBucketLimiter:
+    """
+    In-Memory Token-Bucket Limiter, getrennt nach Schlüssel (z.B. Client-IP oder Nickname).
+
+    Jeder Schlüssel hat einen Eimer mit höchstens `burst` Tokens, der mit `rate` Tokens
+    pro Sekunde nachgefüllt wird. Eine Anfrage kostet ein Token; ist der Eimer leer,
+    wird sie abgelehnt. Eine Prüfung kostet nur ein Dict-Lookup und etwas Arithmetik.
+    Bei mehr als `max_keys` Schlüsseln wird der am längsten unbenutzte Eimer verworfen (O(1)).
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()  # key -> [tokens, letzte_aktualisierung], zuletzt benutzt am Ende
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def _refill(self, key: str, now: float) -> List[float]:
+        """Gibt den nachgefüllten Eimer für `key` zurück (Aufrufer hält `_lock`)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            while len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[key] = [float(self.burst), now]
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    def allow(self, key: str, cost: float = 1.0) -> bool:
+        """Verbraucht `cost` Tokens für `key`. Gibt False zurück, wenn nicht genug Tokens da sind."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._refill(key, now)
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return True
+
+            self.rejected += 1
+            return False
+
+    def check(self, key: str, cost: float = 1.0) -> bool:
+        """Wie allow(), verbraucht aber keine Tokens (z.B. um erst bei einem Fehlschlag abzubuchen)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._refill(key, now)[0] >= cost:
+                return True
+
+            self.rejected += 1
+            return False
+
+    def get_stats(self) -> Dict:
+        """Gibt die Zähler des Limiters zurück"""
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "tracked_keys": len(self._buckets)
+        }
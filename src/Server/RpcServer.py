@@ -0,0 +1,362 @@
+from xmlrpc.server import SimpleXMLRPCServer
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+import xmlrpc.client
+from datetime import datetime, date
+import json
+import queue
+import select
+import threading
+import time
+import logging
+from typing import Dict
+from Metrics import REGISTRY
+
+# Fault-Code für "Server ausgelastet" (angelehnt an HTTP 503)
+SERVER_BUSY_FAULT = 503
+
+# Pfad des kompakten JSON-RPC Endpoints (gleiche Methoden wie /RPC2)
+JSON_RPC_PATH = '/JSON'
+
+# Vom Server angebotene Transports (wird über get_server_info ausgehandelt)
+RPC_TRANSPORTS = ["xmlrpc", "json"]
+
+RPC_REQUESTS = REGISTRY.counter("wahlplakat_rpc_requests_total", "Ausgeführte RPC-Methoden", ["method", "outcome"])
+RPC_SECONDS = REGISTRY.histogram("wahlplakat_rpc_seconds", "Dauer von RPC-Methoden", ["method"])
+RPC_REJECTED = REGISTRY.counter("wahlplakat_rpc_rejected_total", "Wegen Überlastung abgelehnte RPC-Verbindungen")
+
+# Daten der gerade bearbeiteten Anfrage (pro Worker-Thread)
+request_context = threading.local()
+
+
+def get_client_ip() -> str:
+    """Gibt die IP-Adresse des Clients der aktuellen Anfrage zurück"""
+    return getattr(request_context, "client_ip", "unknown")
+
+
+def _json_default(obj):
+    """Kodiert Typen, die JSON nicht kennt (Datumswerte im XML-RPC Format, damit Clients sie gleich behandeln)"""
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.strftime("%Y%m%dT%H:%M:%S")}
+    if isinstance(obj, date):
+        return {"__datetime__": obj.strftime("%Y%m%dT00:00:00")}
+    if isinstance(obj, xmlrpc.client.DateTime):
+        return {"__datetime__": obj.value}
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Typ {type(obj).__name__} ist nicht JSON-serialisierbar")
+
+
+def encode_json_response(result=None, fault: xmlrpc.client.Fault = None) -> bytes:
+    """Kodiert eine JSON-RPC Antwort: {"result": ...} oder {"error": {"faultCode", "faultString"}}"""
+    if fault is not None:
+        body = {"error": {"faultCode": fault.faultCode, "faultString": fault.faultString}}
+    else:
+        body = {"result": result}
+    return json.dumps(body, default=_json_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def decode_json_request(data: bytes):
+    """Dekodiert eine JSON-RPC Anfrage: {"method": str, "params": list} -> (method, params)"""
+    request = json.loads(data)
+    return request["method"], tuple(request.get("params", ()))
+
+
+def dispatch_json_request(dispatch, data: bytes) -> bytes:
+    """
+    Führt eine JSON-RPC Anfrage über `dispatch(method, params)` aus (z.B. `SimpleXMLRPCDispatcher._dispatch`)
+    und gibt die kodierte Antwort zurück.
+    """
+    try:
+        method, params = decode_json_request(data)
+        return encode_json_response(dispatch(method, params))
+    except xmlrpc.client.Fault as fault:
+        return encode_json_response(fault=fault)
+    except Exception as e:
+        return encode_json_response(fault=xmlrpc.client.Fault(1, f"{type(e).__name__}:{e}"))
+
+
+def _send_json(handler, body: bytes):
+    """Schreibt eine JSON-Antwort über einen BaseHTTPRequestHandler"""
+    handler.send_response(200)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+class InstrumentedDispatchMixin:
+    """
+    Misst Anzahl und Dauer jedes RPC-Aufrufs (XML-RPC, JSON und einzelne multicall-Aufrufe).
+    Unbekannte Methodennamen landen im Label "unknown", damit Clients keine beliebigen Labels erzeugen.
+    """
+
+    def _is_known_method(self, method: str) -> bool:
+        if method in self.funcs:
+            return True
+        return self.instance is not None and not method.startswith('_') and callable(getattr(self.instance, method, None))
+
+    def _dispatch(self, method, params):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return super()._dispatch(method, params)
+        except Exception:
+            outcome = "fault"
+            raise
+        finally:
+            label = method if self._is_known_method(method) else "unknown"
+            RPC_SECONDS.labels(label).observe(time.perf_counter() - start)
+            RPC_REQUESTS.labels(label, outcome).inc()
+
+
+class RequestHandler(SimpleXMLRPCRequestHandler):
+    """Custom request handler for logging"""
+    rpc_paths = ('/RPC2',)
+
+    def do_GET(self):
+        """GET /metrics liefert die Metriken im Prometheus Text-Format"""
+        if self.path != '/metrics':
+            self.report_404()
+            return
+
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", REGISTRY.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def setup(self):
+        super().setup()
+        # HTTP/1.1 Keep-Alive nur, wenn der Server einen Idle-Timeout vorgibt (Worker-Pool).
+        # Der klassische Single-Thread Server bleibt bei HTTP/1.0, sonst blockiert eine
+        # offene Verbindung alle anderen Clients.
+        if getattr(self.server, "keepalive_timeout", 0) > 0:
+            self.protocol_version = "HTTP/1.1"
+
+    def handle(self):
+        """Bearbeitet mehrere Anfragen pro Verbindung (Keep-Alive)"""
+        request_context.client_ip = self.client_address[0]
+        try:
+            self.close_connection = True
+            self.handle_one_request()
+            while not self.close_connection:
+                if not self._wait_for_next_request():
+                    break
+                self.handle_one_request()
+        finally:
+            request_context.client_ip = None
+
+    def _wait_for_next_request(self) -> bool:
+        """
+        Wartet höchstens `keepalive_timeout` Sekunden auf die nächste Anfrage.
+        Warten andere Verbindungen auf einen Worker, wird die Verbindung sofort
+        geschlossen, damit der Worker frei wird.
+        """
+        deadline = time.monotonic() + self.server.keepalive_timeout
+        while time.monotonic() < deadline:
+            if self.server.has_waiting_requests():
+                return False
+            readable, _, _ = select.select([self.connection], [], [], 0.05)
+            if readable:
+                return True
+        return False
+
+    def do_POST(self):
+        """Leitet /JSON an den JSON-Endpoint weiter, alles andere an XML-RPC"""
+        if self.path == JSON_RPC_PATH:
+            self._do_json_post()
+        else:
+            super().do_POST()
+
+    def _do_json_post(self):
+        """
+        JSON-RPC Endpoint. Nutzt die gleiche Methoden-Registry (`server._dispatch`)
+        wie XML-RPC, d.h. auch system.multicall und alle Auth-Prüfungen.
+        """
+        try:
+            length = int(self.headers.get("content-length", 0))
+            data = self.rfile.read(length)
+        except (OSError, ValueError):
+            self.send_response(400)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        _send_json(self, dispatch_json_request(self.server._dispatch, data))
+
+
+class BusyRequestHandler(RequestHandler):
+    """
+    Beantwortet eine Anfrage sofort mit einem "Server ausgelastet"-Fault.
+    Es wird keine RPC-Methode ausgeführt (kein Hashing, keine DB-Abfrage).
+    """
+    timeout = 1.0
+    max_body_size = 64 * 1024
+
+    def do_POST(self):
+        # Request-Body lesen, damit der Client die Antwort sicher empfängt
+        try:
+            length = int(self.headers.get("content-length", 0))
+            if 0 < length <= self.max_body_size:
+                self.rfile.read(length)
+        except (OSError, ValueError):
+            pass
+
+        fault = xmlrpc.client.Fault(SERVER_BUSY_FAULT, "Server ausgelastet, bitte später erneut versuchen.")
+
+        if self.path == JSON_RPC_PATH:
+            content_type = "application/json"
+            response = encode_json_response(fault=fault)
+        else:
+            content_type = "text/xml"
+            response = xmlrpc.client.dumps(fault, methodresponse=True, allow_none=True).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(response)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(response)
+        self.close_connection = True
+
+
+class InstrumentedXMLRPCServer(InstrumentedDispatchMixin, SimpleXMLRPCServer):
+    """Klassischer Single-Thread XML-RPC Server mit Metriken"""
+
+
+class PooledXMLRPCServer(InstrumentedDispatchMixin, SimpleXMLRPCServer):
+    """
+    XML-RPC Server mit begrenztem Worker-Pool.
+
+    Angenommene Verbindungen landen in einer begrenzten Warteschlange und werden von
+    `max_workers` Threads abgearbeitet. Ist die Warteschlange voll (oder hat eine Anfrage
+    länger als `request_timeout` gewartet), wird sofort ein "Server ausgelastet"-Fault
+    zurückgegeben, statt den Client hängen zu lassen.
+
+    Verbindungen bleiben per HTTP/1.1 Keep-Alive bis zu `keepalive_timeout` Sekunden offen.
+
+    Abgelehnt wird in einem eigenen Thread (`rpc-reject`): das Lesen der Anfrage eines langsamen
+    Clients darf den Accept-Thread nicht aufhalten. Kommt auch dieser nicht hinterher, wird die
+    Verbindung ohne Antwort geschlossen.
+    """
+
+    def __init__(self, addr, max_workers: int = 16, max_queue: int = 256, request_timeout: float = 10.0,
+                 keepalive_timeout: float = 5.0, accept_backlog: int = 256, **kwargs):
+        # Wird von server_activate() für listen() verwendet
+        self.request_queue_size = accept_backlog
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        # Idle-Timeout für Keep-Alive Verbindungen (0 = HTTP/1.0, eine Anfrage pro Verbindung)
+        self.keepalive_timeout = keepalive_timeout
+        self._pending = queue.Queue(maxsize=max_queue)
+        self._rejects = queue.Queue(maxsize=max_queue)
+        self._workers = []
+        self._stats_lock = threading.Lock()
+        self.rejected_requests = 0
+
+        super().__init__(addr, **kwargs)
+
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"rpc-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self._reject_worker = threading.Thread(target=self._reject_loop, name="rpc-reject", daemon=True)
+        self._reject_worker.start()
+
+    def process_request(self, request, client_address):
+        """Wird vom Accept-Thread aufgerufen - übergibt die Verbindung an den Pool (blockiert nie)"""
+        try:
+            self._pending.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            try:
+                self._rejects.put_nowait((request, client_address))
+            except queue.Full:
+                self._count_rejected(client_address)
+                self.shutdown_request(request)
+
+    def _count_rejected(self, client_address):
+        with self._stats_lock:
+            self.rejected_requests += 1
+        RPC_REJECTED.inc()
+        logging.warning(f"⚠️ RPC Server ausgelastet - Anfrage von {client_address[0]} abgelehnt")
+
+    def _reject_busy(self, request, client_address):
+        """Sendet den "Server ausgelastet"-Fault (nicht auf dem Accept-Thread aufrufen)"""
+        self._count_rejected(client_address)
+        try:
+            request.settimeout(BusyRequestHandler.timeout)
+            BusyRequestHandler(request, client_address, self)
+        except Exception:
+            pass
+
+    def _reject_loop(self):
+        """Beantwortet die vom Accept-Thread abgewiesenen Verbindungen"""
+        while True:
+            item = self._rejects.get()
+            if item is None:
+                break
+
+            request, client_address = item
+            try:
+                self._reject_busy(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def _worker_loop(self):
+        """Arbeitet Verbindungen aus der Warteschlange ab"""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+
+            request, client_address, enqueued_at = item
+            try:
+                if time.monotonic() - enqueued_at > self.request_timeout:
+                    # Client hat vermutlich schon aufgegeben
+                    self._reject_busy(request, client_address)
+                    continue
+
+                # Timeout für alle Socket-Operationen dieser Anfrage
+                request.settimeout(self.request_timeout)
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def has_waiting_requests(self) -> bool:
+        """True wenn Verbindungen auf einen freien Worker warten"""
+        return not self._pending.empty()
+
+    def get_pool_stats(self) -> Dict:
+        """Gibt Statistiken über den Worker-Pool zurück"""
+        return {
+            "workers": self.max_workers,
+            "queued": self._pending.qsize(),
+            "queue_size": self._pending.maxsize,
+            "keepalive_timeout": self.keepalive_timeout,
+            "rejected_requests": self.rejected_requests
+        }
+
+    def server_close(self):
+        """Schließt den Socket und beendet die Worker (wartende Verbindungen werden verworfen)"""
+        super().server_close()
+        for pending, threads in ((self._pending, self._workers), (self._rejects, [self._reject_worker])):
+            self._stop_threads(pending, len(threads))
+
+    def _stop_threads(self, pending: queue.Queue, count: int):
+        """Reiht `count` Stopp-Signale ein, ohne zu blockieren: ist die Warteschlange voll, werden wartende Verbindungen geschlossen"""
+        while count > 0:
+            try:
+                pending.put_nowait(None)
+                count -= 1
+            except queue.Full:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    continue
+                if item is None:
+                    count += 1  # Eigenes Stopp-Signal wieder entnommen
+                else:
+                    self.shutdown_request(item[0])
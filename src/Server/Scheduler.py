@@ -0,0 +1,170 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from Metrics import REGISTRY
+
+SCHEDULER_PENDING = REGISTRY.gauge("wahlplakat_scheduler_pending", "Geplante, noch nicht ausgeführte Timer")
+SCHEDULER_LAG = REGISTRY.histogram("wahlplakat_scheduler_lag_seconds", "Verspätung eines Timers gegenüber seiner Deadline",
+                                   buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+class ScheduledCall:
+    """Handle eines geplanten Aufrufs. Kann bis zur Ausführung mit cancel() storniert werden."""
+    __slots__ = ("when", "sequence", "callback", "args", "cancelled", "_queued", "_scheduler")
+
+    def __init__(self, when: float, sequence: int, callback: Callable, args: tuple, scheduler: 'Scheduler'):
+        self.when = when
+        self.sequence = sequence
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._queued = True  # Noch im Heap des Schedulers
+        self._scheduler = scheduler
+
+    def __lt__(self, other: 'ScheduledCall') -> bool:
+        return (self.when, self.sequence) < (other.when, other.sequence)
+
+    def cancel(self):
+        """Storniert den Aufruf (ohne Wirkung, wenn er bereits läuft oder gelaufen ist)"""
+        if not self.cancelled:
+            self._scheduler._on_cancel(self)
+
+    def remaining(self) -> float:
+        """Verbleibende Zeit bis zur Deadline in Sekunden"""
+        return max(0.0, self.when - time.monotonic())
+
+
+class Scheduler:
+    """
+    Zentraler Timer-Dienst: ein Thread verwaltet alle Deadlines in einem Min-Heap
+    (monotone Uhr), statt pro Timer einen eigenen threading.Timer-Thread zu starten.
+
+    Fällige Callbacks laufen auf einem kleinen festen Thread-Pool, damit ein langsamer
+    Callback (z.B. DB-Schreibzugriffe am Rundenende) die anderen Deadlines nicht verzögert.
+    Mit `workers=0` laufen Callbacks direkt im Scheduler-Thread.
+
+    Stornierte Einträge werden lazy entfernt und der Heap bei Bedarf kompaktiert.
+    """
+
+    def __init__(self, workers: int = 4, name: str = "Scheduler"):
+        self.name = name
+        self._heap: List[ScheduledCall] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._cancelled = 0
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._stopped = False  # Nach stop() endgültig: kein Neustart, neue Aufrufe werden verworfen
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker") if workers > 0 else None
+
+        SCHEDULER_PENDING.set_function(lambda: len(self._heap) - self._cancelled)
+
+    def start(self):
+        """Startet den Scheduler-Thread (wird bei der ersten Planung automatisch aufgerufen)"""
+        with self._condition:
+            if self._running or self._stopped:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Beendet den Scheduler endgültig. Noch nicht fällige und später geplante Aufrufe werden verworfen."""
+        with self._condition:
+            self._running = False
+            self._stopped = True
+            self._heap.clear()
+            self._cancelled = 0
+            self._condition.notify()
+        if wait and self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+    def call_later(self, delay: float, callback: Callable, *args) -> ScheduledCall:
+        """Plant `callback(*args)` in `delay` Sekunden ein"""
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def call_soon(self, callback: Callable, *args) -> ScheduledCall:
+        """Plant `callback(*args)` zur sofortigen Ausführung ein"""
+        return self.call_at(time.monotonic(), callback, *args)
+
+    def call_at(self, when: float, callback: Callable, *args) -> ScheduledCall:
+        """
+        Plant `callback(*args)` zum Zeitpunkt `when` (time.monotonic()) ein. Nach stop() wird der
+        Aufruf verworfen (das zurückgegebene Handle ist bereits storniert).
+        """
+        if not self._running:
+            self.start()
+
+        handle = ScheduledCall(when, next(self._counter), callback, args, self)
+        with self._condition:
+            if self._stopped:
+                handle.cancelled, handle._queued = True, False
+                logging.debug(f"⏹️ {self.name} ist beendet, Aufruf von {getattr(callback, '__qualname__', callback)} verworfen")
+                return handle
+            heapq.heappush(self._heap, handle)
+            # Nur wecken, wenn die neue Deadline die früheste ist
+            if self._heap[0] is handle:
+                self._condition.notify()
+        return handle
+
+    def _on_cancel(self, handle: ScheduledCall):
+        # Prüfen und Setzen unter dem Lock: sonst könnte _run den Eintrag schon als storniert
+        # entfernen (und _cancelled verringern), bevor er hier gezählt wird
+        with self._condition:
+            if handle.cancelled:
+                return
+            handle.cancelled = True
+            if not handle._queued:
+                return
+            self._cancelled += 1
+            # Heap kompaktieren, wenn mehr als die Hälfte storniert ist
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                for cancelled in (h for h in self._heap if h.cancelled):
+                    cancelled._queued = False
+                self._heap = [h for h in self._heap if not h.cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running:
+                    while self._heap and self._heap[0].cancelled:
+                        heapq.heappop(self._heap)._queued = False
+                        self._cancelled -= 1
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    timeout = self._heap[0].when - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                handle = heapq.heappop(self._heap)
+                handle._queued = False
+
+            SCHEDULER_LAG.observe(time.monotonic() - handle.when)
+            if self._executor:
+                try:
+                    self._executor.submit(self._execute, handle)
+                except RuntimeError:
+                    return  # stop() hat den Pool zwischen Entnahme und Übergabe beendet
+            else:
+                self._execute(handle)
+
+    @staticmethod
+    def _execute(handle: ScheduledCall):
+        if handle.cancelled:
+            return
+        try:
+            handle.callback(*handle.args)
+        except Exception as e:
+            logging.exception(f"❌ Fehler in geplantem Aufruf {getattr(handle.callback, '__qualname__', handle.callback)}: {e}")
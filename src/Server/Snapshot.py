@@ -0,0 +1,185 @@
+"""
+Warmstart-Snapshot: Zustand der Lobbys, Caches und laufenden Timer über einen Neustart retten.
+
+- Komponenten melden sich als Abschnitt an (`SnapshotManager.register`): capture() kopiert den
+  Zustand, restore(data, elapsed) stellt ihn wieder her (elapsed = Sekunden seit dem Schreiben,
+  damit Timer-Deadlines weiterlaufen), verify(data) gleicht ihn im Hintergrund mit der Datenbank ab.
+- Geschrieben wird beim Beenden und periodisch, atomar über eine temporäre Datei (os.replace).
+- Dateiformat: MAGIC | crc32 | pickle. Geladen wird per mmap, pickle liest direkt aus dem Mapping.
+  Die Datei stammt nur vom Server selbst und darf nicht aus fremden Quellen kommen (pickle).
+"""
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional
+
+from Metrics import REGISTRY
+
+SNAPSHOT_WRITES = REGISTRY.counter("wahlplakat_snapshot_writes_total", "Geschriebene Warmstart-Snapshots", ["trigger"])
+SNAPSHOT_BYTES = REGISTRY.gauge("wahlplakat_snapshot_bytes", "Größe des zuletzt geschriebenen Snapshots")
+SNAPSHOT_SECONDS = REGISTRY.histogram("wahlplakat_snapshot_seconds", "Dauer der Snapshot-Phasen", ["phase"],
+                                      buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5))
+
+MAGIC = b"WPSNAP01"
+HEADER = struct.Struct(">8sI")  # MAGIC, crc32 des pickle-Teils
+SNAPSHOT_VERSION = 1
+DEFAULT_INTERVAL = 60.0
+
+
+def write_snapshot(path: str, state: dict) -> int:
+    """Schreibt den Snapshot atomar (Leser sehen immer eine vollständige Datei). Returns: Größe in Bytes"""
+    body = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, zlib.crc32(body)))
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return HEADER.size + len(body)
+
+
+def read_snapshot(path: str) -> Optional[dict]:
+    """Lädt einen Snapshot per mmap. None, wenn die Datei fehlt, beschädigt oder veraltet ist"""
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    if len(view) < HEADER.size:
+                        raise ValueError("Datei zu kurz")
+                    magic, crc = HEADER.unpack_from(view)
+                    body = view[HEADER.size:]
+                    try:
+                        if magic != MAGIC or zlib.crc32(body) != crc:
+                            raise ValueError("Prüfsumme oder Kennung falsch")
+                        state = pickle.loads(body)
+                    finally:
+                        body.release()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+        logging.warning(f"⚠️ Snapshot {path} unbrauchbar, starte ohne: {e}")
+        return None
+
+    if state.get("version") != SNAPSHOT_VERSION:
+        logging.warning(f"⚠️ Snapshot {path} hat Version {state.get('version')}, erwartet {SNAPSHOT_VERSION}")
+        return None
+    return state
+
+
+class SnapshotManager:
+    """Sammelt die Abschnitte der Komponenten und schreibt bzw. lädt den gemeinsamen Snapshot"""
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL):
+        """
+        Args:
+            path: Snapshot-Datei
+            interval: Sekunden zwischen periodischen Snapshots (0 = nur beim Beenden)
+        """
+        self.path = path
+        self.interval = interval
+        self.sections: Dict[str, tuple] = {}  # Name -> (capture, restore, verify)
+        self._timer = None
+        self._lock = threading.Lock()  # Ein Schreibvorgang zur Zeit
+
+    def register(self, name: str, capture: Callable[[], object], restore: Callable[[object, float], None],
+                 verify: Optional[Callable[[object], None]] = None):
+        """Meldet einen Abschnitt an (verify läuft nach dem Laden in einem Hintergrund-Thread)"""
+        self.sections[name] = (capture, restore, verify)
+
+    def capture(self) -> dict:
+        """Kopiert den Zustand aller Abschnitte (auf dem Thread bzw. der Loop, der der Zustand gehört)"""
+        start = time.perf_counter()
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.time(),
+            "sections": {name: capture() for name, (capture, _, _) in self.sections.items()}
+        }
+        SNAPSHOT_SECONDS.labels("capture").observe(time.perf_counter() - start)
+        return state
+
+    def write(self, state: dict, trigger: str = "periodic"):
+        """Schreibt einen mit capture() erzeugten Zustand (darf in einem Worker-Thread laufen)"""
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                size = write_snapshot(self.path, state)
+        except OSError as e:
+            logging.error(f"❌ Snapshot konnte nicht geschrieben werden: {e}")
+            return
+        SNAPSHOT_SECONDS.labels("write").observe(time.perf_counter() - start)
+        SNAPSHOT_WRITES.labels(trigger).inc()
+        SNAPSHOT_BYTES.set(size)
+        logging.debug(f"💾 Snapshot geschrieben ({size} Bytes, {trigger})")
+
+    def save(self, trigger: str = "shutdown"):
+        """capture() und write() in einem Schritt"""
+        self.write(self.capture(), trigger)
+
+    def restore(self) -> bool:
+        """
+        Stellt alle angemeldeten Abschnitte aus der Datei wieder her und startet danach den
+        Abgleich mit der Datenbank in einem Hintergrund-Thread.
+
+        Returns:
+            True wenn ein Snapshot geladen wurde
+        """
+        start = time.perf_counter()
+        state = read_snapshot(self.path)
+        if state is None:
+            return False
+
+        elapsed = max(0.0, time.time() - state["created_at"])
+        sections = state["sections"]
+        for name, data in sections.items():
+            if name in self.sections:
+                self.sections[name][1](data, elapsed)
+        SNAPSHOT_SECONDS.labels("load").observe(time.perf_counter() - start)
+        logging.info(f"♻️ Snapshot geladen ({', '.join(sections)}; {elapsed:.1f}s alt)")
+
+        threading.Thread(target=self._verify, args=(sections,), name="SnapshotVerify", daemon=True).start()
+        return True
+
+    def _verify(self, sections: dict):
+        start = time.perf_counter()
+        for name, data in sections.items():
+            verify = self.sections.get(name, (None, None, None))[2]
+            if verify is None:
+                continue
+            try:
+                verify(data)
+            except Exception as e:
+                logging.exception(f"❌ Abgleich des Snapshot-Abschnitts {name} fehlgeschlagen: {e}")
+        SNAPSHOT_SECONDS.labels("verify").observe(time.perf_counter() - start)
+
+    def start_periodic(self, timers, offload: Optional[Callable] = None):
+        """
+        Schreibt alle `interval` Sekunden einen Snapshot.
+
+        Args:
+            timers: Objekt mit call_later(delay, callback) - capture() läuft im Timer-Callback
+            offload: offload(function, *args) für das Schreiben (z.B. in einen Thread statt auf der Event-Loop)
+        """
+        if self.interval > 0:
+            self._timer = timers.call_later(self.interval, self._periodic, timers, offload)
+
+    def _periodic(self, timers, offload: Optional[Callable]):
+        try:
+            state = self.capture()
+            if offload:
+                offload(self.write, state, "periodic")
+            else:
+                self.write(state, "periodic")
+        finally:
+            self._timer = timers.call_later(self.interval, self._periodic, timers, offload)
+
+    def stop(self):
+        """Stoppt die periodischen Snapshots"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
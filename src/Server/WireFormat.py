@@ -0,0 +1,262 @@
+"""
+Kodierung der Socket.IO Pakete zwischen GameServer und GameClient.
+
+- Einmal kodierte Broadcast-Payloads: Bei einem Broadcast an einen Raum kodiert Socket.IO das
+  Paket (je nach Version) pro Empfänger bzw. baut pro Empfänger die Frame-Bytes neu. Eine
+  FrozenPayload wird beim Einfrieren genau einmal kodiert. Der JSON-Codec dieses Moduls
+  (`Server(json=WireFormat)`) setzt beim Kodieren eines Pakets nur noch das Ergebnis ein.
+- Austauschbarer Serializer (`configure()`): 'json' (Standardbibliothek), 'orjson' (schnelles JSON)
+  oder 'msgpack' (binäre Pakete). Server und Client müssen denselben verwenden, der Client
+  übernimmt die Einstellung aus get_server_info()["info"]["socketio"].
+- Kompression: Pakete ab `compression_threshold` Bytes werden mit zlib (deflate) komprimiert
+  und als Binär-Frame mit COMPRESSED_MARKER verschickt (z.B. volle Spielerlisten, Leaderboards).
+"""
+import json
+import zlib
+from typing import Any, Optional, Union
+
+from Metrics import REGISTRY
+
+FROZEN_PAYLOADS = REGISTRY.counter("wahlplakat_frozen_payloads_total", "Einmal kodierte Broadcast-Payloads")
+FROZEN_PAYLOAD_BYTES = REGISTRY.counter("wahlplakat_frozen_payload_bytes_total", "Größe der einmal kodierten Broadcast-Payloads")
+# Gezählt wird beim Kodieren: ein Broadcast wird einmal kodiert (FrozenPayload-Cache, neuere python-socketio
+# Versionen auch ohne), zählt also einmal und nicht je Empfänger. Die Bytes auf der Leitung sind entsprechend höher.
+WIRE_COMPRESSED_FRAMES = REGISTRY.counter("wahlplakat_wire_compressed_frames_total", "Komprimiert kodierte Socket.IO Pakete (ein Broadcast zählt einmal)")
+WIRE_ENCODED_BYTES = REGISTRY.counter("wahlplakat_wire_encoded_bytes_total",
+                                      "Kodierte bzw. durch Kompression gesparte Bytes der Socket.IO Pakete (ein Broadcast zählt einmal, nicht je Empfänger)",
+                                      ["kind"])
+_WIRE_BYTES_ENCODED = WIRE_ENCODED_BYTES.labels("encoded")
+_WIRE_BYTES_SAVED = WIRE_ENCODED_BYTES.labels("saved")
+
+SERIALIZERS = ("json", "orjson", "msgpack")
+
+# Wie python-socketio: kompakte Trenner
+SEPARATORS = (',', ':')
+
+# Erstes Byte eines komprimierten Frames. Kann weder Text-Pakete (str) noch msgpack-Pakete
+# (beginnen mit einem Map-Header 0x80-0x8f) einleiten.
+COMPRESSED_MARKER = b'\x00'
+COMPRESSION_LEVEL = 6
+
+# Aktive Einstellungen (siehe configure())
+_serializer = "json"
+_compression_threshold: Optional[int] = 8192
+_json_dumps = None
+_json_loads = json.loads
+_msgpack = None
+_packet_class = None
+
+
+def configure(serializer: str = "json", compression_threshold: Optional[int] = 8192):
+    """
+    Wählt Serializer und Kompressions-Schwelle für alle Socket.IO Pakete dieses Prozesses.
+
+    Args:
+        serializer: 'json', 'orjson' oder 'msgpack'
+        compression_threshold: Ab dieser Paketgröße in Bytes wird komprimiert (None/0 = nie)
+
+    Raises:
+        ValueError: Unbekannter Serializer
+        RuntimeError: Benötigtes Paket nicht installiert
+    """
+    global _serializer, _compression_threshold, _json_dumps, _json_loads, _msgpack
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unbekannter Serializer: {serializer} (erlaubt: {', '.join(SERIALIZERS)})")
+
+    _json_dumps, _json_loads = None, json.loads
+    if serializer == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            raise RuntimeError("Für den Serializer 'orjson' wird 'orjson' benötigt (pip install orjson)")
+        _json_dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        _json_loads = orjson.loads
+    elif serializer == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise RuntimeError("Für den Serializer 'msgpack' wird 'msgpack' benötigt (pip install msgpack)")
+        _msgpack = msgpack
+
+    _serializer = serializer
+    _compression_threshold = compression_threshold or None
+
+
+def settings() -> dict:
+    """Aktive Einstellungen (für get_server_info und die Worker-Prozesse im Cluster-Modus)"""
+    return {"serializer": _serializer, "compression_threshold": _compression_threshold}
+
+
+def _encode_json(obj: Any) -> str:
+    if _json_dumps is not None:
+        return _json_dumps(obj)
+    return json.dumps(obj, separators=SEPARATORS, ensure_ascii=False)
+
+
+class FrozenPayload(dict):
+    """
+    Unveränderliche Event-Payload mit zwischengespeicherter Kodierung (`encoded` als JSON,
+    `packed` als msgpack). Verhält sich beim Lesen wie das ursprüngliche dict
+    (z.B. für lokale Aufrufer und Pub/Sub-Manager).
+
+    `frames` hält die fertigen (ggf. komprimierten) Pakete je (Pakettyp, Namespace, Event),
+    damit auch die Kompression eines Broadcasts nur einmal anfällt.
+    """
+    __slots__ = ('encoded', 'frames', '_packed')
+
+    def __init__(self, data: dict):
+        super().__init__(data)
+        self.frames = {}
+        self._packed = None
+        if _serializer == "msgpack":
+            self.encoded = None
+            FROZEN_PAYLOAD_BYTES.inc(len(self.packed))
+        else:
+            self.encoded = _encode_json(data)
+            FROZEN_PAYLOAD_BYTES.inc(len(self.encoded))
+        FROZEN_PAYLOADS.inc()
+
+    @property
+    def packed(self) -> bytes:
+        """msgpack-Kodierung der Payload (beim ersten Zugriff erzeugt)"""
+        if self._packed is None:
+            self._packed = _msgpack.packb(dict(self))
+        return self._packed
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenPayload ist unveränderlich")
+
+    __setitem__ = __delitem__ = __ior__ = update = pop = popitem = clear = setdefault = _readonly
+
+    def __reduce__(self):
+        # Pickle (z.B. Message-Queue im Cluster-Modus) ohne __setitem__
+        return FrozenPayload, (dict(self),)
+
+
+def freeze(data: Any) -> Any:
+    """Friert ein dict als FrozenPayload ein (andere Werte und bereits eingefrorene unverändert)"""
+    if type(data) is dict:
+        return FrozenPayload(data)
+    return data
+
+
+def dumps(obj: Any, *args, **kwargs) -> str:
+    """
+    json.dumps-kompatibel (mit dem konfigurierten JSON-Backend). Socket.IO kodiert Events als
+    Liste [event, *args]: enthaltene FrozenPayloads werden dabei nicht erneut kodiert.
+    """
+    if type(obj) is list and any(type(item) is FrozenPayload for item in obj):
+        return '[' + ','.join(
+            item.encoded if type(item) is FrozenPayload else _encode_json(item)
+            for item in obj
+        ) + ']'
+    if type(obj) is FrozenPayload:
+        return obj.encoded
+    return _encode_json(obj)
+
+
+def loads(s, *args, **kwargs) -> Any:
+    """json.loads-kompatibel (mit dem konfigurierten JSON-Backend)"""
+    return _json_loads(s)
+
+
+def pack_packet(packet_type: int, namespace: Optional[str], data: Any, packet_id: Optional[int] = None) -> bytes:
+    """
+    msgpack-Kodierung eines Socket.IO Pakets wie socketio.msgpack_packet.MsgPackPacket.
+    msgpack-Werte lassen sich aneinanderhängen: FrozenPayloads werden als fertige Bytes eingesetzt.
+    """
+    packer = _msgpack.Packer()
+    fields = 4 if packet_id is not None else 3
+    parts = [packer.pack_map_header(fields), packer.pack('type'), packer.pack(packet_type), packer.pack('data')]
+    if type(data) is list:
+        parts.append(packer.pack_array_header(len(data)))
+        parts.extend(item.packed if type(item) is FrozenPayload else packer.pack(item) for item in data)
+    else:
+        parts.append(packer.pack(data))
+    parts += [packer.pack('nsp'), packer.pack(namespace)]
+    if packet_id is not None:
+        parts += [packer.pack('id'), packer.pack(packet_id)]
+    return b''.join(parts)
+
+
+def unpack_packet(encoded: bytes) -> dict:
+    return _msgpack.unpackb(encoded)
+
+
+def compress_frame(encoded: Union[str, bytes]) -> Union[str, bytes]:
+    """Komprimiert ein kodiertes Paket ab der Schwelle (nur wenn es dadurch kleiner wird)"""
+    # Bei Text-Paketen genügt die Zeichenzahl als Größe, kleine Pakete werden nicht umkodiert
+    size = len(encoded)
+    if _compression_threshold is None or size < _compression_threshold:
+        _WIRE_BYTES_ENCODED.inc(size)
+        return encoded
+
+    raw = encoded.encode('utf-8') if isinstance(encoded, str) else encoded
+    compressed = COMPRESSED_MARKER + zlib.compress(raw, COMPRESSION_LEVEL)
+    if len(compressed) >= len(raw):
+        _WIRE_BYTES_ENCODED.inc(len(raw))
+        return encoded
+    WIRE_COMPRESSED_FRAMES.inc()
+    _WIRE_BYTES_SAVED.inc(len(raw) - len(compressed))
+    _WIRE_BYTES_ENCODED.inc(len(compressed))
+    return compressed
+
+
+def decompress_frame(encoded: Union[str, bytes]) -> Union[str, bytes]:
+    """Gegenstück zu compress_frame: liefert das unkomprimierte Paket (Text-Pakete als str)"""
+    if not isinstance(encoded, (bytes, bytearray)) or encoded[:1] != COMPRESSED_MARKER:
+        return encoded
+    raw = zlib.decompress(encoded[1:])
+    return raw if _serializer == "msgpack" else raw.decode('utf-8')
+
+
+def packet_class():
+    """
+    Socket.IO Packet-Klasse (`Server(serializer=WireFormat.packet_class(), json=WireFormat)`).
+    Serializer und Kompression werden bei jedem Paket aus den aktiven Einstellungen gelesen,
+    configure() wirkt daher auch nach dem Erzeugen des Servers.
+    """
+    global _packet_class
+    if _packet_class is not None:
+        return _packet_class
+
+    from socketio import packet
+
+    class WirePacket(packet.Packet):
+        @property
+        def uses_binary_events(self):
+            # msgpack überträgt Binärdaten direkt, JSON braucht Attachments
+            return _serializer != "msgpack"
+
+        def encode(self):
+            # Broadcast einer FrozenPayload: fertiges Paket aus dem Cache
+            data = self.data
+            if self.id is None and type(data) is list and len(data) == 2 and type(data[1]) is FrozenPayload:
+                key = (self.packet_type, self.namespace, data[0])
+                frame = data[1].frames.get(key)
+                if frame is None:
+                    frame = data[1].frames[key] = self._encode_frame()
+                return frame
+            return self._encode_frame()
+
+        def _encode_frame(self):
+            if _serializer == "msgpack":
+                return compress_frame(pack_packet(self.packet_type, self.namespace, self.data, self.id))
+            encoded = super().encode()
+            if isinstance(encoded, list):  # Binär-Attachments bleiben unverändert
+                return encoded
+            return compress_frame(encoded)
+
+        def decode(self, encoded_packet):
+            encoded_packet = decompress_frame(encoded_packet)
+            if isinstance(encoded_packet, (bytes, bytearray)):
+                decoded = unpack_packet(encoded_packet)
+                self.packet_type = decoded['type']
+                self.data = decoded.get('data')
+                self.id = decoded.get('id')
+                self.namespace = decoded.get('nsp', '/')
+                return 0
+            return super().decode(encoded_packet)
+
+    _packet_class = WirePacket
+    return _packet_class
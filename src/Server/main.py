@@ -1,41 +1,163 @@
-from DatabaseService import DatabaseService
-from NetworkService import NetworkService
+from DatabaseService import DatabaseService, EnvironmentPool
+from NetworkService import NetworkService, enable_snapshots as enable_rpc_snapshots
+from Snapshot import DEFAULT_INTERVAL, SnapshotManager
 import GameServer
+import WireFormat
+import multiprocessing
 import threading
+import argparse
 import sys
 import os
 import logging
 
-if getattr(sys, 'frozen', False):
-    print(f'Running in Productive (PROD) Environment (.exe)')
-    program_directory = os.path.dirname(os.path.abspath(sys.executable))
-    ENV = "PROD"
-    logging.basicConfig(filename=f'server.log', filemode='a', format='%(name)s - %(levelname)s - %(funcName)20s() - %(message)s', level=logging.DEBUG, force=True)
-else:
-    print(f'Running in Development (DEV) Environment (.py)')
-    program_directory = os.path.dirname(os.path.abspath(__file__))
-    ENV = "DEV"
-    logging.basicConfig(stream=sys.stdout, format='%(name)s - %(levelname)s - %(funcName)20s() - %(message)s', level=logging.DEBUG, force=True)
-os.chdir(program_directory)
-
-if ENV == "PROD":
-    DatabaseService.PATH_TO_YOUR_CONNECTION_STRING_FILE = r"connection_string.txt"
-    env = DatabaseService.get_sillyorm_environment(use_postgres=True)
-else:
-    ENV == "DEV"
-    env = DatabaseService.get_sillyorm_environment(use_postgres=False)
-
-
-# Initialisiere GameService
-GameServer.init_game_service(env)
-
-# XMLRPC Thread
-NetService = NetworkService()
-xmlrpc_thread = threading.Thread(target=NetService.start, daemon=True)
-xmlrpc_thread.start()
-
-print("✅ XMLRPC Server gestartet auf Port 8000")
-print("🚀 Starte GameService auf Port 5000...")
-
-# Starte GameService
-GameServer.game_service.start()  # ← Über Modul zugreifen
\ No newline at end of file
+
+def _rate_limit(value: str):
+    """Parst "RATE,BURST" für die --rate-limit-* Optionen"""
+    try:
+        rate, burst = value.split(",")
+        return float(rate), int(burst)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Erwartet RATE,BURST (z.B. 10,600), nicht '{value}'")
+
+
+# Worker-Prozesse des Cluster-Modus importieren dieses Modul erneut (spawn) und dürfen nichts starten
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="WahlplakatGame Server")
+    parser.add_argument(
+        "--mode",
+        choices=["classic", "unified", "async", "cluster"],
+        default="classic",
+        help="classic: XML-RPC auf Port 8000 und GameService auf Port 5000, "
+             "unified: RPC und Socket.IO gemeinsam auf Port 5000 (ein Worker-Modell, eine Session-Registry), "
+             "async: XML-RPC auf Port 8000 und asyncio GameService (ASGI/uvicorn) auf Port 5000, "
+             "cluster: wie async, aber mit mehreren Worker-Prozessen auf Port 5000"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="Anzahl Worker-Prozesse im Cluster-Modus (Standard: Anzahl CPU-Kerne)")
+    parser.add_argument("--message-queue", default=None,
+                        help="Message-Queue im Cluster-Modus: redis://host:6379/0 oder broker://host:6380 "
+                             "(Standard: lokaler MessageBroker im Hauptprozess)")
+    parser.add_argument("--serializer", choices=WireFormat.SERIALIZERS, default="json",
+                        help="Kodierung der Socket.IO Pakete (orjson/msgpack benötigen das jeweilige Paket)")
+    parser.add_argument("--compression-threshold", type=int, default=8192,
+                        help="Socket.IO Pakete ab dieser Größe in Bytes komprimieren (0 = nie)")
+    parser.add_argument("--reconnect-grace", type=float, default=GameServer.GameLobby.RECONNECT_GRACE_SECONDS,
+                        help="Getrennte Spieler so viele Sekunden für einen Reconnect parken (0 = sofort entfernen)")
+    parser.add_argument("--snapshot", default=None, metavar="PATH",
+                        help="Warmstart-Snapshot: Lobbys, Caches und Timer beim Beenden und periodisch nach PATH sichern "
+                             "und beim Start von dort laden (Standard: aus)")
+    parser.add_argument("--snapshot-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Sekunden zwischen periodischen Snapshots (0 = nur beim Beenden)")
+    parser.add_argument("--rate-limit-ip", type=_rate_limit, default=NetworkService.RATE_LIMIT_PER_IP, metavar="RATE,BURST",
+                        help="Auth-Aufrufe pro Client-IP: Tokens pro Sekunde und Burst "
+                             f"(Standard: {NetworkService.RATE_LIMIT_PER_IP[0]:g},{NetworkService.RATE_LIMIT_PER_IP[1]})")
+    parser.add_argument("--rate-limit-account", type=_rate_limit, default=NetworkService.RATE_LIMIT_PER_ACCOUNT, metavar="RATE,BURST",
+                        help="Fehlgeschlagene Logins pro Nickname: Tokens pro Sekunde und Burst "
+                             f"(Standard: {NetworkService.RATE_LIMIT_PER_ACCOUNT[0]:g},{NetworkService.RATE_LIMIT_PER_ACCOUNT[1]})")
+    parser.add_argument("--trusted-network", action="append", default=[], metavar="CIDR",
+                        help="Netz ohne IP-Rate-Limit, z.B. das Schulnetz 10.0.0.0/8 (mehrfach angebbar)")
+    args = parser.parse_args()
+    rpc_options = {
+        "rate_limit_per_ip": args.rate_limit_ip,
+        "rate_limit_per_account": args.rate_limit_account,
+        "trusted_networks": args.trusted_network
+    }
+    snapshot_path = os.path.abspath(args.snapshot) if args.snapshot else None
+    WireFormat.configure(args.serializer, args.compression_threshold)
+    GameServer.GameLobby.RECONNECT_GRACE_SECONDS = args.reconnect_grace
+
+    if getattr(sys, 'frozen', False):
+        print(f'Running in Productive (PROD) Environment (.exe)')
+        program_directory = os.path.dirname(os.path.abspath(sys.executable))
+        ENV = "PROD"
+        logging.basicConfig(filename=f'server.log', filemode='a', format='%(name)s - %(levelname)s - %(funcName)20s() - %(message)s', level=logging.DEBUG, force=True)
+    else:
+        print(f'Running in Development (DEV) Environment (.py)')
+        program_directory = os.path.dirname(os.path.abspath(__file__))
+        ENV = "DEV"
+        logging.basicConfig(stream=sys.stdout, format='%(name)s - %(levelname)s - %(funcName)20s() - %(message)s', level=logging.DEBUG, force=True)
+    os.chdir(program_directory)
+
+    if ENV == "PROD":
+        DatabaseService.PATH_TO_YOUR_CONNECTION_STRING_FILE = r"connection_string.txt"
+        env = DatabaseService.get_sillyorm_environment(use_postgres=True)
+    else:
+        ENV == "DEV"
+        env = DatabaseService.get_sillyorm_environment(use_postgres=False)
+
+
+    if args.mode == "cluster":
+        # Mehrere Prozesse hinter Port 5000, Broadcasts über die Message-Queue
+        from Cluster import ClusterSupervisor
+        game_service = ClusterSupervisor(
+            workers=args.workers,
+            message_queue=args.message_queue,
+            use_postgres=(ENV == "PROD"),
+            connection_string_file=os.path.abspath(DatabaseService.PATH_TO_YOUR_CONNECTION_STRING_FILE) if ENV == "PROD" else None,
+            wire_settings=WireFormat.settings(),
+            reconnect_grace=args.reconnect_grace,
+            snapshot_path=snapshot_path,
+            snapshot_interval=args.snapshot_interval
+        )
+
+        NetService = NetworkService(use_postgres=(ENV == "PROD"), **rpc_options)
+        if snapshot_path:
+            # Die Lobbys sichern die Worker selbst, hier nur die Caches des RPC-Servers
+            rpc_snapshots = SnapshotManager(snapshot_path, args.snapshot_interval)
+            enable_rpc_snapshots(NetService, rpc_snapshots)
+            rpc_snapshots.restore()
+            rpc_snapshots.start_periodic(GameServer.scheduler)
+        xmlrpc_thread = threading.Thread(target=NetService.start, daemon=True)
+        xmlrpc_thread.start()
+
+        print("✅ XMLRPC Server gestartet auf Port 8000")
+        print(f"🚀 Starte GameService-Cluster mit {args.workers} Workern auf Port 5000...")
+    elif args.mode == "async":
+        # Socket.IO auf einer Event-Loop statt ein Thread pro Verbindung
+        import AsyncGameServer
+        AsyncGameServer.init_async_game_service(use_postgres=(ENV == "PROD"))
+        game_service = AsyncGameServer.game_service
+
+        NetService = NetworkService(use_postgres=(ENV == "PROD"), **rpc_options)
+        xmlrpc_thread = threading.Thread(target=NetService.start, daemon=True)
+        xmlrpc_thread.start()
+
+        print("✅ XMLRPC Server gestartet auf Port 8000")
+        print("🚀 Starte Async-GameService (ASGI) auf Port 5000...")
+    elif args.mode == "unified":
+        # Ein Port, ein HTTP-Stack: RPC-Routen hängen an der Socket.IO-App
+        # Werkzeug startet pro Anfrage einen Thread: RPC-Routen und Socket.IO Handler leihen sich
+        # Environments aus demselben Pool (Timer und PointsWriter haben eine eigene pro Thread)
+        NetService = NetworkService(use_postgres=(ENV == "PROD"),
+                                    env_pool=EnvironmentPool(size=8, use_postgres=(ENV == "PROD")),
+                                    **rpc_options)
+        GameServer.init_game_service(None, network_service=NetService)
+        game_service = GameServer.game_service
+        print("🚀 Starte GameService mit RPC-Gateway (/RPC2, /JSON) auf Port 5000...")
+    else:
+        # Initialisiere GameService
+        GameServer.init_game_service(env)
+        game_service = GameServer.game_service
+
+        # XMLRPC Thread
+        NetService = NetworkService(**rpc_options)
+        xmlrpc_thread = threading.Thread(target=NetService.start, daemon=True)
+        xmlrpc_thread.start()
+
+        print("✅ XMLRPC Server gestartet auf Port 8000")
+        print("🚀 Starte GameService auf Port 5000...")
+
+    if snapshot_path and args.mode != "cluster":
+        snapshots = SnapshotManager(snapshot_path, args.snapshot_interval)
+        enable_rpc_snapshots(NetService, snapshots)
+        game_service.enable_snapshots(snapshots)
+
+    # Starte GameService
+    try:
+        game_service.start()
+    finally:
+        if snapshot_path and args.mode == "cluster":
+            rpc_snapshots.stop()
+            rpc_snapshots.save('shutdown')